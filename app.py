@@ -1,11 +1,12 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import trimesh
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import art3d
+from mesh_loader import STEP_TOL_ANGULAR, STEP_TOL_LINEAR, load_mesh
 from slice_chamber_final import (
     rotate_mesh_to_q1,
     generate_slices,
+    get_rz_slice,
     save_to_csv,
     plot_cross_sections,
 )
@@ -15,11 +16,51 @@ class KisslingerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Kisslinger Coordinates Exporter")
-        self.root.geometry("400x300")
+        self.root.geometry("950x560")
 
         self.mesh = None
         self.filename = None
 
+        # Preview state: sections cached by (mesh_id, phi, num_points) and
+        # computed one at a time by a background worker
+        self.mesh_id = 0
+        self.preview_cache = {}
+        self.preview_key = None
+        self.preview_request = None
+        self.preview_lock = threading.Lock()
+        self.preview_wakeup = threading.Event()
+        self.preview_done = queue.Queue()
+        # trimesh builds its caches lazily, so the preview thread and an
+        # export must not section the same mesh at the same time
+        self.mesh_lock = threading.Lock()
+
+        # Preview panel (packed first so it takes the right-hand side)
+        self.frame_preview = tk.Frame(root)
+        self.frame_preview.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        # The matplotlib canvas is built on the first load so the window
+        # opens without importing matplotlib
+        self.preview_canvas = None
+        self.label_preview = tk.Label(
+            self.frame_preview, text="Load a file to preview cross-sections."
+        )
+        self.label_preview.pack(fill=tk.BOTH, expand=True)
+
+        self.scale_phi = tk.Scale(
+            self.frame_preview,
+            from_=0,
+            to=90,
+            resolution=0.25,
+            orient=tk.HORIZONTAL,
+            label="Preview Phi (°)",
+            command=self.update_preview,
+            state=tk.DISABLED,
+        )
+        self.scale_phi.pack(fill=tk.X, padx=10, pady=5)
+
+        threading.Thread(target=self._preview_worker, daemon=True).start()
+        self.root.after(20, self._poll_preview)
+
         # UI Elements
         self.label_status = tk.Label(
             root, text="Welcome! Please load an STL file.", wraplength=350
@@ -43,6 +84,23 @@ class KisslingerApp:
         self.entry_points = tk.Entry(self.frame_params, width=10)
         self.entry_points.insert(0, "500")
         self.entry_points.grid(row=1, column=1, padx=5)
+        # The preview uses the same point count as the export
+        self.entry_points.bind("<Return>", self.update_preview)
+        self.entry_points.bind("<FocusOut>", self.update_preview)
+
+        tk.Label(self.frame_params, text="STEP Chord Tol (mm):").grid(
+            row=2, column=0, padx=5
+        )
+        self.entry_tol_linear = tk.Entry(self.frame_params, width=10)
+        self.entry_tol_linear.insert(0, str(STEP_TOL_LINEAR))
+        self.entry_tol_linear.grid(row=2, column=1, padx=5)
+
+        tk.Label(self.frame_params, text="STEP Angle Defl. (rad):").grid(
+            row=3, column=0, padx=5
+        )
+        self.entry_tol_angular = tk.Entry(self.frame_params, width=10)
+        self.entry_tol_angular.insert(0, str(STEP_TOL_ANGULAR))
+        self.entry_tol_angular.grid(row=3, column=1, padx=5)
 
         self.btn_load = tk.Button(
             root,
@@ -83,26 +141,25 @@ class KisslingerApp:
             ]
         )
         if file_path:
+            try:
+                tol_linear = float(self.entry_tol_linear.get())
+                tol_angular = float(self.entry_tol_angular.get())
+                if tol_linear <= 0 or tol_angular <= 0:
+                    raise ValueError("Tessellation tolerances must be positive.")
+            except ValueError as e:
+                messagebox.showerror(
+                    "Invalid Input", f"Please check your parameters: {e}"
+                )
+                return
+
             try:
                 self.label_status.config(text=f"Loading {file_path}...")
                 self.root.update()
 
-                # Load the mesh (handles STL and STEP via gmsh if installed)
-                loaded = trimesh.load(file_path, process=False)
-
-                # Handle Scene objects (common with STEP files)
-                if isinstance(loaded, trimesh.Scene):
-                    if len(loaded.geometry) == 0:
-                        raise ValueError("The loaded file contains no geometry.")
-                    # Concatenate all geometries in the scene into a single mesh
-                    self.mesh = trimesh.util.concatenate(
-                        tuple(
-                            trimesh.Trimesh(vertices=g.vertices, faces=g.faces)
-                            for g in loaded.geometry.values()
-                        )
-                    )
-                else:
-                    self.mesh = loaded
+                # Load, flatten and weld the mesh once (see mesh_loader.py)
+                self.mesh = load_mesh(
+                    file_path, tol_linear=tol_linear, tol_angular=tol_angular
+                )
 
                 self.mesh = rotate_mesh_to_q1(self.mesh)
                 self.filename = file_path
@@ -112,19 +169,124 @@ class KisslingerApp:
                 )
                 self.btn_view.config(state=tk.NORMAL)
                 self.btn_export.config(state=tk.NORMAL)
+
+                # New mesh: drop cached sections and preview the current angle
+                self.mesh_id += 1
+                self.preview_cache.clear()
+                self._build_preview_canvas()
+                self.scale_phi.config(state=tk.NORMAL)
+                self.update_preview()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file: {e}")
                 self.label_status.config(text="Error loading file.")
 
+    def _build_preview_canvas(self):
+        """Creates the preview figure the first time a mesh is loaded."""
+        if self.preview_canvas is not None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.preview_figure = Figure(figsize=(5, 5))
+        self.preview_ax = self.preview_figure.add_subplot(111)
+        (self.preview_line,) = self.preview_ax.plot([], [], ".-", markersize=1)
+        (self.preview_start,) = self.preview_ax.plot([], [], "r*", markersize=10)
+        self.preview_ax.set_aspect("equal", adjustable="datalim")
+        self.preview_ax.set_xlabel("R [mm]")
+        self.preview_ax.set_ylabel("Z [mm]")
+        self.preview_ax.grid(True)
+        self.preview_canvas = FigureCanvasTkAgg(
+            self.preview_figure, master=self.frame_preview
+        )
+        self.label_preview.destroy()
+        self.preview_canvas.get_tk_widget().pack(
+            fill=tk.BOTH, expand=True, before=self.scale_phi
+        )
+
+    def update_preview(self, _value=None):
+        """Shows the section at the slider angle, computing it in the background."""
+        if self.mesh is None:
+            return
+        try:
+            num_points = int(self.entry_points.get())
+        except ValueError:
+            return
+        if num_points <= 0:
+            return
+
+        self.preview_key = (self.mesh_id, float(self.scale_phi.get()), num_points)
+        if self.preview_key in self.preview_cache:
+            self._draw_preview(self.preview_key)
+            return
+
+        # Only the latest request matters; older pending ones are replaced
+        with self.preview_lock:
+            self.preview_request = (self.preview_key, self.mesh)
+        self.preview_wakeup.set()
+
+    def _preview_worker(self):
+        """Background thread: sections one plane at a time for the preview."""
+        while True:
+            self.preview_wakeup.wait()
+            with self.preview_lock:
+                request, self.preview_request = self.preview_request, None
+                self.preview_wakeup.clear()
+            if request is None:
+                continue
+
+            key, mesh = request
+            if key not in self.preview_cache:
+                _, phi, num_points = key
+                try:
+                    with self.mesh_lock:
+                        self.preview_cache[key] = get_rz_slice(
+                            mesh, phi, num_points=num_points
+                        )
+                except Exception as e:
+                    print(f"Preview failed at {phi}°: {e}")
+                    self.preview_cache[key] = (None, None)
+            self.preview_done.put(key)
+
+    def _poll_preview(self):
+        """Draws finished previews on the Tk thread."""
+        try:
+            while True:
+                key = self.preview_done.get_nowait()
+                if key == self.preview_key:
+                    self._draw_preview(key)
+        except queue.Empty:
+            pass
+        self.root.after(20, self._poll_preview)
+
+    def _draw_preview(self, key):
+        _, phi, num_points = key
+        r_vals, z_vals = self.preview_cache[key]
+        if r_vals is None:
+            self.preview_line.set_data([], [])
+            self.preview_start.set_data([], [])
+            self.preview_ax.set_title(f"Phi={phi}°: no section")
+        else:
+            self.preview_line.set_data(r_vals, z_vals)
+            self.preview_start.set_data([r_vals[0]], [z_vals[0]])
+            self.preview_ax.set_title(f"Phi={phi}° ({num_points} points)")
+            self.preview_ax.relim()
+            self.preview_ax.autoscale_view()
+        self.preview_canvas.draw_idle()
+
     def view_mesh(self):
         if self.mesh:
             try:
                 # Use matplotlib for viewing to avoid GLU dependency issues
+                import matplotlib.pyplot as plt
+                from mpl_toolkits.mplot3d import art3d
+
                 fig = plt.figure(figsize=(8, 8))
                 ax = fig.add_subplot(111, projection="3d")
 
                 # Create a Poly3DCollection
-                mesh_collection = art3d.Poly3DCollection(self.mesh.triangles)
+                with self.mesh_lock:
+                    triangles = self.mesh.triangles
+                mesh_collection = art3d.Poly3DCollection(triangles)
                 mesh_collection.set_edgecolor("k")
                 mesh_collection.set_alpha(0.5)
 
@@ -167,14 +329,19 @@ class KisslingerApp:
                 )
                 self.root.update()
 
-                # Generate slices with the requested parameters
-                results = generate_slices(
-                    self.mesh,
-                    start_angle=0,
-                    end_angle=90,
-                    step=step,
-                    num_points=num_points,
-                )
+                # Waits for a running preview section to finish first
+                with self.mesh_lock:
+                    # Generate slices with the requested parameters (planes
+                    # failing the contour validity checks are re-sliced)
+                    results = generate_slices(
+                        self.mesh,
+                        start_angle=0,
+                        end_angle=90,
+                        step=step,
+                        num_points=num_points,
+                    )
+                if not results:
+                    raise ValueError("The mesh produced no slices.")
 
                 save_to_csv(results, filename=save_path)
 
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the GUI and pipeline modules.
+
+Each module is imported in a fresh interpreter several times and the fastest
+run is compared against its startup budget. Heavy packages (trimesh, scipy,
+matplotlib, gmsh/cascadio) should only load on first use, so they must not
+show up in a bare import. Exits with status 1 if any budget is exceeded or a
+deferred package is imported eagerly.
+
+Usage:
+    python3 benchmark_startup.py [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Module -> import budget in seconds
+STARTUP_BUDGETS = {
+    "slice_chamber_final": 0.4,
+    "kisslinger_io": 0.3,
+    "mesh_loader": 0.3,
+    "app": 0.5,
+}
+
+# Packages that must stay unloaded until they are actually needed
+DEFERRED_PACKAGES = ("trimesh", "scipy", "matplotlib", "gmsh", "cascadio")
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({deferred!r}))
+print(elapsed, ",".join(loaded))
+"""
+
+
+def measure_import(module, repeat=5):
+    """Returns (best import time in seconds, eagerly loaded deferred packages)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    loaded = ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                _PROBE.format(module=module, deferred=DEFERRED_PACKAGES),
+            ],
+            cwd=here,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ""
+    return min(times), [name for name in loaded.split(",") if name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check module import budgets")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'Module':<22} {'Import (s)':>10} {'Budget (s)':>10}  Eager heavy imports")
+    print("-" * 70)
+    for module, budget in STARTUP_BUDGETS.items():
+        elapsed, eager = measure_import(module, args.repeat)
+        over = elapsed > budget or eager
+        failed |= bool(over)
+        print(
+            f"{module:<22} {elapsed:>10.3f} {budget:>10.3f}  "
+            f"{', '.join(eager) or '-'}{'  <-- FAIL' if over else ''}"
+        )
+
+    sys.exit(1 if failed else 0)
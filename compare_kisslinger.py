@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Compare two Kisslinger files (or two CSV exports) and report what changed.
+
+Reports header mismatches, the max and RMS point deviation per plane, and
+planes whose point indices are shifted against the reference (the point-0
+correspondence changed). Everything is computed in whole-array passes, and
+candidate planes that are byte-identical to the reference are not parsed a
+second time.
+
+Exit codes, for use as a regression gate:
+    0  identical within tolerance
+    1  geometry or index correspondence differs
+    2  headers or array shapes differ
+
+Usage:
+    python3 compare_kisslinger.py vessel_fixed.kisslinger new.kisslinger --tol 1e-6
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from kisslinger_io import read_pair
+
+
+def compare_headers(ref, new):
+    """Returns a list of human-readable header mismatches."""
+    problems = []
+    for key in ("format", "units", "name", "nfp", "header"):
+        if ref[key] != new[key]:
+            problems.append(f"{key}: {ref[key]!r} != {new[key]!r}")
+    if ref["R"].shape != new["R"].shape:
+        problems.append(
+            f"shape (n_phi, n_points): {ref['R'].shape} != {new['R'].shape}"
+        )
+    elif not np.allclose(ref["phis"], new["phis"], rtol=0, atol=1e-9):
+        bad = np.flatnonzero(~np.isclose(ref["phis"], new["phis"], rtol=0, atol=1e-9))
+        problems.append(
+            f"phi values differ at {len(bad)} planes (first index {bad[0]})"
+        )
+    return problems
+
+
+def best_index_shift(ref_R, ref_Z, new_R, new_Z):
+    """
+    Finds, per plane, the cyclic index shift s with new[k + s] ~ ref[k].
+    Uses FFT cross-correlation of the complex contours R + iZ, batched over planes.
+    Returns (shift, aligned_max_deviation) arrays of shape (n_phi,).
+    """
+    a = ref_R + 1j * ref_Z
+    b = new_R + 1j * new_Z
+    n_points = a.shape[1]
+
+    # sum_k conj(a[k]) * b[k + s] for every s; the best shift maximizes its real part
+    corr = np.fft.ifft(np.conj(np.fft.fft(a, axis=1)) * np.fft.fft(b, axis=1), axis=1)
+    shift = np.argmax(corr.real, axis=1)
+    shift = np.where(shift > n_points // 2, shift - n_points, shift)
+
+    # take b[k + shift] on every row in one fancy-indexing pass
+    cols = (np.arange(n_points)[None, :] + shift[:, None]) % n_points
+    aligned = np.take_along_axis(b, cols, axis=1)
+    return shift, np.abs(a - aligned).max(axis=1)
+
+
+def compare_datasets(ref, new, tol=0.0):
+    """
+    Computes per-plane deviations between two datasets of the same shape.
+    Index shifts are only searched on planes deviating by more than tol.
+    Returns a dict of (n_phi,) arrays: max_dev, rms_dev, shift, aligned_max_dev.
+    """
+    dev = np.hypot(new["R"] - ref["R"], new["Z"] - ref["Z"])
+    max_dev = dev.max(axis=1)
+
+    shift = np.zeros(len(max_dev), dtype=int)
+    aligned = max_dev.copy()
+    changed = max_dev > tol
+    if changed.any():
+        shift[changed], aligned[changed] = best_index_shift(
+            ref["R"][changed], ref["Z"][changed], new["R"][changed], new["Z"][changed]
+        )
+
+    return {
+        "max_dev": max_dev,
+        "rms_dev": np.sqrt((dev**2).mean(axis=1)),
+        "shift": shift,
+        "aligned_max_dev": aligned,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("reference", help="Reference Kisslinger or CSV file")
+    parser.add_argument("candidate", help="File to compare against the reference")
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-6,
+        help="Allowed point deviation in file units (default: 1e-6)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of worst planes to list"
+    )
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    ref, new = read_pair(args.reference, args.candidate)
+
+    print(f"Reference: {args.reference} ({ref['R'].shape[0]}x{ref['R'].shape[1]})")
+    print(f"Candidate: {args.candidate} ({new['R'].shape[0]}x{new['R'].shape[1]})")
+
+    problems = compare_headers(ref, new)
+    if problems:
+        print("\nHEADER MISMATCHES:")
+        for problem in problems:
+            print(f"  {problem}")
+    if ref["R"].shape != new["R"].shape:
+        print("\nShapes differ, cannot compare point by point.")
+        return 2
+
+    stats = compare_datasets(ref, new, args.tol)
+    units = ref["units"]
+    bad = np.flatnonzero(stats["max_dev"] > args.tol)
+    shifted = np.flatnonzero(stats["shift"] != 0)
+
+    print(f"\nMax deviation: {stats['max_dev'].max():.6g} {units}")
+    print(f"RMS deviation: {np.sqrt((stats['rms_dev'] ** 2).mean()):.6g} {units}")
+    print(f"Planes above tolerance ({args.tol:g} {units}): {len(bad)}")
+
+    if len(bad):
+        print(f"\nWORST {min(args.top, len(bad))} PLANES:")
+        print(f"{'Index':>6} {'Phi':>10} {'Max':>12} {'RMS':>12} {'Shift':>6}")
+        for k in bad[np.argsort(stats["max_dev"][bad])[::-1][: args.top]]:
+            print(
+                f"{k:>6} {ref['phis'][k]:>10.4f} {stats['max_dev'][k]:>12.6g} "
+                f"{stats['rms_dev'][k]:>12.6g} {stats['shift'][k]:>6}"
+            )
+
+    if len(shifted):
+        print(f"\nIndex correspondence shifted on {len(shifted)} planes:")
+        for k in shifted[: args.top]:
+            print(
+                f"  phi={ref['phis'][k]:.4f}: shift {stats['shift'][k]:+d} points, "
+                f"max deviation after realignment {stats['aligned_max_dev'][k]:.6g} {units}"
+            )
+
+    print(f"\nCompared in {time.perf_counter() - t0:.3f} s")
+
+    if problems:
+        return 2
+    if len(bad) or len(shifted):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Automatic validity checks for sliced contours.
+
+Every (n_phi, n_points) block of closed contours is checked in one pass for:
+
+    self-intersections   non-adjacent segments of a plane that cross or touch
+    short segments       consecutive points closer than min_segment
+    open contours        a closing segment (point n-1 -> 0) much longer than
+                         the typical segment
+    orientation          signed area with the opposite sign to the majority of
+                         planes, or zero
+    spikes               points where the contour turns back by more than
+                         max_turn degrees
+
+Self-intersections, open contours and flipped orientation make a plane
+invalid. Short segments and spikes are only reported: sharp CAD corners turn
+by more than max_turn too. An angular sort always gives a simple polygon, so
+when it scrambles a section that isn't star-shaped around its centroid the
+result doesn't self-intersect but zig-zags between the walls; strict=True
+(--strict) counts those spikes and short segments as failures as well.
+
+Self-intersections use a uniform grid per plane: every segment is bucketed
+by its midpoint into cells as large as the longest segment, and only
+segments in the same or neighbouring cells are tested exactly. All planes go
+through the same sort, so the whole block is checked without a Python loop
+over planes or segments.
+
+Invalid planes can be re-sliced with a fallback that doesn't rely on the
+angular sort: "path" keeps the point order of the connected section polyline,
+"rays" samples the wall along fixed poloidal rays (ray_slicer.py).
+get_rz_slice() runs repair_slice() on every section it makes, so every
+slicing pipeline gets the fallback.
+
+Kisslinger exports mirror Z on half of their planes, which reverses their
+orientation; --mirrored checks those against the opposite sign.
+
+Usage:
+    python3 contour_validity.py chamber_coordinates_fixed.csv
+    python3 contour_validity.py vessel_fixed.kisslinger --mirrored
+    python3 contour_validity.py chamber_coordinates_fixed.csv --mesh chamber_surface.stl -o repaired.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results, read_dataset, results_to_arrays
+
+# Default thresholds: minimum segment length (same units as the contours),
+# the longest closing segment allowed relative to the median segment, and the
+# sharpest turn (degrees) between consecutive segments
+MIN_SEGMENT = 1e-6
+CLOSURE_FACTOR = 3.0
+MAX_TURN = 135.0
+
+# Candidate segment pairs tested per vectorized batch (bounds memory use)
+PAIR_BATCH = 1 << 18
+
+
+def _segment_intersections(R, Z, seg_length, batch=PAIR_BATCH):
+    """
+    Returns (plane, i, j) for every pair of non-adjacent segments i < j that
+    intersect. Segment i runs from point i to point (i + 1) % n.
+
+    Segments are bucketed by their midpoint on a grid whose cells are as
+    large as the longest segment of the plane, so two intersecting segments
+    always sit in the same or neighbouring cells. Candidate pairs are
+    expanded at most batch at a time.
+    """
+    n_phi, n = R.shape
+    R1, Z1 = np.roll(R, -1, axis=1), np.roll(Z, -1, axis=1)
+
+    cell = seg_length.max(axis=1)
+    cell = np.where(cell > 0, cell, 1.0)[:, None]
+    mid_R, mid_Z = (R + R1) / 2, (Z + Z1) / 2
+    cx = np.floor((mid_R - mid_R.min(axis=1, keepdims=True)) / cell).astype(np.int64)
+    cy = np.floor((mid_Z - mid_Z.min(axis=1, keepdims=True)) / cell).astype(np.int64)
+    cy += 1  # keeps cy - 1 inside the key range
+
+    # Keys without wrap-around for the neighbours (cx + 1, cy +- 1)
+    width, height = cx.max() + 2, cy.max() + 2
+    plane = np.repeat(np.arange(n_phi), n)
+    keys = (plane * width + cx.ravel()) * height + cy.ravel()
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+
+    # Candidates of every entry: later entries of its own cell, then every
+    # entry of the forward half of its neighbouring cells (each cell pair once)
+    entry = np.arange(len(keys))
+    ranges = [(entry + 1, np.searchsorted(keys, keys, side="right"))]
+    for dx, dy in ((0, 1), (1, -1), (1, 0), (1, 1)):
+        neighbour = keys + dx * height + dy
+        ranges.append(
+            (
+                np.searchsorted(keys, neighbour, side="left"),
+                np.searchsorted(keys, neighbour, side="right"),
+            )
+        )
+    starts = np.concatenate([lo for lo, _ in ranges])
+    counts = np.concatenate([hi - lo for lo, hi in ranges])
+    first = np.tile(entry, len(ranges))
+
+    Rf, Zf, R1f, Z1f = R.ravel(), Z.ravel(), R1.ravel(), Z1.ravel()
+    found = []
+    cumulative = np.cumsum(counts)
+    done = 0
+    while done < len(counts):
+        # Whole candidate lists, about batch pairs at a time
+        stop = max(
+            np.searchsorted(
+                cumulative, cumulative[done] - counts[done] + batch, "right"
+            ),
+            done + 1,
+        )
+        c = counts[done:stop]
+        offsets = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+        a = order[np.repeat(first[done:stop], c)]
+        b = order[np.repeat(starts[done:stop], c) + offsets]
+        done = stop
+
+        # Neighbouring segments share a point
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        gap = (b - a) % n
+        keep = (gap != 1) & (gap != n - 1)
+        a, b = a[keep], b[keep]
+
+        # Exact test: bounding boxes overlap and each segment's ends straddle
+        # the other
+        ar, az, ar1, az1 = Rf[a], Zf[a], R1f[a], Z1f[a]
+        br, bz, br1, bz1 = Rf[b], Zf[b], R1f[b], Z1f[b]
+        hit = (
+            (np.minimum(ar, ar1) <= np.maximum(br, br1))
+            & (np.minimum(br, br1) <= np.maximum(ar, ar1))
+            & (np.minimum(az, az1) <= np.maximum(bz, bz1))
+            & (np.minimum(bz, bz1) <= np.maximum(az, az1))
+        )
+        hit &= (
+            _cross(ar, az, ar1, az1, br, bz) * _cross(ar, az, ar1, az1, br1, bz1) <= 0
+        )
+        hit &= (
+            _cross(br, bz, br1, bz1, ar, az) * _cross(br, bz, br1, bz1, ar1, az1) <= 0
+        )
+        found.append(a[hit] * (n_phi * n) + b[hit])
+
+    pairs = np.sort(np.concatenate(found)) if found else np.zeros(0, np.int64)
+    a, b = pairs // (n_phi * n), pairs % (n_phi * n)
+    return a // n, a % n, b % n
+
+
+def _cross(ar, az, br, bz, cr, cz):
+    """z component of (b - a) x (c - a)."""
+    return (br - ar) * (cz - az) - (bz - az) * (cr - ar)
+
+
+def kisslinger_mirrored(phis):
+    """
+    Planes whose Z save_to_kisslinger() mirrored (which reverses their
+    orientation): target angles in [0, 90) modulo 180.
+    """
+    return np.mod(np.asarray(phis, dtype=float), 180.0) < 90.0
+
+
+def check_contours(
+    R,
+    Z,
+    min_segment=MIN_SEGMENT,
+    closure_factor=CLOSURE_FACTOR,
+    max_turn=MAX_TURN,
+    mirrored=None,
+    strict=False,
+):
+    """
+    Runs every check on (n_phi, n_points) closed contours. mirrored marks
+    planes expected to have the opposite orientation (see kisslinger_mirrored).
+
+    Returns a dict of per-plane results (self_intersections, short_segments
+    and spikes counts, open, flipped, area), the intersecting segment pairs,
+    "warnings", the planes with short segments or spikes, and "invalid", the
+    planes that self-intersect, are open or flipped (or have warnings, if
+    strict).
+    """
+    R = np.asarray(R, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+
+    dR, dZ = np.roll(R, -1, axis=1) - R, np.roll(Z, -1, axis=1) - Z
+    seg_length = np.hypot(dR, dZ)
+    short_segments = np.count_nonzero(seg_length < min_segment, axis=1)
+
+    # Turn at every point, between the incoming and outgoing segment
+    turn_cos = (dR * np.roll(dR, 1, axis=1) + dZ * np.roll(dZ, 1, axis=1)) / np.maximum(
+        seg_length * np.roll(seg_length, 1, axis=1), 1e-300
+    )
+    spikes = np.count_nonzero(turn_cos < np.cos(np.radians(max_turn)), axis=1)
+    median = np.median(seg_length, axis=1)
+    open_contour = seg_length[:, -1] > closure_factor * median
+
+    # Shoelace area; the angular sort gives counter-clockwise (positive) contours
+    area = 0.5 * (R * np.roll(Z, -1, axis=1) - np.roll(R, -1, axis=1) * Z).sum(axis=1)
+    oriented = area if mirrored is None else np.where(mirrored, -area, area)
+    majority = (
+        1.0
+        if np.count_nonzero(oriented > 0) >= np.count_nonzero(oriented < 0)
+        else -1.0
+    )
+    flipped = np.sign(oriented) != majority
+
+    plane, i, j = _segment_intersections(R, Z, seg_length)
+    self_intersections = np.bincount(plane, minlength=len(R))
+
+    warnings = (short_segments > 0) | (spikes > 0)
+    invalid = (self_intersections > 0) | open_contour | flipped
+    if strict:
+        invalid |= warnings
+    return {
+        "self_intersections": self_intersections,
+        "intersection_pairs": np.column_stack([plane, i, j]),
+        "short_segments": short_segments,
+        "spikes": spikes,
+        "open": open_contour,
+        "flipped": flipped,
+        "area": area,
+        "warnings": warnings,
+        "invalid": invalid,
+    }
+
+
+def check_results(results, **kwargs):
+    """check_contours() for a {phi: (R, Z)} dict; adds the "phis" array."""
+    phis, R, Z = results_to_arrays(results)
+    return dict(check_contours(R, Z, **kwargs), phis=phis)
+
+
+def print_validity(report, top=20):
+    """Prints the invalid planes and the planes with warnings of a report."""
+    bad = np.flatnonzero(report["invalid"] | report["warnings"])
+    print(
+        f"Contour validity: {np.count_nonzero(report['invalid'])} of "
+        f"{len(report['invalid'])} planes invalid, "
+        f"{np.count_nonzero(report['warnings'] & ~report['invalid'])} with warnings"
+    )
+    for k in bad[:top]:
+        reasons = []
+        if report["self_intersections"][k]:
+            reasons.append(f"{report['self_intersections'][k]} self-intersections")
+        if report["short_segments"][k]:
+            reasons.append(f"{report['short_segments'][k]} short segments")
+        if report["spikes"][k]:
+            reasons.append(f"{report['spikes'][k]} spikes")
+        if report["open"][k]:
+            reasons.append("open")
+        if report["flipped"][k]:
+            reasons.append("flipped orientation")
+        label = "invalid" if report["invalid"][k] else "warning"
+        print(
+            f"  plane {k:>5} (phi {report['phis'][k]:.4f}°) {label}: "
+            f"{', '.join(reasons)}"
+        )
+    if len(bad) > top:
+        print(f"  ... and {len(bad) - top} more")
+
+
+def path_order_slice(mesh, phi_degrees, num_points=500):
+    """
+    Fallback slice that follows the connectivity of the section polyline
+    instead of sorting points by angle. Keeps the longest closed polyline on
+    the front half-plane. Returns (R, Z) or (None, None).
+    """
+    from resample_kisslinger import resample_contours
+    from slice_chamber_final import _normalize_starting_point
+
+    phi_rad = np.radians(phi_degrees)
+    for attempt in range(2):
+        normal = np.array([np.sin(phi_rad), -np.cos(phi_rad), 0])
+        section = mesh.section(plane_origin=np.zeros(3), plane_normal=normal)
+        if section is not None:
+            break
+        # Retry with small epsilon if exact slice fails (common at 0 degrees)
+        phi_rad += 1e-5
+    else:
+        return None, None
+
+    direction = np.array([np.cos(phi_rad), np.sin(phi_rad), 0])
+    loops = [loop for loop in section.discrete if (loop @ direction).mean() > 0]
+    if not loops:
+        return None, None
+    loop = max(loops, key=lambda p: np.linalg.norm(np.diff(p, axis=0), axis=1).sum())
+    if np.linalg.norm(loop[-1] - loop[0]) <= 1e-6:
+        loop = loop[:-1]
+    if len(loop) < 3:
+        return None, None
+
+    points = np.column_stack([np.hypot(loop[:, 0], loop[:, 1]), loop[:, 2]])
+    # Counter-clockwise, like the angular sort
+    area = np.sum(points[:, 0] * np.roll(points[:, 1], -1)) - np.sum(
+        np.roll(points[:, 0], -1) * points[:, 1]
+    )
+    if area < 0:
+        points = points[::-1]
+    points = _normalize_starting_point(points)
+
+    R, Z = resample_contours(points[None, :, 0], points[None, :, 1], num_points)
+    return R[0], Z[0]
+
+
+def ray_slice(mesh, phi_degrees, num_points=500):
+    """Fallback slice from ray_slicer.py. Returns (R, Z) or (None, None)."""
+    from ray_slicer import raycast_slices
+
+    R, Z = raycast_slices(mesh, [phi_degrees], num_points=num_points)
+    if np.isnan(R).any():
+        return None, None
+    return R[0], Z[0]
+
+
+FALLBACKS = {"path": path_order_slice, "rays": ray_slice}
+
+
+def _fallback(mesh, fallback):
+    """
+    The fallback actually usable on mesh, or None. The path fallback needs
+    trimesh's section() (out-of-core meshes use rays), the rays need
+    triangles (an SDFSlicer has neither).
+    """
+    if fallback == "path" and not hasattr(mesh, "section"):
+        fallback = "rays"
+    if fallback == "rays" and not hasattr(mesh, "triangles"):
+        return None
+    return fallback
+
+
+def _fallback_slice(mesh, phi, num_points, fallback, sign, kwargs):
+    """
+    The fallback slice at phi if it passes the checks with the orientation
+    sign, otherwise (None, None).
+    """
+    r_vals, z_vals = FALLBACKS[fallback](mesh, phi, num_points=num_points)
+    if r_vals is None:
+        return None, None
+    check = check_contours(r_vals[None], z_vals[None], **kwargs)
+    if check["invalid"][0] or np.sign(check["area"][0]) != sign:
+        return None, None
+    return r_vals, z_vals
+
+
+def repair_slice(mesh, phi, r_vals, z_vals, fallback="path", **kwargs):
+    """
+    repair_slices() for a single counter-clockwise contour (as the angular
+    sort gives), for pipelines that slice one angle at a time. Returns the
+    fallback slice if (r_vals, z_vals) is invalid and the fallback passes the
+    checks, otherwise the contour unchanged.
+    """
+    check = check_contours(r_vals[None], z_vals[None], **kwargs)
+    if not check["invalid"][0] and check["area"][0] > 0:
+        return r_vals, z_vals
+    fallback = _fallback(mesh, fallback)
+    if fallback is None:
+        return r_vals, z_vals
+
+    new_r, new_z = _fallback_slice(mesh, phi, len(r_vals), fallback, 1.0, kwargs)
+    if new_r is None:
+        print(f"Invalid contour at {phi}°, the {fallback} fallback failed too.")
+        return r_vals, z_vals
+    print(f"Re-sliced the invalid contour at {phi}° with the {fallback} fallback.")
+    return new_r, new_z
+
+
+def repair_slices(mesh, results, fallback="path", **kwargs):
+    """
+    Checks the results and re-slices invalid planes with the fallback method.
+    Planes with only warnings are kept unless strict=True is passed. A
+    replacement is only kept if it passes the checks itself.
+    Returns (repaired results, report of the original results).
+    """
+    report = check_results(results, **kwargs)
+    print_validity(report)
+    bad = np.flatnonzero(report["invalid"])
+    if len(bad) == 0:
+        return results, report
+
+    fallback = _fallback(mesh, fallback)
+    if fallback is None:
+        print(f"No fallback slicer for {type(mesh).__name__}; planes kept as is.")
+        return results, report
+    num_points = len(next(iter(results.values()))[0])
+    sign = np.sign(np.median(report["area"]))
+
+    repaired = dict(results)
+    fixed = 0
+    for k in bad:
+        phi = report["phis"][k]
+        r_vals, z_vals = _fallback_slice(mesh, phi, num_points, fallback, sign, kwargs)
+        if r_vals is None:
+            continue
+        repaired[phi] = (r_vals, z_vals)
+        fixed += 1
+    print(
+        f"Re-sliced {fixed} of {len(bad)} invalid planes with the {fallback} fallback."
+    )
+    return repaired, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check sliced contours")
+    parser.add_argument("input", help="CSV export or Kisslinger file")
+    parser.add_argument("--min-segment", type=float, default=MIN_SEGMENT)
+    parser.add_argument("--closure-factor", type=float, default=CLOSURE_FACTOR)
+    parser.add_argument("--max-turn", type=float, default=MAX_TURN)
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Count short segments and spikes as invalid (re-sliced with --mesh)",
+    )
+    parser.add_argument(
+        "--mirrored",
+        action="store_true",
+        help="Input is a save_to_kisslinger() export, whose planes at [0, 90) "
+        "mod 180° have mirrored Z and so the opposite orientation",
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--mesh", default=None, help="Source mesh, to re-slice invalid planes"
+    )
+    parser.add_argument("--fallback", choices=sorted(FALLBACKS), default="path")
+    parser.add_argument("-o", "--output", default=None, help="Repaired CSV")
+    args = parser.parse_args()
+
+    data = read_dataset(args.input)
+    t0 = time.perf_counter()
+    report = dict(
+        check_contours(
+            data["R"],
+            data["Z"],
+            min_segment=args.min_segment,
+            closure_factor=args.closure_factor,
+            max_turn=args.max_turn,
+            strict=args.strict,
+            mirrored=kisslinger_mirrored(data["phis"]) if args.mirrored else None,
+        ),
+        phis=data["phis"],
+    )
+    print(
+        f"Checked {data['R'].shape[0]}x{data['R'].shape[1]} contours "
+        f"in {time.perf_counter() - t0:.2f} s"
+    )
+    print_validity(report, top=args.top)
+
+    if args.mesh:
+        from mesh_loader import load_mesh
+        from slice_chamber_final import (
+            rotate_mesh_to_q1,
+            save_to_csv,
+            smooth_toroidal_continuity,
+        )
+
+        if data["units"] != "mm":
+            parser.error("Re-slicing needs the CSV export (mm) of the same mesh.")
+        mesh = rotate_mesh_to_q1(load_mesh(args.mesh))
+        results = arrays_to_results(data["phis"], data["R"], data["Z"])
+        results, _ = repair_slices(
+            mesh,
+            results,
+            fallback=args.fallback,
+            min_segment=args.min_segment,
+            closure_factor=args.closure_factor,
+            max_turn=args.max_turn,
+            strict=args.strict,
+        )
+        save_to_csv(smooth_toroidal_continuity(results), args.output or "repaired.csv")
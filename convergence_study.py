@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Resolution convergence study for the phi step and points per slice.
+
+Every candidate is sliced for real: the mesh is sectioned once per angle of
+the finest candidate step, every num_points resamples those sections, and a
+coarser step takes every k-th of the planes. These are the same slices
+get_rz_slice() gives a run at that step. The planes are smoothed as in the
+production pipeline. A reference slicing with more points is made only on a
+sample of angles per step: some of the candidate planes, and the midpoints
+between candidate planes, where the phi interpolation is worst. Each
+candidate is scored against it:
+
+    geometric error   max distance between the candidate surface and the
+                      reference contours: chord error of the sliced planes,
+                      plus the error of the cubic phi interpolation at the
+                      midpoints
+    point-0 jump      largest move of point 0 between neighbouring planes
+                      after smoothing (the continuity criterion)
+
+Distances to the closed polylines are exact point-to-segment distances,
+found per plane by VesselQuery.wall_distance() (vessel_query.py).
+
+The cheapest candidate meeting both tolerances is recommended, with the
+slicing time (measured while slicing the candidates) and output file sizes.
+
+Usage:
+    python3 convergence_study.py chamber_surface.stl --tolerance 0.5 --max-jump 2
+"""
+
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+
+from kisslinger_io import results_to_arrays
+from resample_kisslinger import resample_toroidal
+from slice_chamber_final import (
+    front_section,
+    slice_from_section,
+    smooth_toroidal_continuity,
+)
+from vessel_query import VesselQuery
+
+# Default candidate grid and tolerances (mm)
+CANDIDATE_STEPS = (0.1, 0.25, 0.5, 1.0, 2.0)
+CANDIDATE_POINTS = (100, 200, 300, 500, 800)
+GEOMETRIC_TOLERANCE = 0.5
+JUMP_TOLERANCE = 2.0
+
+# Reference angles sampled per candidate step (for each of the chord and the
+# interpolation check), and reference points relative to the largest candidate
+REFERENCE_PLANES = 45
+REFERENCE_POINTS_FACTOR = 2
+
+# Kisslinger export the file size estimate refers to (0..360 in 2° steps)
+KISSLINGER_PLANES = 181
+
+
+def polyline_distance(R, Z, line_R, line_Z):
+    """
+    Exact distance from (n_phi, m) points to the closed (n_phi, n) polyline of
+    the same plane.
+    """
+    lines = VesselQuery(np.arange(len(line_R)), line_R, line_Z)
+    return np.array([lines.wall_distance(i, R[i], Z[i]) for i in range(len(R))])
+
+
+def _csv_bytes_per_row(phis, R, Z, sample=2000, seed=0):
+    """Mean save_to_csv() row length, from a random sample of rows."""
+    rng = np.random.default_rng(seed)
+    k = rng.integers(0, R.shape[0], sample)
+    j = rng.integers(0, R.shape[1], sample)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [phi, i, f"{r:.4f}", f"{z:.4f}"]
+        for phi, i, r, z in zip(phis[k], j, R[k, j], Z[k, j])
+    )
+    return len(buffer.getvalue()) / sample
+
+
+def _kisslinger_bytes(R, Z, n_planes=KISSLINGER_PLANES):
+    """Approximate write_kisslinger() size for n_planes planes (R, Z in mm)."""
+    line = np.mean(
+        [
+            len(f"        {r / 10:.8f} {z / 10:.8f}\n")
+            for r, z in zip(R[0].tolist(), Z[0].tolist())
+        ]
+    )
+    return n_planes * (R.shape[1] * line + len("000.0000\n"))
+
+
+def _sample(count, limit):
+    """Up to limit evenly spread indices into range(count)."""
+    return np.unique(np.linspace(0, count - 1, min(count, limit)).round().astype(int))
+
+
+def convergence_study(
+    mesh,
+    steps=CANDIDATE_STEPS,
+    points=CANDIDATE_POINTS,
+    reference_points=None,
+    reference_planes=REFERENCE_PLANES,
+    start_angle=0,
+    end_angle=90,
+):
+    """
+    Scores every (step, points) candidate against a reference slicing.
+
+    Every candidate step must be a multiple of the finest one. The reference
+    points default to REFERENCE_POINTS_FACTOR times the largest candidate,
+    on up to reference_planes candidate and midpoint angles per step.
+    Returns a list of dicts, one per candidate, with error, jump, runtime and
+    size estimates.
+    """
+    steps = sorted(steps)
+    points = sorted(points)
+    reference_points = reference_points or REFERENCE_POINTS_FACTOR * points[-1]
+    ratios = np.asarray(steps) / steps[0]
+    if not np.allclose(ratios, np.round(ratios)):
+        raise ValueError(
+            f"Candidate steps must be multiples of the finest step {steps[0]}°."
+        )
+
+    # Sections are shared by every point count (and the reference)
+    sections = {}
+    section_time = 0.0
+
+    def section(phi):
+        nonlocal section_time
+        if phi not in sections:
+            t0 = time.perf_counter()
+            sections[phi] = front_section(mesh, phi)
+            section_time += time.perf_counter() - t0
+        return sections[phi]
+
+    # Candidates: every point count resamples the sections at the finest step
+    print(f"Slicing {start_angle}° to {end_angle}° at {steps[0]}°...")
+    grid = np.arange(start_angle, end_angle + steps[0] / 2, steps[0])
+    for phi in grid:
+        section(phi)
+    slicings = {}
+    for num_points in points:
+        t0 = time.perf_counter()
+        results = {}
+        for phi in grid:
+            r_vals, z_vals = slice_from_section(
+                mesh, phi, section(phi), num_points=num_points
+            )
+            if r_vals is not None:
+                results[phi] = (r_vals, z_vals)
+        phis, R, Z = results_to_arrays(results)
+        if len(phis) < 2 or not np.allclose(np.diff(phis), steps[0]):
+            raise ValueError("Some candidate angles produced no slice.")
+        plane_time = (section_time + time.perf_counter() - t0) / len(grid)
+        slicings[num_points] = (phis, R, Z, plane_time)
+
+    # Reference angles per step: sampled candidate planes and midpoints
+    phis = slicings[points[0]][0]
+    checks = {}
+    angles = []
+    for step in steps:
+        k = int(round(step / steps[0]))
+        c_phis = phis[::k]
+        sliced = _sample(len(c_phis), reference_planes)
+        middle = _sample(len(c_phis) - 1, reference_planes)
+        middle = (c_phis[middle] + c_phis[middle + 1]) / 2
+        checks[step] = (k, sliced, middle)
+        angles.extend([*c_phis[sliced], *middle])
+    angles = np.unique(angles)
+
+    t0 = time.perf_counter()
+    print(f"Reference slicing of {len(angles)} angles x {reference_points} points...")
+    reference = {}
+    for phi in angles:
+        r_vals, z_vals = slice_from_section(
+            mesh, phi, section(phi), num_points=reference_points
+        )
+        if r_vals is None:
+            raise ValueError(f"Reference angle {phi:.4f}° produced no slice.")
+        reference[phi] = (r_vals, z_vals)
+    print(f"Reference sliced in {time.perf_counter() - t0:.1f} s")
+
+    def reference_arrays(phi_values):
+        return (
+            np.array([reference[phi][0] for phi in phi_values]),
+            np.array([reference[phi][1] for phi in phi_values]),
+        )
+
+    rows = []
+    for num_points in points:
+        phis, all_R, all_Z, plane_time = slicings[num_points]
+        for step in steps:
+            k, sliced, middle = checks[step]
+            c_phis, R, Z = results_to_arrays(
+                smooth_toroidal_continuity(
+                    {phis[i]: (all_R[i], all_Z[i]) for i in range(0, len(phis), k)}
+                )
+            )
+
+            # Chord error on the sliced planes, interpolation error in between
+            ref_R, ref_Z = reference_arrays(c_phis[sliced])
+            chord = polyline_distance(ref_R, ref_Z, R[sliced], Z[sliced]).max()
+            interpolation = 0.0
+            if len(middle):
+                ref_R, ref_Z = reference_arrays(middle)
+                R_i, Z_i = resample_toroidal(c_phis, R, Z, middle)
+                interpolation = polyline_distance(R_i, Z_i, ref_R, ref_Z).max()
+
+            jump = np.hypot(np.diff(R[:, 0]), np.diff(Z[:, 0]))
+            rows.append(
+                {
+                    "step": step,
+                    "points": num_points,
+                    "planes": len(c_phis),
+                    "chord_error": chord,
+                    "interpolation_error": interpolation,
+                    "error": max(chord, interpolation),
+                    "max_jump": jump.max() if len(jump) else 0.0,
+                    "runtime": len(c_phis) * plane_time,
+                    "csv_bytes": R.size * _csv_bytes_per_row(c_phis, R, Z),
+                    "kisslinger_bytes": _kisslinger_bytes(R, Z),
+                }
+            )
+    return rows
+
+
+def recommend(rows, tolerance=GEOMETRIC_TOLERANCE, max_jump=JUMP_TOLERANCE):
+    """The cheapest candidate meeting both tolerances, or None."""
+    passing = [
+        row for row in rows if row["error"] <= tolerance and row["max_jump"] <= max_jump
+    ]
+    if not passing:
+        return None
+    return min(passing, key=lambda row: (row["runtime"], row["csv_bytes"]))
+
+
+def print_study(rows, best, tolerance, max_jump):
+    print(
+        f"\n{'Step':>6} {'Points':>6} {'Planes':>6} {'Chord':>8} {'Interp':>8} "
+        f"{'Jump':>8} {'Time (s)':>9} {'CSV (MB)':>9}"
+    )
+    for row in rows:
+        ok = row["error"] <= tolerance and row["max_jump"] <= max_jump
+        print(
+            f"{row['step']:>6g} {row['points']:>6} {row['planes']:>6} "
+            f"{row['chord_error']:>8.4f} {row['interpolation_error']:>8.4f} "
+            f"{row['max_jump']:>8.3f} {row['runtime']:>9.2f} "
+            f"{row['csv_bytes'] / 1e6:>9.2f}{'' if ok else '  x'}"
+        )
+
+    print(
+        f"\nTolerances: geometric error <= {tolerance} mm, point-0 jump <= {max_jump} mm"
+    )
+    if best is None:
+        print("No candidate meets both tolerances; refine the candidate grid.")
+        return
+    print(
+        f"Recommended: step {best['step']:g}°, {best['points']} points "
+        f"(error {best['error']:.4f} mm, max jump {best['max_jump']:.3f} mm)"
+    )
+    print(
+        f"  expected slicing time {best['runtime']:.1f} s, CSV "
+        f"{best['csv_bytes'] / 1e6:.2f} MB, Kisslinger "
+        f"{best['kisslinger_bytes'] / 1e6:.2f} MB"
+    )
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+
+    parser = argparse.ArgumentParser(description="Resolution convergence study")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--steps", type=float, nargs="+", default=list(CANDIDATE_STEPS))
+    parser.add_argument("--points", type=int, nargs="+", default=list(CANDIDATE_POINTS))
+    parser.add_argument("--reference-points", type=int, default=None)
+    parser.add_argument(
+        "--reference-planes",
+        type=int,
+        default=REFERENCE_PLANES,
+        help="Reference angles sampled per step and check",
+    )
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=GEOMETRIC_TOLERANCE,
+        help="Max geometric error in mm",
+    )
+    parser.add_argument(
+        "--max-jump",
+        type=float,
+        default=JUMP_TOLERANCE,
+        help="Max point-0 jump between planes in mm",
+    )
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+    t0 = time.perf_counter()
+    rows = convergence_study(
+        mesh,
+        args.steps,
+        args.points,
+        reference_points=args.reference_points,
+        reference_planes=args.reference_planes,
+        start_angle=args.start,
+        end_angle=args.end,
+    )
+    print(f"Study completed in {time.perf_counter() - t0:.1f} s")
+    best = recommend(rows, args.tolerance, args.max_jump)
+    print_study(rows, best, args.tolerance, args.max_jump)
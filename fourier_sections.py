@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compact Fourier-series representation of the cross-sections.
+
+Every slice is a closed contour sampled at num_points equally spaced arc-length
+positions, so it can be written as R(t) + iZ(t) = sum_k c_k exp(2*pi*i*k*t) with
+t = index / num_points in [0, 1). All slices are fitted at once with one FFT
+along the point axis and truncated to the smallest mode count |k| <= K that
+reproduces every slice within a tolerance.
+
+The coefficients can be evaluated at any point count (t = 0 stays point 0, so
+the toroidal correspondence is kept) and interpolated smoothly in phi.
+
+Usage:
+    python3 fourier_sections.py chamber_coordinates_fixed.csv --tol 0.01 -o chamber_fourier.npz
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results, read_dataset, results_to_arrays
+
+
+def _truncation_error(spectrum, contours, max_mode):
+    """Max pointwise error over all slices when keeping modes |k| <= max_mode."""
+    n_points = spectrum.shape[1]
+    modes = np.fft.fftfreq(n_points, 1.0 / n_points)
+    truncated = np.where(np.abs(modes) <= max_mode, spectrum, 0)
+    return np.abs(np.fft.ifft(truncated, axis=1) * n_points - contours).max()
+
+
+def fit_fourier(phis, R, Z, tol=0.01):
+    """
+    Fits all (n_phi, n_points) slices with a shared truncated Fourier series.
+    tol is the allowed max point deviation, in the units of R and Z.
+
+    Returns a dict with phis, modes (k = -K..K), coeffs (n_phi, 2K+1) complex,
+    n_points (the sampling it was fitted on) and max_error.
+    """
+    contours = np.asarray(R) + 1j * np.asarray(Z)
+    n_points = contours.shape[1]
+    spectrum = np.fft.fft(contours, axis=1) / n_points
+
+    # Smallest K meeting the tolerance (the error shrinks as K grows)
+    lo, hi = 0, n_points // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _truncation_error(spectrum, contours, mid) <= tol:
+            hi = mid
+        else:
+            lo = mid + 1
+    max_mode = lo
+
+    modes = np.arange(-max_mode, max_mode + 1)
+    coeffs = spectrum[:, modes % n_points]
+    if 2 * max_mode == n_points:
+        # The Nyquist coefficient appears at both k = -K and k = K; split it
+        coeffs[:, [0, -1]] *= 0.5
+
+    return {
+        "phis": np.asarray(phis, dtype=float),
+        "modes": modes,
+        "coeffs": coeffs,
+        "n_points": n_points,
+        "max_error": _truncation_error(spectrum, contours, max_mode),
+    }
+
+
+def evaluate_fourier(fourier, num_points, coeffs=None):
+    """
+    Evaluates the series at num_points equally spaced t values.
+    Returns (R, Z) arrays of shape (n_phi, num_points).
+    """
+    coeffs = fourier["coeffs"] if coeffs is None else coeffs
+    t = np.arange(num_points) / num_points
+    basis = np.exp(2j * np.pi * np.outer(fourier["modes"], t))
+    contours = coeffs @ basis
+    return contours.real, contours.imag
+
+
+def interpolate_fourier(fourier, target_phis, num_points):
+    """
+    Evaluates the cross-sections at arbitrary toroidal angles by cubic-spline
+    interpolation of the coefficients along phi.
+    Returns (R, Z) arrays of shape (len(target_phis), num_points).
+    """
+    from scipy.interpolate import CubicSpline
+
+    spline = CubicSpline(fourier["phis"], fourier["coeffs"], axis=0)
+    target_phis = np.clip(target_phis, fourier["phis"][0], fourier["phis"][-1])
+    return evaluate_fourier(fourier, num_points, coeffs=spline(target_phis))
+
+
+def results_to_fourier(results, tol=0.01):
+    """Fits a {phi: (R, Z)} results dict, see fit_fourier()."""
+    return fit_fourier(*results_to_arrays(results), tol=tol)
+
+
+def fourier_to_results(fourier, num_points):
+    """Evaluates a fit back into a {phi: (R, Z)} results dict."""
+    R, Z = evaluate_fourier(fourier, num_points)
+    return arrays_to_results(fourier["phis"], R, Z)
+
+
+def save_fourier(fourier, filename):
+    """Saves a fit to a compressed .npz file."""
+    np.savez_compressed(filename, **fourier)
+    print(
+        f"Saved {fourier['coeffs'].shape[1]} modes x {len(fourier['phis'])} slices to {filename}"
+    )
+
+
+def load_fourier(filename):
+    """Loads a fit written by save_fourier()."""
+    with np.load(filename) as data:
+        return {key: data[key] for key in data.files}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit cross-sections with Fourier series"
+    )
+    parser.add_argument("input", help="CSV export or Kisslinger file")
+    parser.add_argument(
+        "--tol", type=float, default=0.01, help="Max point deviation in file units"
+    )
+    parser.add_argument("-o", "--output", default="chamber_fourier.npz")
+    args = parser.parse_args()
+
+    data = read_dataset(args.input)
+    fourier = fit_fourier(data["phis"], data["R"], data["Z"], tol=args.tol)
+    save_fourier(fourier, args.output)
+
+    n_phi, n_points = data["R"].shape
+    print(
+        f"Kept |k| <= {fourier['modes'][-1]} ({len(fourier['modes'])} of {n_points} modes), "
+        f"max error {fourier['max_error']:.3g} {data['units']}"
+    )
+    print(
+        f"Size: {os.path.getsize(args.input)} bytes -> "
+        f"{os.path.getsize(args.output)} bytes"
+    )
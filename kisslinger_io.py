@@ -0,0 +1,547 @@
+"""
+Array-based readers for the exported slice data.
+
+Both readers return a dict with the planes stacked into (n_phi, n_points)
+arrays, so analysis tools can work in whole-array passes instead of grouping
+DataFrame rows per angle:
+
+    name      first line of a Kisslinger file ("" for CSV)
+    header    the numeric header fields after n_tor n_points nfp (Kisslinger)
+    nfp       number of field periods (1 for CSV)
+    phis      (n_phi,) toroidal angles in degrees
+    R, Z      (n_phi, n_points) coordinates
+    units     "cm" for Kisslinger files, "mm" for CSV exports
+    format    "kisslinger" or "csv"
+
+Files in the fixed-point layout the exporters write are parsed straight from
+the bytes, a few cache-sized chunks at a time; anything else falls back to
+np.fromstring. Only numpy is imported here so the readers stay fast to start.
+"""
+
+import numpy as np
+
+# Longest field the layout parsers read, and the most characters of a
+# fixed-point field (15 digits stay exact as a float)
+FIELD_WIDTH = 64
+FIELD_DIGITS = 15
+# Bytes the layout parsers handle at once; small blocks keep the temporaries
+# in cache, which is several times faster than whole-file array operations
+CHUNK_BYTES = 1 << 19
+
+# Bytewise constants for eight characters at a time in a uint64
+_ASCII_ZEROS = np.uint64(0x3030303030303030)
+_HIGH_NIBBLES = np.uint64(0xF0F0F0F0F0F0F0F0)
+_SIXES = np.uint64(0x0606060606060606)
+# _KEEP[c] clears the first (lowest) c bytes of a little-endian word
+_KEEP = np.array([(2**64 - 1) << (8 * c) & (2**64 - 1) for c in range(9)], np.uint64)
+
+
+def read_kisslinger(filename):
+    """Reads a Kisslinger file written by save_to_kisslinger()."""
+    with open(filename, "rb") as f:
+        return _parse_kisslinger(filename, f.read())
+
+
+def _kisslinger_header(data):
+    """(name, header fields, offset of the first plane) of Kisslinger file bytes."""
+    first = data.index(b"\n")
+    second = data.index(b"\n", first + 1)
+    return data[:first].decode().strip(), data[first + 1 : second].split(), second + 1
+
+
+def _parse_planes(filename, data, n_tor, n_points):
+    """
+    (phis, R, Z) of the bytes of n_tor plane blocks, from the fixed-point
+    layout when every coordinate has the same number of decimals, otherwise
+    with one np.fromstring.
+    """
+    planes = _parse_planes_layout(data, n_tor, n_points)
+    if planes is not None:
+        return planes
+    values = np.fromstring(str(data, "utf-8"), sep=" ")
+    block_size = 1 + 2 * n_points
+    if values.size != n_tor * block_size:
+        raise ValueError(
+            f"{filename}: expected {n_tor} planes of {n_points} points, "
+            f"found {values.size} values."
+        )
+    blocks = values.reshape(n_tor, block_size)
+    points = blocks[:, 1:].reshape(n_tor, n_points, 2)
+    return blocks[:, 0].copy(), points[:, :, 0].copy(), points[:, :, 1].copy()
+
+
+def _parse_planes_layout(data, n_tor, n_points):
+    """
+    (phis, R, Z) of Kisslinger plane blocks whose coordinates are all
+    [-]digits.digits with the same number of decimals, or None.
+    """
+    # Padding keeps the field windows inside the data and closes the last line
+    body = b" " * FIELD_WIDTH + data + b"\n"
+    chars = np.frombuffer(body, dtype=np.uint8)
+    words = np.ndarray((len(body) - 7,), dtype="<u8", buffer=body, strides=(1,))
+    block_size = 1 + 2 * n_points
+
+    decimals = None
+    phis, values = [], []
+    n_tokens = 0
+    lo = FIELD_WIDTH
+    while lo < len(body):
+        # Whole lines of about CHUNK_BYTES, so every pass stays in cache
+        hi = body.index(b"\n", min(lo + CHUNK_BYTES, len(body) - 1)) + 1
+        # Tokens start and end where whitespace (anything up to a space) does
+        edges = np.flatnonzero(np.diff(chars[lo:hi] > ord(" "), prepend=False)) + lo
+        starts, ends = edges[0::2], edges[1::2]
+        lo = hi
+
+        # The first token of every block is its angle
+        is_phi = np.arange(n_tokens, n_tokens + len(starts)) % block_size == 0
+        n_tokens += len(starts)
+        try:
+            phis.extend(float(body[a:b]) for a, b in zip(starts[is_phi], ends[is_phi]))
+        except ValueError:
+            return None
+        starts, ends = starts[~is_phi], ends[~is_phi]
+        if not len(starts):
+            continue
+        if decimals is None:
+            point = body.find(b".", starts[0], ends[0])
+            if point < 0:
+                return None
+            decimals = int(ends[0] - point - 1)
+        chunk = _fixed_point_field(chars, words, starts, ends, decimals)
+        if chunk is None:
+            return None
+        values.append(chunk)
+
+    if n_tokens != n_tor * block_size:
+        return None
+    points = np.concatenate(values).reshape(n_tor, n_points, 2)
+    return np.array(phis), points[:, :, 0].copy(), points[:, :, 1].copy()
+
+
+def _parse_kisslinger(filename, data):
+    """read_kisslinger() of the file contents."""
+    name, header, body = _kisslinger_header(data)
+    n_tor, n_points = int(header[0]), int(header[1])
+    phis, R, Z = _parse_planes(filename, memoryview(data)[body:], n_tor, n_points)
+    return {
+        "name": name,
+        "header": [float(v) for v in header[3:]],
+        "nfp": int(float(header[2])),
+        "phis": phis,
+        "R": R,
+        "Z": Z,
+        "units": "cm",
+        "format": "kisslinger",
+    }
+
+
+def block_offsets(data, header_lines, lines_per_block):
+    """
+    Byte offsets of the fixed-line-count plane blocks of a text file's bytes
+    (bytes, or a uint8 array such as a memmap). Returns (n_blocks + 1,)
+    offsets; block k spans offsets[k]:offsets[k + 1].
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    line_starts = np.concatenate([[0], np.flatnonzero(data == ord("\n")) + 1])
+    n_blocks = (len(line_starts) - 1 - header_lines) // lines_per_block
+    return line_starts[header_lines + lines_per_block * np.arange(n_blocks + 1)]
+
+
+def read_pair(reference, candidate):
+    """
+    read_dataset() of a reference and a candidate file.
+
+    For two files of the same format with the same number of planes and
+    points, the candidate planes whose text is byte-identical to the
+    reference plane are copied instead of parsed, so comparing mostly
+    unchanged files costs about one parse instead of two.
+    """
+    if _is_kisslinger(reference) != _is_kisslinger(candidate):
+        return read_dataset(reference), read_dataset(candidate)
+
+    with open(reference, "rb") as f:
+        ref_data = f.read()
+    with open(candidate, "rb") as f:
+        new_data = f.read()
+    if _is_kisslinger(reference):
+        return _kisslinger_pair(reference, candidate, ref_data, new_data)
+    return _csv_pair(reference, candidate, ref_data, new_data)
+
+
+def _changed_blocks(ref_data, new_data, header_lines, lines_per_block, n_tor):
+    """
+    ({index: text} of the candidate plane blocks that differ from the
+    reference, or None unless the candidate is exactly n_tor blocks after the
+    same number of header lines.
+
+    Each candidate block is first compared with the reference block at the
+    same position, so only the lines of changed blocks are searched.
+    """
+    ref_offsets = block_offsets(ref_data, header_lines, lines_per_block)
+    if len(ref_offsets) != n_tor + 1:
+        return None
+    offset = 0
+    for _ in range(header_lines):
+        offset = new_data.find(b"\n", offset) + 1
+        if offset == 0:
+            return None
+    changed = {}
+    for k in range(n_tor):
+        block = ref_data[ref_offsets[k] : ref_offsets[k + 1]]
+        if new_data.startswith(block, offset):
+            offset += len(block)
+            continue
+        end = offset
+        for _ in range(lines_per_block):
+            end = new_data.find(b"\n", end) + 1
+            if end == 0:
+                return None
+        changed[k] = new_data[offset:end]
+        offset = end
+    if offset != len(new_data):
+        return None
+    return changed
+
+
+def _kisslinger_pair(reference, candidate, ref_data, new_data):
+    """read_pair() of two Kisslinger files' contents."""
+    ref = _parse_kisslinger(reference, ref_data)
+    name, header, _ = _kisslinger_header(new_data)
+    n_tor, n_points = ref["R"].shape
+    blocks = None
+    if header[:2] == [b"%d" % n_tor, b"%d" % n_points]:
+        blocks = _changed_blocks(ref_data, new_data, 2, 1 + n_points, n_tor)
+    if blocks is None:
+        return ref, _parse_kisslinger(candidate, new_data)
+
+    changed = list(blocks)
+    phis, R, Z = ref["phis"].copy(), ref["R"].copy(), ref["Z"].copy()
+    if changed:
+        phis[changed], R[changed], Z[changed] = _parse_planes(
+            candidate, b"".join(blocks.values()), len(changed), n_points
+        )
+    return ref, {
+        "name": name,
+        "header": [float(v) for v in header[3:]],
+        "nfp": int(float(header[2])),
+        "phis": phis,
+        "R": R,
+        "Z": Z,
+        "units": "cm",
+        "format": "kisslinger",
+    }
+
+
+def _csv_pair(reference, candidate, ref_data, new_data):
+    """
+    read_pair() of two CSV exports' contents. Planes are only reused when the
+    reference is in the save_to_csv() layout, where every block of n_points
+    rows is one plane.
+    """
+    columns, body = _csv_header(ref_data)
+    planes = _parse_csv_layout(body, columns)
+    if planes is None:
+        return _parse_csv(reference, ref_data), _parse_csv(candidate, new_data)
+    ref = _csv_dataset(*planes)
+    n_tor, n_points = ref["R"].shape
+    blocks = None
+    if _csv_header(new_data)[0] == columns:
+        blocks = _changed_blocks(ref_data, new_data, 1, n_points, n_tor)
+    if blocks is None:
+        return ref, _parse_csv(candidate, new_data)
+
+    changed = list(blocks)
+    phis, R, Z = ref["phis"].copy(), ref["R"].copy(), ref["Z"].copy()
+    if changed:
+        planes = _parse_csv_layout(b"".join(blocks.values()), columns)
+        if planes is None or planes[1].shape != (len(changed), n_points):
+            return ref, _parse_csv(candidate, new_data)
+        phis[changed], R[changed], Z[changed] = planes
+        if np.any(np.diff(phis) <= 0):
+            return ref, _parse_csv(candidate, new_data)
+    return ref, _csv_dataset(phis, R, Z)
+
+
+def read_coordinates_csv(filename):
+    """Reads a Phi_Deg, Point_Index, R_mm, Z_mm CSV written by save_to_csv()."""
+    with open(filename, "rb") as f:
+        return _parse_csv(filename, f.read())
+
+
+def _csv_header(data):
+    """(column names, memoryview of the body) of CSV file bytes."""
+    first = data.find(b"\n") + 1 or len(data)
+    return data[:first].decode().strip().split(","), memoryview(data)[first:]
+
+
+def _parse_csv(filename, data):
+    """read_coordinates_csv() of the file contents."""
+    columns, body = _csv_header(data)
+    planes = _parse_csv_layout(body, columns)
+    if planes is None:
+        planes = _parse_csv_rows(filename, str(body, "utf-8"), columns)
+    return _csv_dataset(*planes)
+
+
+def _csv_dataset(phis, R, Z):
+    return {
+        "name": "",
+        "header": [],
+        "nfp": 1,
+        "phis": phis,
+        "R": R,
+        "Z": Z,
+        "units": "mm",
+        "format": "csv",
+    }
+
+
+def _parse_csv_rows(filename, body, columns):
+    """(phis, R, Z) of a CSV body with rows in any order."""
+    rows = np.fromstring(body.replace(",", " "), sep=" ").reshape(-1, len(columns))
+    phi_col = rows[:, columns.index("Phi_Deg")]
+    idx_col = rows[:, columns.index("Point_Index")]
+
+    # Rows are written in (phi, index) order; only sort if someone reordered them
+    if np.any(np.diff(phi_col) < 0) or np.any(
+        (np.diff(phi_col) == 0) & (np.diff(idx_col) < 0)
+    ):
+        order = np.lexsort((idx_col, phi_col))
+        rows, phi_col = rows[order], phi_col[order]
+
+    phis, counts = np.unique(phi_col, return_counts=True)
+    if np.any(counts != counts[0]):
+        raise ValueError(f"{filename}: planes have different numbers of points.")
+    n_points = int(counts[0])
+    return (
+        phis,
+        rows[:, columns.index("R_mm")].reshape(len(phis), n_points),
+        rows[:, columns.index("Z_mm")].reshape(len(phis), n_points),
+    )
+
+
+def _parse_csv_layout(body, columns):
+    """
+    (phis, R, Z) of a CSV body in the exact save_to_csv() layout, parsed from
+    the bytes without converting every field: planes in increasing phi with
+    point indices 0..n-1, the angle text repeated on every row of a plane,
+    and R, Z with a fixed number of decimals. Returns None for anything else.
+    """
+    if sorted(columns) != sorted(("Phi_Deg", "Point_Index", "R_mm", "Z_mm")):
+        return None
+    if not body:
+        return None
+    # Leading padding keeps every right-aligned field window inside the data
+    body = b" " * FIELD_WIDTH + body
+    if not body.endswith(b"\n"):
+        body += b"\n"
+    data = np.frombuffer(body, dtype=np.uint8)
+    # Unaligned little-endian uint64 starting at every byte
+    words = np.ndarray((len(body) - 7,), dtype="<u8", buffer=body, strides=(1,))
+
+    decimals = None
+    values = {"Point_Index": [], "R_mm": [], "Z_mm": []}
+    # Whether the angle text of a row repeats the row before it, and the
+    # angles of the rows where it changes
+    same_phi, plane_phis = [], []
+    lo = FIELD_WIDTH
+    while lo < len(body):
+        # Whole lines of about CHUNK_BYTES, so every pass stays in cache
+        hi = body.index(b"\n", min(lo + CHUNK_BYTES, len(body) - 1)) + 1
+        field = _csv_fields(data, lo, hi, columns)
+        if field is None:
+            return None
+        lo = hi
+
+        if decimals is None:
+            # Decimals of R and Z from the first row
+            decimals = {"Point_Index": 0}
+            for name in ("R_mm", "Z_mm"):
+                start, end = field[name]
+                point = body.find(b".", start[0], end[0])
+                if point < 0:
+                    return None
+                decimals[name] = int(end[0] - point - 1)
+        for name, column in values.items():
+            chunk = _fixed_point_field(data, words, *field[name], decimals[name])
+            if chunk is None:
+                return None
+            column.append(chunk)
+
+        # The angle text of every row against the row before it, which for
+        # the first row of a chunk is the last row of the chunk before
+        phi_start, phi_end = field["Phi_Deg"]
+        if not same_phi:
+            previous = phi_start[0], phi_end[0]
+        width = max(int((phi_end - phi_start).max()), previous[1] - previous[0])
+        n_words = -(-width // 8)
+        if 8 * n_words > FIELD_WIDTH:
+            return None
+        text = _field_words(
+            words,
+            np.append(previous[0], phi_start),
+            np.append(previous[1], phi_end),
+            n_words,
+            0,
+        )
+        same = np.all(text[1:] == text[:-1], axis=1)
+        if not same_phi:
+            same[0] = False
+        same_phi.append(same)
+        try:
+            plane_phis.extend(
+                float(body[a:b]) for a, b in zip(phi_start[~same], phi_end[~same])
+            )
+        except ValueError:
+            return None
+        previous = phi_start[-1], phi_end[-1]
+
+    index = np.concatenate(values["Point_Index"])
+    same_phi = np.concatenate(same_phi)
+    n_rows, n_phi = len(index), len(plane_phis)
+    n_points = n_rows // n_phi
+    if n_phi * n_points != n_rows or np.any(
+        index.reshape(n_phi, n_points) != np.arange(n_points)
+    ):
+        return None
+    if not np.array_equal(np.flatnonzero(~same_phi), np.arange(0, n_rows, n_points)):
+        return None
+    phis = np.array(plane_phis)
+    if np.any(np.diff(phis) <= 0):
+        return None
+    return (
+        phis,
+        np.concatenate(values["R_mm"]).reshape(n_phi, n_points),
+        np.concatenate(values["Z_mm"]).reshape(n_phi, n_points),
+    )
+
+
+def _csv_fields(data, lo, hi, columns):
+    """
+    {column: (starts, ends)} of the fields on the lines of data[lo:hi], which
+    ends with a newline, or None unless every line has exactly three commas.
+    """
+    chunk = data[lo:hi]
+    line_ends = np.flatnonzero(chunk == ord("\n")) + lo
+    line_starts = np.concatenate([[lo], line_ends[:-1] + 1])
+    line_ends = line_ends - (data[line_ends - 1] == ord("\r"))
+    commas = np.flatnonzero(chunk == ord(",")) + lo
+    if len(commas) != 3 * len(line_starts):
+        return None
+    commas = commas.reshape(-1, 3)
+    if np.any(commas[:, 0] <= line_starts) or np.any(commas[:, 2] >= line_ends):
+        return None
+    bounds = [line_starts, *(commas.T + 1)], [*commas.T, line_ends]
+    return {name: (bounds[0][i], bounds[1][i]) for i, name in enumerate(columns)}
+
+
+def _field_words(words, starts, ends, n_words, fill):
+    """
+    (n, n_words) uint64 words holding the fields starts:ends right aligned,
+    with the bytes before each start replaced by the fill byte. words is the
+    unaligned uint64 view of the data; every field end needs 8 * n_words
+    bytes before it.
+    """
+    blank = 8 * n_words - (ends - starts)
+    filler = np.uint64(int.from_bytes(bytes([fill]) * 8, "little"))
+    out = np.empty((len(ends), n_words), dtype=np.uint64)
+    for k in range(n_words):
+        # Little endian: the first bytes of a word are its low bytes
+        keep = _KEEP[np.clip(blank - 8 * k, 0, 8)]
+        out[:, k] = (words[ends - 8 * (n_words - k)] & keep) | (filler & ~keep)
+    return out
+
+
+def _fixed_point_field(data, words, starts, ends, decimals):
+    """
+    Values of the decimal fields data[starts:ends], all written as
+    [-]digits.digits with the given number of decimals (no point for 0), or
+    None if any field isn't. The integer and the decimal digits are each
+    combined into an exact integer inside a uint64, then divided once, which
+    rounds exactly like parsing the text.
+    """
+    lengths = ends - starts
+    if decimals > 8 or lengths.max() > FIELD_DIGITS:
+        return None
+    negative = data[starts] == ord("-")
+    digits_end = ends
+    if decimals:
+        digits_end = ends - decimals - 1
+        if np.any(data[digits_end] != ord(".")):
+            return None
+    # At most eight integer digits, so they fit one word
+    blank = 8 - (digits_end - starts - negative)
+    if blank.min() < 0 or blank.max() > 7:
+        return None
+
+    value = _digit_word(words[digits_end - 8] ^ _ASCII_ZEROS, blank)
+    if value is None:
+        return None
+    if decimals:
+        fraction = _digit_word(words[ends - 8] ^ _ASCII_ZEROS, 8 - decimals)
+        if fraction is None:
+            return None
+        value = value * np.uint64(10**decimals) + fraction
+    value = value / 10.0**decimals
+    return np.negative(value, out=value, where=negative)
+
+
+def _digit_word(digits, blank):
+    """
+    Integer values of uint64 words of eight digits (ASCII xor "0"), the first
+    in the lowest byte, ignoring the first blank bytes of each; None if any
+    other byte isn't a digit.
+    """
+    v = digits & _KEEP[blank]
+    if np.any((v | (v + _SIXES)) & _HIGH_NIBBLES):
+        return None
+    # Pairs, then groups of four, then all eight digits
+    v = (v * np.uint64(10) + (v >> np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v * np.uint64(100) + (v >> np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    return (v * np.uint64(10000) + (v >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+
+def read_dataset(filename):
+    """Reads a CSV export or a Kisslinger file, chosen by extension."""
+    if not _is_kisslinger(filename):
+        return read_coordinates_csv(filename)
+    return read_kisslinger(filename)
+
+
+def _is_kisslinger(filename):
+    return not filename.lower().endswith(".csv")
+
+
+def write_kisslinger(filename, phis, R, Z, nfp=1, name="transformed_vessel_fixed"):
+    """
+    Writes (n_phi, n_points) R, Z arrays (already in cm) as a Kisslinger file.
+    """
+    R = np.asarray(R)
+    Z = np.asarray(Z)
+    with open(filename, "w") as f:
+        f.write(f"{name}\n")
+        f.write(f"{len(phis)} {R.shape[1]} {nfp} 0.0 0.0\n")
+
+        for k, phi in enumerate(phis):
+            f.write(format_kisslinger_block(phi, R[k], Z[k]))
+
+
+def format_kisslinger_block(phi, R, Z):
+    """The text of one plane (angle line plus points) in a Kisslinger file."""
+    return f"{phi:.4f}\n" + "".join(
+        f"        {r:.8f} {z:.8f}\n" for r, z in zip(R.tolist(), Z.tolist())
+    )
+
+
+def results_to_arrays(results):
+    """Converts a {phi: (R, Z)} results dict to (phis, R, Z) arrays."""
+    sorted_angles = sorted(results.keys())
+    R = np.array([results[phi][0] for phi in sorted_angles])
+    Z = np.array([results[phi][1] for phi in sorted_angles])
+    return np.array(sorted_angles, dtype=float), R, Z
+
+
+def arrays_to_results(phis, R, Z):
+    """Converts (phis, R, Z) arrays back to a {phi: (R, Z)} results dict."""
+    return {float(phi): (R[k], Z[k]) for k, phi in enumerate(phis)}
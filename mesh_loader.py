@@ -0,0 +1,366 @@
+"""
+Loading and clean-up of STL/STEP geometry before slicing.
+
+Meshes are loaded with process=False, so STL triangle soups arrive with every
+vertex repeated once per adjacent face. weld_vertices() merges vertices that
+fall in the same quantized cell and drops the faces that collapse, once at load
+time, so slicing works on a compact mesh and produces fewer near-duplicate
+section points.
+
+STEP files are tessellated with an explicit chord tolerance (tol_linear, in
+model units) and angular deflection (tol_angular, radians). When gmsh (built
+with OpenCASCADE) loads, each solid of an assembly is tessellated in its own
+worker process and the pieces are merged; otherwise trimesh/cascadio is used
+with the same tolerances.
+
+trimesh (and through it the STEP backends) is imported on first use so that
+importing this module stays cheap.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Default welding tolerance in model units (mm)
+WELD_TOLERANCE = 1e-4
+
+# Default STEP tessellation tolerances (same as cascadio's defaults)
+STEP_TOL_LINEAR = 0.01
+STEP_TOL_ANGULAR = 0.5
+STEP_EXTENSIONS = (".step", ".stp")
+
+
+def weld_vertices(vertices, faces, tolerance=WELD_TOLERANCE):
+    """
+    Merges vertices closer than ~tolerance and removes degenerate faces.
+
+    Returns (vertices, faces, face_mask) where face_mask marks the input faces
+    that were kept, so per-face attributes can be filtered to match.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+
+    # Quantize to integer cells and hash each cell to a single int64 key
+    cells = np.round(vertices / tolerance).astype(np.int64)
+    cells -= cells.min(axis=0)
+    extent = cells.max(axis=0) + 1
+    if np.prod(extent.astype(float)) < 2**62:
+        keys = (cells[:, 0] * extent[1] + cells[:, 1]) * extent[2] + cells[:, 2]
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(
+            cells, axis=0, return_index=True, return_inverse=True
+        )
+    inverse = inverse.reshape(-1)
+
+    welded = vertices[first]
+    faces = inverse[faces]
+
+    # Drop faces that lost a vertex to welding or have (near) zero area
+    face_mask = (
+        (faces[:, 0] != faces[:, 1])
+        & (faces[:, 1] != faces[:, 2])
+        & (faces[:, 2] != faces[:, 0])
+    )
+    tri = welded[faces[face_mask]]
+    double_area = np.linalg.norm(
+        np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1
+    )
+    face_mask[np.flatnonzero(face_mask)[double_area <= tolerance**2]] = False
+    faces = faces[face_mask]
+
+    # Compact: drop vertices no longer referenced by any face
+    used, faces = np.unique(faces, return_inverse=True)
+    return welded[used], faces.reshape(-1, 3), face_mask
+
+
+def weld_mesh(mesh, tolerance=WELD_TOLERANCE):
+    """
+    Returns a welded copy of a trimesh.Trimesh and records the statistics in
+    mesh.metadata["weld"].
+    """
+    import trimesh
+
+    vertices, faces, face_mask = weld_vertices(mesh.vertices, mesh.faces, tolerance)
+    welded = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    welded.metadata.update(mesh.metadata)
+    for key, value in mesh.face_attributes.items():
+        welded.face_attributes[key] = np.asarray(value)[face_mask]
+
+    welded.metadata["weld"] = {
+        "tolerance": tolerance,
+        "vertices_before": len(mesh.vertices),
+        "vertices_after": len(vertices),
+        "faces_removed": int(len(face_mask) - face_mask.sum()),
+    }
+    print(
+        f"Welded vertices: {len(mesh.vertices)} -> {len(vertices)}, "
+        f"removed {welded.metadata['weld']['faces_removed']} degenerate faces."
+    )
+    return welded
+
+
+def _merge_parts(parts, names=None):
+    """
+    Merges a list of (vertices, faces) pairs into one mesh, filling
+    preallocated arrays instead of concatenating copies.
+
+    Every part becomes one body: face_attributes["body_id"] holds the part
+    index of each face and metadata["body_names"] the part names.
+    """
+    import trimesh
+
+    n_vertices = sum(len(v) for v, _ in parts)
+    n_faces = sum(len(f) for _, f in parts)
+    vertices = np.empty((n_vertices, 3), dtype=np.float64)
+    faces = np.empty((n_faces, 3), dtype=np.int64)
+    body_id = np.repeat(
+        np.arange(len(parts), dtype=np.int32), [len(f) for _, f in parts]
+    )
+
+    v_offset = f_offset = 0
+    for part_vertices, part_faces in parts:
+        vertices[v_offset : v_offset + len(part_vertices)] = part_vertices
+        np.add(part_faces, v_offset, out=faces[f_offset : f_offset + len(part_faces)])
+        v_offset += len(part_vertices)
+        f_offset += len(part_faces)
+
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    mesh.face_attributes["body_id"] = body_id
+    mesh.metadata["body_names"] = (
+        list(names) if names is not None else [f"body_{i}" for i in range(len(parts))]
+    )
+    return mesh
+
+
+def flatten_scene(scene):
+    """
+    Flattens a trimesh.Scene into one mesh, honouring the scene graph.
+
+    Every geometry is placed once per instance node with that node's world
+    transform. Instances of the same geometry are transformed in one batched
+    einsum, written straight into vertex and face arrays that are allocated
+    once for the whole assembly.
+
+    Every instance is one body: face_attributes["body_id"] holds its index
+    and metadata["body_names"] its node name.
+    """
+    import trimesh
+
+    instances = {}
+    for node in scene.graph.nodes_geometry:
+        transform, geometry_name = scene.graph[node]
+        geometry = scene.geometry.get(geometry_name)
+        # Skip paths, point clouds and empty meshes
+        if not isinstance(geometry, trimesh.Trimesh) or len(geometry.faces) == 0:
+            continue
+        instances.setdefault(geometry_name, []).append((node, transform))
+
+    if not instances:
+        raise ValueError("The loaded file contains no geometry.")
+
+    n_vertices = sum(
+        len(scene.geometry[name].vertices) * len(t) for name, t in instances.items()
+    )
+    n_faces = sum(
+        len(scene.geometry[name].faces) * len(t) for name, t in instances.items()
+    )
+    vertices = np.empty((n_vertices, 3), dtype=np.float64)
+    faces = np.empty((n_faces, 3), dtype=np.int64)
+    body_id = np.empty(n_faces, dtype=np.int32)
+    body_names = []
+
+    v_offset = f_offset = 0
+    for name, nodes in instances.items():
+        geometry = scene.geometry[name]
+        transforms = np.asarray([t for _, t in nodes], dtype=np.float64)
+        k, nv, nf = len(transforms), len(geometry.vertices), len(geometry.faces)
+
+        v_out = vertices[v_offset : v_offset + k * nv].reshape(k, nv, 3)
+        np.einsum("kij,nj->kni", transforms[:, :3, :3], geometry.vertices, out=v_out)
+        v_out += transforms[:, None, :3, 3]
+
+        f_out = faces[f_offset : f_offset + k * nf].reshape(k, nf, 3)
+        base = v_offset + nv * np.arange(k)
+        np.add(geometry.faces[None], base[:, None, None], out=f_out)
+
+        # Mirroring instances flip the triangle winding; restore it
+        mirrored = np.linalg.det(transforms[:, :3, :3]) < 0
+        if mirrored.any():
+            f_out[mirrored] = f_out[mirrored][:, :, ::-1]
+
+        body_id[f_offset : f_offset + k * nf] = np.repeat(
+            len(body_names) + np.arange(k), nf
+        )
+        body_names.extend(node for node, _ in nodes)
+        v_offset += k * nv
+        f_offset += k * nf
+
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    mesh.face_attributes["body_id"] = body_id
+    mesh.metadata["body_names"] = body_names
+    return mesh
+
+
+def _tessellate_step_bodies(file_path, volume_tags, tol_linear, tol_angular):
+    """
+    Worker: tessellates the given STEP volumes with OpenCASCADE (through gmsh)
+    and returns one (vertices, faces) pair per volume.
+    An empty volume_tags list tessellates every surface as a single body.
+    """
+    import gmsh
+
+    gmsh.initialize(readConfigFiles=False)
+    try:
+        gmsh.option.setNumber("General.Terminal", 0)
+        gmsh.option.setNumber("Mesh.StlLinearDeflection", tol_linear)
+        gmsh.option.setNumber("Mesh.StlLinearDeflectionRelative", 0)
+        gmsh.option.setNumber("Mesh.StlAngularDeflection", tol_angular)
+        gmsh.model.occ.importShapes(file_path)
+
+        # Drop the solids handled by other workers before triangulating
+        if volume_tags:
+            others = [
+                entity
+                for entity in gmsh.model.occ.getEntities(3)
+                if entity[1] not in volume_tags
+            ]
+            if others:
+                gmsh.model.occ.remove(others, recursive=True)
+        gmsh.model.occ.synchronize()
+        gmsh.model.mesh.importStl()
+
+        node_tags, coords, _ = gmsh.model.mesh.getNodes()
+        lookup = np.zeros(int(node_tags.max()) + 1, dtype=np.int64)
+        lookup[node_tags.astype(np.int64)] = np.arange(len(node_tags))
+        coords = coords.reshape(-1, 3)
+
+        if volume_tags:
+            bodies = [
+                [
+                    tag
+                    for dim, tag in gmsh.model.getBoundary(
+                        [(3, volume)], combined=False, oriented=False
+                    )
+                ]
+                for volume in volume_tags
+            ]
+        else:
+            bodies = [[tag for _, tag in gmsh.model.getEntities(2)]]
+
+        parts = []
+        for surfaces in bodies:
+            triangles = [
+                gmsh.model.mesh.getElementsByType(2, surface)[1] for surface in surfaces
+            ]
+            # A body without triangles gives an empty part
+            tri_nodes = lookup[
+                np.concatenate([np.empty(0, np.uint64), *triangles]).astype(np.int64)
+            ]
+            used, faces = np.unique(tri_nodes, return_inverse=True)
+            parts.append((coords[used], faces.reshape(-1, 3)))
+        return parts
+    finally:
+        gmsh.finalize()
+
+
+def _gmsh_with_occ():
+    """
+    The gmsh module if it loads and was built with OpenCASCADE (needed to
+    import STEP), otherwise None.
+    """
+    try:
+        import gmsh
+    except (ImportError, OSError):
+        return None
+    try:
+        gmsh.initialize(readConfigFiles=False)
+        try:
+            build_options = gmsh.option.getString("General.BuildOptions")
+        finally:
+            gmsh.finalize()
+    except Exception:
+        return None
+    return gmsh if "OpenCASCADE" in build_options else None
+
+
+def load_step(
+    file_path, tol_linear=STEP_TOL_LINEAR, tol_angular=STEP_TOL_ANGULAR, workers=None
+):
+    """
+    Tessellates a STEP file with the given chord tolerance and angular
+    deflection. Multi-body assemblies are split across worker processes,
+    one group of solids per worker, and merged into a single mesh.
+    """
+    import trimesh
+
+    gmsh = _gmsh_with_occ()
+    if gmsh is None:
+        # cascadio runs OpenCASCADE's own parallel mesher over the whole file
+        print("gmsh not available, tessellating STEP through trimesh/cascadio...")
+        return trimesh.load(
+            file_path, process=False, tol_linear=tol_linear, tol_angular=tol_angular
+        )
+
+    gmsh.initialize(readConfigFiles=False)
+    try:
+        gmsh.option.setNumber("General.Terminal", 0)
+        gmsh.model.occ.importShapes(file_path)
+        volumes = [tag for _, tag in gmsh.model.occ.getEntities(3)]
+    finally:
+        gmsh.finalize()
+
+    workers = min(workers or os.cpu_count() or 1, max(len(volumes), 1))
+    print(f"Tessellating {len(volumes)} solids on {workers} worker(s)...")
+
+    if workers <= 1:
+        parts = _tessellate_step_bodies(file_path, volumes, tol_linear, tol_angular)
+        tags = volumes
+    else:
+        groups = [volumes[i::workers] for i in range(workers)]
+        tags = [tag for group in groups for tag in group]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _tessellate_step_bodies, file_path, group, tol_linear, tol_angular
+                )
+                for group in groups
+            ]
+            parts = [part for future in futures for part in future.result()]
+
+    if not parts or all(len(f) == 0 for _, f in parts):
+        raise ValueError(f"STEP file produced no faces: {file_path}")
+    names = [f"volume_{tag}" for tag in tags] if tags else ["all"]
+    return _merge_parts(parts, names)
+
+
+def load_mesh(
+    file_path,
+    weld_tolerance=WELD_TOLERANCE,
+    tol_linear=STEP_TOL_LINEAR,
+    tol_angular=STEP_TOL_ANGULAR,
+    workers=None,
+):
+    """
+    Loads an STL or STEP file as a single welded trimesh.Trimesh.
+    tol_linear / tol_angular / workers only apply to STEP files.
+    Pass weld_tolerance=None to keep the raw triangle soup.
+    """
+    import trimesh
+
+    if file_path.lower().endswith(STEP_EXTENSIONS):
+        loaded = load_step(file_path, tol_linear, tol_angular, workers)
+    else:
+        loaded = trimesh.load(file_path, process=False)
+
+    # Handle Scene objects (common with STEP files)
+    if isinstance(loaded, trimesh.Scene):
+        mesh = flatten_scene(loaded)
+    else:
+        mesh = loaded
+
+    if weld_tolerance is not None:
+        mesh = weld_mesh(mesh, weld_tolerance)
+
+    return mesh
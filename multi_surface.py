@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Multi-surface slicing: one Kisslinger file per body of an assembly.
+
+Models with the vacuum vessel, first wall, divertor targets and baffles as
+separate bodies can't go through get_rz_slice() as one mesh, because the
+angular sort would interleave their contours. Here every triangle keeps a
+body ID (face_attributes["body_id"], set by mesh_loader for STEP solids and
+scene instances, or the connected shells of a plain STL). Each plane is
+intersected with the whole mesh once, and the section segments are split by
+the body of the face they come from. Every body's points then go through the
+usual ordering and resampling, and each body is written to its own Kisslinger
+file on the same target phi planes.
+
+Each body should cut every plane in a single closed contour, as required by
+get_rz_slice().
+
+Usage:
+    python3 multi_surface.py assembly.step --step 0.5 --points 500 --prefix vessel
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+
+from slice_chamber_final import (
+    _contour_from_points,
+    save_to_kisslinger,
+    smooth_toroidal_continuity,
+)
+
+
+def body_labels(mesh):
+    """
+    Returns (body_id, names): the body index of every face and one name per
+    body. Meshes without body IDs are split into connected shells.
+    """
+    if "body_id" in mesh.face_attributes:
+        body_id = np.asarray(mesh.face_attributes["body_id"], dtype=np.int64)
+        names = list(mesh.metadata.get("body_names", []))
+    else:
+        import trimesh
+
+        body_id = trimesh.graph.connected_component_labels(
+            mesh.face_adjacency, node_count=len(mesh.faces)
+        ).astype(np.int64)
+        names = []
+
+    n_bodies = int(body_id.max()) + 1 if len(body_id) else 0
+    names += [f"body_{i}" for i in range(len(names), n_bodies)]
+    return body_id, names
+
+
+def section_bodies(mesh, phi_degrees, body_id):
+    """
+    Intersects the phi plane with the whole mesh once and returns
+    {body: (N, 3) section points} for the half-plane get_rz_slice() keeps.
+    """
+    from trimesh.intersections import mesh_plane
+
+    phi_rad = np.radians(phi_degrees)
+    origin = np.zeros(3)
+    for attempt in range(2):
+        normal = np.array([np.sin(phi_rad), -np.cos(phi_rad), 0])
+        segments, faces = mesh_plane(mesh, normal, origin, return_faces=True)
+        if len(segments):
+            break
+        # Retry with small epsilon if exact slice fails (common at 0 degrees)
+        phi_rad += 1e-5
+    else:
+        return {}
+
+    # Both ends of every segment, tagged with the body of its face
+    points = segments.reshape(-1, 3)
+    owner = np.repeat(body_id[faces], 2)
+
+    direction = np.array([np.cos(phi_rad), np.sin(phi_rad), 0])
+    front = points @ direction > 0
+    points, owner = points[front], owner[front]
+
+    # Shared edges produce every point twice; drop the copies per body
+    tagged = np.unique(np.column_stack([owner, np.round(points, 6)]), axis=0)
+    owner = tagged[:, 0].astype(np.int64)
+    bounds = np.flatnonzero(np.diff(owner)) + 1
+    return {
+        int(group[0, 0]): group[:, 1:]
+        for group in np.split(tagged, bounds)
+        if len(group) >= 2
+    }
+
+
+def get_body_slices(mesh, phi_degrees, body_id, num_points=500):
+    """Returns {body: (R, Z)} for every body cut by the phi plane."""
+    slices = {}
+    for body, points in section_bodies(mesh, phi_degrees, body_id).items():
+        r_vals, z_vals = _contour_from_points(points, num_points)
+        if r_vals is not None:
+            slices[body] = (r_vals, z_vals)
+    return slices
+
+
+def generate_body_slices(
+    mesh, start_angle=0, end_angle=90, step=0.5, num_points=500, body_id=None
+):
+    """
+    generate_slices() for every body at once.
+    Returns {body: {phi: (R, Z)}}.
+    """
+    if body_id is None:
+        body_id, _ = body_labels(mesh)
+
+    print(f"Scanning {start_angle}° to {end_angle}° for all bodies...")
+    body_results = {}
+    for phi in np.arange(start_angle, end_angle + step / 2, step):
+        for body, slice_rz in get_body_slices(mesh, phi, body_id, num_points).items():
+            body_results.setdefault(body, {})[phi] = slice_rz
+
+    print(
+        f"Generated slices for {len(body_results)} bodies "
+        f"({sum(len(r) for r in body_results.values())} contours)."
+    )
+    return body_results
+
+
+def save_bodies_to_kisslinger(body_results, names, prefix, target_phis, nfp=1):
+    """
+    Smooths every body and writes it to <prefix>_<name>.kisslinger, all on
+    the same target phi planes. Returns {body: filename}.
+    """
+    all_phis = sorted({phi for results in body_results.values() for phi in results})
+    filenames = {}
+    for body, results in sorted(body_results.items()):
+        if len(results) < len(all_phis):
+            print(
+                f"Warning: {names[body]} is only cut by {len(results)} of "
+                f"{len(all_phis)} planes; its end slices are held outside "
+                f"{min(results)}°-{max(results)}°."
+            )
+        safe_name = re.sub(r"[^\w.-]+", "_", names[body])
+        filename = f"{prefix}_{safe_name}.kisslinger"
+        save_to_kisslinger(
+            smooth_toroidal_continuity(results), filename, target_phis, nfp=nfp
+        )
+        filenames[body] = filename
+    return filenames
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+
+    parser = argparse.ArgumentParser(description="Slice every body of an assembly")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--step", type=float, default=0.5)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--prefix", default="vessel_fixed")
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+    body_id, names = body_labels(mesh)
+    print(f"{len(names)} bodies: {', '.join(names)}")
+
+    t0 = time.perf_counter()
+    body_results = generate_body_slices(
+        mesh, args.start, args.end, args.step, args.points, body_id=body_id
+    )
+    print(f"Sliced in {time.perf_counter() - t0:.2f} s")
+
+    filenames = save_bodies_to_kisslinger(
+        body_results, names, args.prefix, np.arange(0, 361, 2.0)
+    )
+    for body, filename in filenames.items():
+        print(f"  {names[body]} -> {filename}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution outputs from one slicing pass.
+
+The mesh is sectioned once, at the finest phi step and the largest point
+count of all requested levels, and smoothed once. Every level is then derived
+from that block in array operations:
+
+    phi      every k-th plane when the level step is a multiple of the finest
+             step, otherwise the cubic spline save_to_kisslinger() uses, with
+             zero R slope and zero Z curvature at 0° and 90°
+    points   arc-length resampling of all planes at once, starting at the
+             current point 0
+
+Arc-length resampling keeps point 0 in place, so point 0 (and the point
+ordering) is the same physical location in every level.
+
+Usage:
+    python3 output_pyramid.py chamber_surface.stl --csv 0.25:500 --csv 1:200 --kisslinger 2:500 --kisslinger 4:100
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results, results_to_arrays
+from resample_kisslinger import resample_contours, resample_toroidal
+from slice_chamber_final import (
+    generate_slices,
+    save_to_csv,
+    save_to_kisslinger,
+    smooth_toroidal_continuity,
+)
+
+
+def parse_level(text):
+    """Parses 'STEP:POINTS' into (float step, int points)."""
+    try:
+        step, points = text.split(":")
+        step, points = float(step), int(points)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected STEP:POINTS, got {text!r}")
+    if step <= 0 or points < 3:
+        raise argparse.ArgumentTypeError(f"Invalid level {text!r}")
+    return step, points
+
+
+def decimate_phi(phis, R, Z, step):
+    """
+    Reduces (n_phi, n_points) planes to the given phi step over the same
+    range. Exact plane selection when step is a multiple of the source step,
+    otherwise the symmetric-plane spline of resample_toroidal().
+    """
+    phis = np.asarray(phis, dtype=float)
+    source_step = phis[1] - phis[0] if len(phis) > 1 else step
+    ratio = step / source_step
+    uniform = np.allclose(np.diff(phis), source_step)
+    if uniform and np.isclose(ratio, round(ratio)) and round(ratio) >= 1:
+        k = int(round(ratio))
+        return phis[::k], R[::k], Z[::k]
+
+    targets = np.arange(phis[0], phis[-1] + step / 2, step)
+    targets = targets[targets <= phis[-1] + 1e-9]
+    R, Z = resample_toroidal(phis, R, Z, targets)
+    return targets, R, Z
+
+
+def build_pyramid(phis, R, Z, levels):
+    """
+    Derives every (step, points) level from the finest block.
+    Returns {(step, points): (phis, R, Z)}.
+    """
+    by_points = {R.shape[1]: (R, Z)}
+    pyramid = {}
+    for step, points in levels:
+        if points not in by_points:
+            by_points[points] = resample_contours(R, Z, points)
+        pyramid[(step, points)] = decimate_phi(phis, *by_points[points], step)
+    return pyramid
+
+
+def write_pyramid(
+    mesh,
+    csv_levels,
+    kisslinger_levels=(),
+    prefix="chamber",
+    start_angle=0,
+    end_angle=90,
+    nfp=1,
+):
+    """
+    Sections the mesh once at the finest CSV level and writes every level:
+    <prefix>_<step>deg_<points>pts.csv for each CSV level and
+    <prefix>_<dphi>deg_<points>pts.kisslinger for each Kisslinger level
+    (target planes 0..360 in steps of dphi). Returns the written filenames.
+    """
+    if not csv_levels:
+        raise ValueError("At least one CSV level sets the slicing step.")
+    fine_step = min(step for step, _ in csv_levels)
+    fine_points = max(
+        points for _, points in list(csv_levels) + list(kisslinger_levels)
+    )
+
+    t0 = time.perf_counter()
+    print(f"Slicing once at {fine_step}° x {fine_points} points...")
+    results = smooth_toroidal_continuity(
+        generate_slices(mesh, start_angle, end_angle, fine_step, fine_points)
+    )
+    if not results:
+        raise ValueError("The mesh produced no slices.")
+    phis, R, Z = results_to_arrays(results)
+    t1 = time.perf_counter()
+
+    # Kisslinger levels interpolate from every sliced plane
+    pyramid = build_pyramid(
+        phis,
+        R,
+        Z,
+        list(csv_levels) + [(fine_step, points) for _, points in kisslinger_levels],
+    )
+    t2 = time.perf_counter()
+
+    filenames = []
+    for step, points in csv_levels:
+        filename = f"{prefix}_{step:g}deg_{points}pts.csv"
+        save_to_csv(arrays_to_results(*pyramid[(step, points)]), filename)
+        filenames.append(filename)
+    for dphi, points in kisslinger_levels:
+        filename = f"{prefix}_{dphi:g}deg_{points}pts.kisslinger"
+        save_to_kisslinger(
+            arrays_to_results(*pyramid[(fine_step, points)]),
+            filename,
+            np.arange(0, 360 + dphi / 2, dphi),
+            nfp=nfp,
+        )
+        filenames.append(filename)
+    t3 = time.perf_counter()
+
+    print(
+        f"{len(filenames)} levels: slice {t1 - t0:.2f} s, derive {t2 - t1:.3f} s, "
+        f"write {t3 - t2:.2f} s"
+    )
+    return filenames
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+
+    parser = argparse.ArgumentParser(description="Write several resolutions at once")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument(
+        "--csv",
+        type=parse_level,
+        action="append",
+        metavar="STEP:POINTS",
+        help="CSV level (repeatable, default 0.25:500)",
+    )
+    parser.add_argument(
+        "--kisslinger",
+        type=parse_level,
+        action="append",
+        metavar="DPHI:POINTS",
+        help="Kisslinger level over 0-360° (repeatable, default 2:500)",
+    )
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--prefix", default="chamber")
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+    filenames = write_pyramid(
+        mesh,
+        args.csv or [(0.25, 500)],
+        args.kisslinger or [(2.0, 500)],
+        prefix=args.prefix,
+        start_angle=args.start,
+        end_angle=args.end,
+    )
+    for filename in filenames:
+        print(f"  {filename}")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Regenerate a phi sub-range and splice it into existing exports.
+
+When one toroidal sector of the CAD changes, only the source planes inside
+[start, end] are re-sectioned. They are aligned like
+smooth_toroidal_continuity(), but anchored on the unchanged neighbours at
+both ends: the first half of the range propagates point 0 forward from the
+plane before it, the second half backwards from the plane after it. Any
+remaining mismatch then stays inside the changed sector instead of showing
+up at its boundary.
+
+The existing files are not regenerated. A byte-offset index of the plane
+blocks (from the newline positions) locates the blocks to replace, and only
+blocks whose text changes are written. Blocks of unchanged length are
+overwritten in place. If the length changes, the file is rewritten from the
+first replaced block onward.
+
+CSV blocks are the re-sectioned planes. The existing Kisslinger values are
+kept except for the target planes whose source angle lies in an interval
+touching a changed CSV plane. Those are evaluated from a cubic spline fitted
+locally, over SPLINE_MARGIN source planes on each side of them (the same
+end conditions as save_to_kisslinger() where the window reaches 0° or 90°).
+A global spline would move the planes further out by a small, decaying
+amount; that is left out. An update that changes no CSV plane rewrites
+nothing.
+
+Usage:
+    python3 partial_update.py chamber_surface.stl --start 30 --end 40 --csv chamber_coordinates_fixed.csv --kisslinger vessel_fixed.kisslinger
+"""
+
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+
+from kisslinger_io import (
+    arrays_to_results,
+    block_offsets,
+    format_kisslinger_block,
+    read_dataset,
+)
+from slice_chamber_final import (
+    _align_to_previous,
+    _csv_rows,
+    get_rz_slice,
+    kisslinger_arrays,
+    kisslinger_source_angles,
+)
+
+# Header lines before the first plane block
+CSV_HEADER_LINES = 1
+KISSLINGER_HEADER_LINES = 2
+
+# Source planes on each side of the recomputed interval the local phi spline
+# is fitted over
+SPLINE_MARGIN = 4
+
+
+def changed_blocks(filename, header_lines, lines_per_block, blocks):
+    """
+    Byte offsets of the plane blocks of a file (see block_offsets()) and the
+    {block index: bytes} blocks whose text differs from the file.
+    """
+    with open(filename, "rb") as f:
+        old = f.read()
+    offsets = block_offsets(old, header_lines, lines_per_block)
+    return offsets, {
+        k: block
+        for k, block in blocks.items()
+        if block != old[offsets[k] : offsets[k + 1]]
+    }
+
+
+def splice_blocks(filename, offsets, blocks):
+    """
+    Replaces the {block index: bytes} blocks of a file. Returns the number of
+    bytes written.
+    """
+    if not blocks:
+        return 0
+    indices = sorted(blocks)
+    with open(filename, "r+b") as f:
+        if all(len(blocks[k]) == offsets[k + 1] - offsets[k] for k in indices):
+            for k in indices:
+                f.seek(offsets[k])
+                f.write(blocks[k])
+            return sum(len(blocks[k]) for k in indices)
+
+        # Lengths changed: rewrite from the first replaced block to the end
+        first = indices[0]
+        f.seek(offsets[first])
+        old = f.read()
+        base = offsets[first]
+        pieces = []
+        for k in range(first, len(offsets) - 1):
+            pieces.append(
+                blocks[k]
+                if k in blocks
+                else old[offsets[k] - base : offsets[k + 1] - base]
+            )
+        pieces.append(old[offsets[-1] - base :])
+        new = b"".join(pieces)
+        f.seek(base)
+        f.write(new)
+        f.truncate()
+        return len(new)
+
+
+def _csv_block(phi, r_vals, z_vals):
+    """One plane exactly as save_to_csv() writes it."""
+    buffer = io.StringIO(newline="")
+    csv.writer(buffer).writerows(_csv_rows(phi, r_vals, z_vals))
+    return buffer.getvalue().encode()
+
+
+def reslice_range(mesh, phis, R, Z, start_angle, end_angle):
+    """
+    Re-sections the planes of (phis, R, Z) inside [start, end] and aligns
+    them on both unchanged neighbours. Returns (indices, R_new, Z_new) for
+    the replaced planes.
+    """
+    num_points = R.shape[1]
+    indices = np.flatnonzero((phis >= start_angle - 1e-9) & (phis <= end_angle + 1e-9))
+    if len(indices) == 0:
+        raise ValueError(f"No existing planes between {start_angle}° and {end_angle}°.")
+
+    R_new = np.empty((len(indices), num_points))
+    Z_new = np.empty((len(indices), num_points))
+    for i, k in enumerate(indices):
+        r_vals, z_vals = get_rz_slice(mesh, phis[k], num_points=num_points)
+        if r_vals is None:
+            raise ValueError(f"No section at {phis[k]}°; the plane can't be replaced.")
+        R_new[i], Z_new[i] = r_vals, z_vals
+
+    before = indices[0] - 1 if indices[0] > 0 else None
+    after = indices[-1] + 1 if indices[-1] + 1 < len(phis) else None
+
+    # Forward from the plane before the range, backwards from the plane
+    # after it, meeting in the middle
+    if before is None and after is None:
+        split = 1
+    elif before is None:
+        split = 0
+    elif after is None:
+        split = len(indices)
+    else:
+        split = (len(indices) + 1) // 2
+
+    prev = (R[before, 0], Z[before, 0]) if before is not None else None
+    for i in range(split):
+        if prev is not None:
+            R_new[i], Z_new[i] = _align_to_previous(R_new[i], Z_new[i], *prev)
+        prev = (R_new[i, 0], Z_new[i, 0])
+
+    nxt = (R[after, 0], Z[after, 0]) if after is not None else None
+    for i in range(len(indices) - 1, split - 1, -1):
+        if nxt is not None:
+            R_new[i], Z_new[i] = _align_to_previous(R_new[i], Z_new[i], *nxt)
+        nxt = (R_new[i, 0], Z_new[i, 0])
+
+    return indices, R_new, Z_new
+
+
+def kisslinger_update(phis, R, Z, changed, target_phis):
+    """
+    Recomputes the Kisslinger target planes that depend on the changed source
+    planes of (phis, R, Z) in mm. Returns (target indices, R, Z) in cm.
+    """
+    first = max(changed[0] - 1, 0)
+    last = min(changed[-1] + 1, len(phis) - 1)
+    s_phi, _ = kisslinger_source_angles(target_phis)
+    s_phi = np.clip(s_phi, phis[0], phis[-1])
+    targets = np.flatnonzero((s_phi >= phis[first]) & (s_phi <= phis[last]))
+
+    window = slice(max(first - SPLINE_MARGIN, 0), last + SPLINE_MARGIN + 1)
+    R_all, Z_all = kisslinger_arrays(
+        arrays_to_results(phis[window], R[window], Z[window]), target_phis[targets]
+    )
+    return targets, R_all, Z_all
+
+
+def partial_update(mesh, csv_file, start_angle, end_angle, kisslinger_file=None):
+    """
+    Re-slices [start, end] and splices the new planes into the CSV export
+    and, if given, the Kisslinger file derived from it. Returns the number
+    of CSV and Kisslinger planes rewritten.
+    """
+    data = read_dataset(csv_file)
+    phis, R, Z = data["phis"], data["R"], data["Z"]
+    num_points = R.shape[1]
+
+    t0 = time.perf_counter()
+    indices, R_new, Z_new = reslice_range(mesh, phis, R, Z, start_angle, end_angle)
+    print(
+        f"Re-sliced {len(indices)} planes ({phis[indices[0]]}° to {phis[indices[-1]]}°) "
+        f"in {time.perf_counter() - t0:.2f} s"
+    )
+    for side, k, i in (("start", indices[0] - 1, 0), ("end", indices[-1] + 1, -1)):
+        if 0 <= k < len(phis):
+            jump = np.hypot(R_new[i, 0] - R[k, 0], Z_new[i, 0] - Z[k, 0])
+            print(f"  point-0 jump to the unchanged plane at the {side}: {jump:.3f} mm")
+
+    offsets, blocks = changed_blocks(
+        csv_file,
+        CSV_HEADER_LINES,
+        num_points,
+        {
+            int(k): _csv_block(phis[k], R_new[i], Z_new[i])
+            for i, k in enumerate(indices)
+        },
+    )
+    written = splice_blocks(csv_file, offsets, blocks)
+    print(
+        f"Updated {csv_file}: {len(blocks)} of {len(indices)} planes changed, "
+        f"{written} of {offsets[-1]} bytes rewritten"
+    )
+    if not kisslinger_file:
+        return len(blocks), 0
+    if not blocks:
+        print(f"Kept {kisslinger_file}: no source plane changed")
+        return 0, 0
+
+    # Changed planes take the new, unrounded values; the others are what
+    # the CSV holds
+    changed = np.array(sorted(blocks))
+    R[indices], Z[indices] = R_new, Z_new
+    existing = read_dataset(kisslinger_file)
+    targets, R_all, Z_all = kisslinger_update(phis, R, Z, changed, existing["phis"])
+
+    offsets, blocks = changed_blocks(
+        kisslinger_file,
+        KISSLINGER_HEADER_LINES,
+        1 + existing["R"].shape[1],
+        {
+            int(k): format_kisslinger_block(
+                existing["phis"][k], R_all[i], Z_all[i]
+            ).encode()
+            for i, k in enumerate(targets)
+        },
+    )
+    written = splice_blocks(kisslinger_file, offsets, blocks)
+    print(
+        f"Updated {kisslinger_file}: {len(blocks)} of {len(existing['phis'])} "
+        f"planes changed, {written} of {offsets[-1]} bytes rewritten"
+    )
+    return len(changed), len(blocks)
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+
+    parser = argparse.ArgumentParser(description="Re-slice a phi sub-range in place")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--start", type=float, required=True)
+    parser.add_argument("--end", type=float, required=True)
+    parser.add_argument("--csv", default="chamber_coordinates_fixed.csv")
+    parser.add_argument("--kisslinger", default=None)
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+    partial_update(mesh, args.csv, args.start, args.end, args.kisslinger)
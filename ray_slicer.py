@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Ray-cast poloidal sampling of the chamber wall.
+
+For star-shaped cross-sections the wall can be sampled directly: from a
+reference axis (R0, Z0) in every phi plane, num_points rays are fired at
+equally spaced poloidal angles theta_j = 2*pi*j / num_points, and the first
+wall hit along each ray is point j of that plane.
+
+A ray in the phi plane can only hit triangles whose toroidal extent contains
+phi, so triangles are binned by phi extent once and every (ray, candidate
+triangle) pair of all planes goes through one vectorized Moller-Trumbore
+kernel. Within a plane each triangle is only tested against the rays in its
+poloidal extent. (trimesh's rtree intersector culls by the ray's bounding
+box, which for rays crossing the chamber is most of the mesh.)
+
+Point j always lies at the same poloidal angle, so the correspondence between
+planes is built in. No sorting, deduplication or toroidal smoothing is needed,
+and point 0 sits on the outboard midplane (theta = 0). Points are spaced
+equally in angle rather than in arc length.
+
+Usage:
+    python3 ray_slicer.py chamber_surface.stl --step 0.25 --points 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results
+
+
+def reference_axis(mesh):
+    """Default ray origin (R0, Z0): the centre of the mesh's R and Z extent."""
+    vertices = np.asarray(mesh.vertices)
+    R = np.hypot(vertices[:, 0], vertices[:, 1])
+    return (R.min() + R.max()) / 2, (vertices[:, 2].min() + vertices[:, 2].max()) / 2
+
+
+def plane_candidates(triangles, phis):
+    """
+    Returns (plane, triangle) index pairs for every triangle whose toroidal
+    extent contains the plane angle, sorted by plane.
+    """
+    phi = np.degrees(np.arctan2(triangles[:, :, 1], triangles[:, :, 0]))
+
+    # Unwrap triangles straddling the +-180 deg cut, as in watch_slices.py
+    wraps = phi.max(axis=1) - phi.min(axis=1) > 180.0
+    phi[wraps] = np.where(phi[wraps] < 0, phi[wraps] + 360.0, phi[wraps])
+    order = np.argsort(phis)
+    sorted_phis = np.asarray(phis, dtype=float)[order]
+
+    pairs = []
+    for shift in (0.0, -360.0, 360.0):
+        lo = np.searchsorted(sorted_phis, phi.min(axis=1) + shift - 1e-9, side="left")
+        hi = np.searchsorted(sorted_phis, phi.max(axis=1) + shift + 1e-9, side="right")
+        counts = hi - lo
+        owner = np.repeat(np.arange(len(triangles)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        pairs.append(np.column_stack([order[lo[owner] + offsets], owner]))
+
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _first_hits(origins, directions, v0, e1, e2):
+    """
+    Vectorized Moller-Trumbore for paired rays and triangles.
+    Returns the ray parameter t of each pair (inf where it misses).
+    """
+    p = np.cross(directions, e2)
+    det = (e1 * p).sum(axis=1)
+    valid = np.abs(det) > 1e-12
+    inv_det = np.where(valid, 1.0 / np.where(valid, det, 1.0), 0.0)
+
+    s = origins - v0
+    u = (s * p).sum(axis=1) * inv_det
+    q = np.cross(s, e1)
+    v = (directions * q).sum(axis=1) * inv_det
+    t = (e2 * q).sum(axis=1) * inv_det
+
+    # Small tolerance so rays through a shared edge can't slip between faces
+    tol = 1e-9
+    hit = valid & (u >= -tol) & (v >= -tol) & (u + v <= 1 + tol) & (t > 1e-9)
+    return np.where(hit, t, np.inf)
+
+
+def raycast_slices(mesh, phis, num_points=500, axis=None, chunk_size=2_000_000):
+    """
+    Samples the wall along fixed poloidal rays in every plane.
+
+    axis is (R0, Z0), either scalars or (n_phi,) arrays; by default
+    reference_axis(mesh). Returns (R, Z) arrays of shape (n_phi, num_points),
+    NaN where a ray misses the mesh. chunk_size bounds the number of
+    (ray, triangle) pairs tested at once.
+
+    The axis must not lie on a triangle (its poloidal extent is undefined).
+    """
+    phis = np.asarray(phis, dtype=float)
+    R0, Z0 = reference_axis(mesh) if axis is None else axis
+    R0 = np.broadcast_to(np.asarray(R0, dtype=float), phis.shape)
+    Z0 = np.broadcast_to(np.asarray(Z0, dtype=float), phis.shape)
+
+    # One ray per (plane, poloidal angle), all in the plane of their phi
+    phi = np.radians(phis)[:, None]
+    theta = 2 * np.pi * np.arange(num_points) / num_points
+    cos_t, sin_t = np.cos(theta)[None, :], np.sin(theta)[None, :]
+    shape = (len(phis), num_points)
+    origins = np.stack(
+        [
+            np.broadcast_to(R0[:, None] * np.cos(phi), shape),
+            np.broadcast_to(R0[:, None] * np.sin(phi), shape),
+            np.broadcast_to(Z0[:, None], shape),
+        ],
+        axis=-1,
+    ).reshape(-1, 3)
+    directions = np.stack(
+        [cos_t * np.cos(phi), cos_t * np.sin(phi), np.broadcast_to(sin_t, shape)],
+        axis=-1,
+    ).reshape(-1, 3)
+
+    triangles = np.asarray(mesh.triangles, dtype=np.float64)
+    v0 = triangles[:, 0]
+    e1 = triangles[:, 1] - v0
+    e2 = triangles[:, 2] - v0
+    tri_R = np.hypot(triangles[:, :, 0], triangles[:, :, 1])
+    plane, tri = plane_candidates(triangles, phis)
+
+    # Poloidal extent of each candidate around its plane's axis, padded by
+    # one ray spacing (the in-plane cut can bow slightly past the vertices)
+    step = 2 * np.pi / num_points
+    theta_v = np.arctan2(
+        triangles[tri, :, 2] - Z0[plane, None], tri_R[tri] - R0[plane, None]
+    )
+    wraps = theta_v.max(axis=1) - theta_v.min(axis=1) > np.pi
+    theta_v[wraps] = np.where(
+        theta_v[wraps] < 0, theta_v[wraps] + 2 * np.pi, theta_v[wraps]
+    )
+    first_ray = np.floor(theta_v.min(axis=1) / step).astype(np.int64) - 1
+    n_rays = np.ceil(theta_v.max(axis=1) / step).astype(np.int64) + 2 - first_ray
+    n_rays = np.minimum(n_rays, num_points)
+
+    # Test every candidate against the rays in its poloidal extent, in
+    # chunks of about chunk_size (ray, triangle) pairs
+    distance = np.full(len(origins), np.inf)
+    bounds = np.searchsorted(
+        np.cumsum(n_rays), np.arange(chunk_size, n_rays.sum(), chunk_size)
+    )
+    for index in np.split(np.arange(len(tri)), bounds):
+        counts = n_rays[index]
+        owner = np.repeat(index, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        ray = plane[owner] * num_points + (first_ray[owner] + offsets) % num_points
+        cand = tri[owner]
+
+        t = _first_hits(origins[ray], directions[ray], v0[cand], e1[cand], e2[cand])
+        np.minimum.at(distance, ray, t)
+
+    distance[~np.isfinite(distance)] = np.nan
+    distance = distance.reshape(shape)
+    return R0[:, None] + distance * cos_t, Z0[:, None] + distance * sin_t
+
+
+def raycast_results(
+    mesh, start_angle=0, end_angle=90, step=0.5, num_points=500, axis=None
+):
+    """
+    Ray-cast counterpart of generate_slices(): returns a {phi: (R, Z)} dict
+    over the same angles. Planes where any ray misses are left out.
+    """
+    phis = np.arange(start_angle, end_angle + step / 2, step)
+    print(f"Ray casting {len(phis)} planes x {num_points} rays...")
+    R, Z = raycast_slices(mesh, phis, num_points=num_points, axis=axis)
+
+    complete = ~np.isnan(R).any(axis=1)
+    if not complete.all():
+        print(
+            f"Warning: rays missed the wall on {np.count_nonzero(~complete)} planes "
+            f"(first at {phis[~complete][0]}°); is the section star-shaped around the axis?"
+        )
+    results = arrays_to_results(phis[complete], R[complete], Z[complete])
+    print(f"Generated slices for {len(results)} angles.")
+    return results
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1, save_to_csv, save_to_kisslinger
+
+    parser = argparse.ArgumentParser(description="Ray-cast poloidal sampling")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--step", type=float, default=0.25)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument(
+        "--axis",
+        type=float,
+        nargs=2,
+        metavar=("R0", "Z0"),
+        default=None,
+        help="Ray origin in mm (default: centre of the mesh extent)",
+    )
+    parser.add_argument("--csv", default="chamber_coordinates_rays.csv")
+    parser.add_argument("--kisslinger", default="vessel_rays.kisslinger")
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+
+    t0 = time.perf_counter()
+    results = raycast_results(
+        mesh, args.start, args.end, args.step, args.points, axis=args.axis
+    )
+    print(f"Ray cast in {time.perf_counter() - t0:.2f} s")
+
+    save_to_csv(results, args.csv)
+    save_to_kisslinger(results, args.kisslinger, np.arange(0, 361, 2.0), nfp=1)
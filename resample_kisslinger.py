@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Resample an existing Kisslinger file (or CSV export) to a new resolution.
+
+Instead of re-slicing the STL, the planes already on disk are re-interpolated:
+along phi with the same cubic spline save_to_kisslinger() uses, and along each
+contour by arc length, with all planes handled in one array pass. Point 0 of
+every plane stays where it was, so the toroidal point correspondence and the
+field-period count are preserved.
+
+Writing the other format converts: a CSV export (0-90°, mm) becomes the
+mirrored 0-360° Kisslinger file (cm) save_to_kisslinger() would write, and a
+Kisslinger file is mapped back onto 0-90° in mm.
+
+Usage:
+    python3 resample_kisslinger.py vessel_fixed.kisslinger -o vessel_720x300.kisslinger --n-tor 720 --points 300
+    python3 resample_kisslinger.py chamber_coordinates_fixed.csv -o vessel.kisslinger --n-tor 181
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results, read_dataset, write_kisslinger
+from slice_chamber_final import (
+    _symmetric_splines,
+    _toroidal_spline,
+    kisslinger_arrays,
+    kisslinger_source_angles,
+    save_to_csv,
+)
+
+
+def resample_contours(R, Z, num_points):
+    """
+    Resamples (n_phi, n) closed contours to num_points points equally spaced
+    in arc length, starting at the current point 0.
+
+    Each plane's arc length is normalized to [0, 1] and offset by the plane
+    index, so every plane is interpolated by a single searchsorted over the
+    whole block.
+    """
+    R = np.asarray(R, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+    n_phi, n = R.shape
+
+    # Close the contours and measure the cumulative length along each one
+    R_closed = np.concatenate([R, R[:, :1]], axis=1)
+    Z_closed = np.concatenate([Z, Z[:, :1]], axis=1)
+    segment = np.hypot(np.diff(R_closed, axis=1), np.diff(Z_closed, axis=1))
+    cumulative = np.concatenate(
+        [np.zeros((n_phi, 1)), np.cumsum(segment, axis=1)], axis=1
+    )
+    total = cumulative[:, -1:]
+    if np.any(total <= 0):
+        raise ValueError("Cannot resample a plane whose points all coincide.")
+
+    # Global, strictly increasing parameter: plane index + fraction of length
+    plane = np.arange(n_phi)[:, None]
+    source = (plane + cumulative / total).ravel()
+    target = (plane + np.arange(num_points) / num_points).ravel()
+
+    # Segment containing each target; zero-length segments are never chosen
+    # because searchsorted(side="right") skips repeated parameter values
+    idx = np.searchsorted(source, target, side="right") - 1
+    idx = np.minimum(idx, source.size - 2)
+    span = source[idx + 1] - source[idx]
+    f = np.where(span > 0, (target - source[idx]) / np.where(span > 0, span, 1), 0.0)
+
+    R_flat, Z_flat = R_closed.ravel(), Z_closed.ravel()
+    R_new = R_flat[idx] + f * (R_flat[idx + 1] - R_flat[idx])
+    Z_new = Z_flat[idx] + f * (Z_flat[idx + 1] - Z_flat[idx])
+    return R_new.reshape(n_phi, num_points), Z_new.reshape(n_phi, num_points)
+
+
+def resample_toroidal(phis, R, Z, target_phis, period=360.0, interpolation="cubic"):
+    """
+    Interpolates the (n_phi, n_points) planes to target_phis (degrees).
+    Targets outside the source range wrap around when the source covers a
+    full period and are otherwise held at the end planes.
+    """
+    phis = np.asarray(phis, dtype=float)
+    target_phis = np.asarray(target_phis, dtype=float)
+    query = target_phis
+    if phis[-1] - phis[0] >= period - 1e-9:
+        outside = (query < phis[0]) | (query > phis[-1])
+        query = np.where(outside, phis[0] + np.mod(query - phis[0], period), query)
+    query = np.clip(query, phis[0], phis[-1])
+
+    if interpolation == "cubic" and len(phis) >= 4:
+        full_period = np.isclose(phis[-1] - phis[0], period)
+        if full_period and np.allclose(R[0], R[-1]) and np.allclose(Z[0], Z[-1]):
+            spline = _toroidal_spline(phis, np.stack([R, Z], axis=-1), period=period)
+            RZ = spline(query)
+            return RZ[..., 0], RZ[..., 1]
+        # Same end conditions as save_to_kisslinger() at the symmetry planes
+        spline_R, spline_Z = _symmetric_splines(phis, R, Z)
+        return spline_R(query), spline_Z(query)
+    if len(phis) >= 2:
+        idx = np.clip(np.searchsorted(phis, query) - 1, 0, len(phis) - 2)
+        f = ((query - phis[idx]) / (phis[idx + 1] - phis[idx]))[:, None]
+        return (1 - f) * R[idx] + f * R[idx + 1], (1 - f) * Z[idx] + f * Z[idx + 1]
+    return np.repeat(R, len(query), axis=0), np.repeat(Z, len(query), axis=0)
+
+
+def resample_dataset(data, target_phis=None, num_points=None, interpolation="cubic"):
+    """
+    Resamples a read_dataset() dict. Leaving target_phis or num_points as
+    None keeps that resolution. Returns a new dict with the same keys.
+    """
+    phis, R, Z = data["phis"], data["R"], data["Z"]
+
+    if target_phis is not None:
+        R, Z = resample_toroidal(
+            phis,
+            R,
+            Z,
+            target_phis,
+            period=360.0 / data["nfp"],
+            interpolation=interpolation,
+        )
+        phis = np.asarray(target_phis, dtype=float)
+    if num_points is not None:
+        R, Z = resample_contours(R, Z, num_points)
+
+    return dict(data, phis=phis, R=R, Z=Z)
+
+
+def csv_to_kisslinger(data, target_phis, interpolation="cubic"):
+    """
+    The Kisslinger dict save_to_kisslinger() would write for a CSV export
+    dict: mirrored from 0-90° onto target_phis and converted to cm.
+    """
+    results = arrays_to_results(data["phis"], data["R"], data["Z"])
+    target_phis = np.asarray(target_phis, dtype=float)
+    R, Z = kisslinger_arrays(results, target_phis, interpolation)
+    return dict(
+        data,
+        name="transformed_vessel_fixed",
+        phis=target_phis,
+        R=R,
+        Z=Z,
+        units="cm",
+        format="kisslinger",
+    )
+
+
+def kisslinger_to_csv(data, source_phis=None, interpolation="cubic"):
+    """
+    Inverse of csv_to_kisslinger(): the Kisslinger planes between 90° and
+    180°, which kisslinger_source_angles() maps onto the 0-90° source range
+    (Z mirrored only at 180°), in mm. source_phis, if given, are then
+    interpolated from those planes like a CSV export.
+    """
+    phis = data["phis"]
+    quadrant = (phis >= 90.0 - 1e-9) & (phis <= 180.0 + 1e-9)
+    if not np.any(quadrant):
+        raise ValueError("No Kisslinger planes between 90° and 180° to convert.")
+    s_phi, mirror_z = kisslinger_source_angles(phis[quadrant])
+    order = np.argsort(s_phi)
+    R, Z = data["R"][quadrant], data["Z"][quadrant]
+    Z = np.where(mirror_z[:, None], -Z, Z)
+
+    # Convert cm to mm
+    converted = dict(
+        data,
+        name="",
+        header=[],
+        nfp=1,
+        phis=s_phi[order],
+        R=R[order] * 10.0,
+        Z=Z[order] * 10.0,
+        units="mm",
+        format="csv",
+    )
+    if source_phis is None:
+        return converted
+    return resample_dataset(converted, source_phis, interpolation=interpolation)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resample a Kisslinger or CSV file")
+    parser.add_argument("input", help="Kisslinger file or CSV export")
+    parser.add_argument(
+        "-o", "--output", required=True, help="Output file (.csv or Kisslinger)"
+    )
+    parser.add_argument(
+        "--n-tor",
+        type=int,
+        default=None,
+        help="Number of planes, spread over the input's phi range "
+        "(over 0-360° or 0-90° when converting)",
+    )
+    parser.add_argument("--points", type=int, default=None, help="Points per plane")
+    parser.add_argument("--interpolation", choices=("cubic", "linear"), default="cubic")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    data = read_dataset(args.input)
+    t1 = time.perf_counter()
+
+    to_csv = args.output.lower().endswith(".csv")
+    if to_csv and data["format"] == "kisslinger":
+        source_phis = None
+        if args.n_tor is not None:
+            source_phis = np.linspace(0.0, 90.0, args.n_tor)
+        resampled = kisslinger_to_csv(data, source_phis, args.interpolation)
+        resampled = resample_dataset(resampled, num_points=args.points)
+    elif not to_csv and data["format"] == "csv":
+        target_phis = np.arange(0, 361, 2.0)
+        if args.n_tor is not None:
+            target_phis = np.linspace(0.0, 360.0, args.n_tor)
+        resampled = resample_dataset(data, num_points=args.points)
+        resampled = csv_to_kisslinger(resampled, target_phis, args.interpolation)
+    else:
+        target_phis = None
+        if args.n_tor is not None:
+            target_phis = np.linspace(data["phis"][0], data["phis"][-1], args.n_tor)
+        resampled = resample_dataset(
+            data, target_phis, args.points, interpolation=args.interpolation
+        )
+    t2 = time.perf_counter()
+
+    n_phi, n_points = resampled["R"].shape
+    if to_csv:
+        save_to_csv(
+            arrays_to_results(resampled["phis"], resampled["R"], resampled["Z"]),
+            args.output,
+        )
+    else:
+        write_kisslinger(
+            args.output,
+            resampled["phis"],
+            resampled["R"],
+            resampled["Z"],
+            nfp=resampled["nfp"],
+            name=resampled["name"] or "transformed_vessel_fixed",
+        )
+    t3 = time.perf_counter()
+
+    print(
+        f"{data['R'].shape[0]}x{data['R'].shape[1]} -> {n_phi}x{n_points}: "
+        f"read {t1 - t0:.2f} s, resample {t2 - t1:.3f} s, write {t3 - t2:.2f} s"
+    )
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Signed-distance-field slicing backend.
+
+The mesh is sampled once into a narrow-band signed distance field on a
+cylindrical (phi, R, Z) grid. A cross-section at any phi is then the zero
+level of the field blended between the two neighbouring phi planes. Its
+points are the sign changes along the grid edges (marching squares crossing
+points, all edges at once). No per-plane mesh intersection is needed, so
+degenerate angles and small gaps in non-watertight CAD exports don't break
+the slice, and extra slices are cheap once the field is built.
+
+SDFSlicer provides section_points() like stl_reader.BinarySTL, so it can be
+passed to get_rz_slice() / generate_slices() in place of the mesh.
+Watch mode (watch_slices.py) still needs the mesh itself: it hashes the
+triangles per angle bin, and rebuilding the field after every save would
+cost more than re-sectioning the changed angles.
+
+Usage:
+    python3 sdf_slicer.py chamber_surface.stl --resolution 2 --phi-step 0.5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from surface_error import TriangleIndex
+
+# Default grid spacing: mm in R and Z, degrees in phi
+SDF_RESOLUTION = 2.0
+SDF_PHI_STEP = 0.5
+
+
+class SDFSlicer:
+    """Narrow-band signed distance field of a mesh on a cylindrical grid."""
+
+    def __init__(self, mesh, resolution=SDF_RESOLUTION, phi_step=SDF_PHI_STEP):
+        import trimesh
+
+        t0 = time.perf_counter()
+
+        # The sign comes from the vertex normals, so they must agree across
+        # faces. Only consistency matters: a globally flipped mesh gives the
+        # same zero level.
+        if not mesh.is_winding_consistent:
+            mesh = mesh.copy()
+            trimesh.repair.fix_winding(mesh)
+
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        R_v = np.hypot(vertices[:, 0], vertices[:, 1])
+        phi_v = np.degrees(np.arctan2(vertices[:, 1], vertices[:, 0]))
+
+        # A node must be in the band on both neighbouring phi planes for the
+        # blended field to be valid, so the band also spans one phi step
+        self.band = 1.1 * (np.sqrt(2) * resolution + R_v.max() * np.radians(phi_step))
+        pad = 2 * self.band
+        self.R = np.arange(R_v.min() - pad, R_v.max() + pad + resolution, resolution)
+        self.Z = np.arange(
+            vertices[:, 2].min() - pad,
+            vertices[:, 2].max() + pad + resolution,
+            resolution,
+        )
+        # Close to the axis the angular padding grows without bound; the grid
+        # never needs more than one turn (contour_points() wraps phi by 360°)
+        pad_deg = min(np.degrees(pad / max(R_v.min(), resolution)), 180.0)
+        phi_start = phi_v.min() - pad_deg
+        phi_end = min(phi_v.max() + pad_deg, phi_start + 360.0)
+        self.phis = np.arange(phi_start, phi_end + phi_step, phi_step)
+        self.resolution = resolution
+
+        print(
+            f"Building SDF on {len(self.phis)}x{len(self.R)}x{len(self.Z)} "
+            f"(phi, R, Z) grid, band {self.band:.2f} mm..."
+        )
+        # Triangles no larger than a few cells keep the candidate search local
+        index = TriangleIndex(mesh.triangles, max_edge=4 * resolution)
+        faces = np.asarray(mesh.faces)
+        vertex_normals = np.asarray(mesh.vertex_normals)
+
+        # Only the band is stored: per phi plane, the flat (R, Z) indices of
+        # its band nodes and their field values. A dense grid would hold
+        # n_phi * nR * nZ values, nearly all of them far from the wall.
+        self.band_nodes = []
+        self.band_values = []
+        RR, ZZ = np.meshgrid(self.R, self.Z, indexing="ij")
+        cutoff = self.band + index.radius
+        for i, phi in enumerate(np.radians(self.phis)):
+            nodes = np.column_stack(
+                [(RR * np.cos(phi)).ravel(), (RR * np.sin(phi)).ravel(), ZZ.ravel()]
+            )
+
+            # Cheap rejection of nodes far from every triangle centroid
+            near, _ = index.tree.query(nodes, k=1, distance_upper_bound=cutoff)
+            candidates = np.flatnonzero(np.isfinite(near))
+            if len(candidates) == 0:
+                self.band_nodes.append(np.empty(0, dtype=np.int32))
+                self.band_values.append(np.empty(0, dtype=np.float32))
+                continue
+
+            # Only values next to the surface place the zero level, so the
+            # nearest-centroid candidates are enough
+            distance, closest, face = index.closest(nodes[candidates], exact=False)
+            in_band = distance <= self.band
+            candidates, distance = candidates[in_band], distance[in_band]
+            closest, face = closest[in_band], face[in_band]
+
+            # Sign from the vertex normals interpolated at the closest point,
+            # positive inside (the trimesh convention)
+            barycentric = trimesh.triangles.points_to_barycentric(
+                vertices[faces[face]], closest
+            )
+            normal = (barycentric[:, :, None] * vertex_normals[faces[face]]).sum(axis=1)
+            outside = ((nodes[candidates] - closest) * normal).sum(axis=1) > 0
+            self.band_nodes.append(candidates.astype(np.int32))
+            self.band_values.append(
+                np.where(outside, -distance, distance).astype(np.float32)
+            )
+
+        n_band = sum(len(nodes) for nodes in self.band_nodes)
+        n_grid = len(self.phis) * len(self.R) * len(self.Z)
+        print(
+            f"SDF built in {time.perf_counter() - t0:.1f} s "
+            f"({n_band} band nodes, {100 * n_band / n_grid:.1f}% of grid)"
+        )
+
+    def field(self, i):
+        """Field on phi plane i as an (nR, nZ) array, NaN outside the band."""
+        plane = np.full((len(self.R), len(self.Z)), np.nan, dtype=np.float32)
+        plane.flat[self.band_nodes[i]] = self.band_values[i]
+        return plane
+
+    def contour_points(self, phi_degrees):
+        """
+        Zero-level crossing points of the field at phi, as an (N, 2) array of
+        (R, Z), or None if phi is outside the grid or nothing crosses.
+        """
+        phi = phi_degrees
+        for shift in (0.0, 360.0, -360.0):
+            if self.phis[0] <= phi + shift <= self.phis[-1]:
+                phi += shift
+                break
+        else:
+            return None
+
+        # Blend the two neighbouring planes (NaN marks nodes outside the band)
+        i = min(
+            int((phi - self.phis[0]) // (self.phis[1] - self.phis[0])),
+            len(self.phis) - 2,
+        )
+        w = (phi - self.phis[i]) / (self.phis[i + 1] - self.phis[i])
+        if w < 1e-9:
+            F = self.field(i)
+        elif w > 1 - 1e-9:
+            F = self.field(i + 1)
+        else:
+            F = (1 - w) * self.field(i) + w * self.field(i + 1)
+
+        points = []
+        # Crossings along R edges, then along Z edges
+        for axis in (0, 1):
+            f0 = F[:-1, :] if axis == 0 else F[:, :-1]
+            f1 = F[1:, :] if axis == 0 else F[:, 1:]
+            crossing = np.isfinite(f0) & np.isfinite(f1) & ((f0 > 0) != (f1 > 0))
+            i_R, i_Z = np.nonzero(crossing)
+            t = f0[crossing] / (f0[crossing] - f1[crossing])
+            if axis == 0:
+                points.append(
+                    np.column_stack([self.R[i_R] + t * self.resolution, self.Z[i_Z]])
+                )
+            else:
+                points.append(
+                    np.column_stack([self.R[i_R], self.Z[i_Z] + t * self.resolution])
+                )
+
+        points = np.concatenate(points)
+        return points if len(points) else None
+
+    def section_points(self, plane_origin, plane_normal):
+        """
+        Section of the field with a plane through the Z axis, as (N, 3) points
+        on the half-plane get_rz_slice() keeps. Mirrors BinarySTL.section_points().
+        """
+        # get_rz_slice() uses normal = (sin(phi), -cos(phi), 0)
+        phi = np.degrees(np.arctan2(plane_normal[0], -plane_normal[1]))
+        points = self.contour_points(phi)
+        if points is None:
+            return None
+        phi_rad = np.radians(phi)
+        return np.column_stack(
+            [
+                points[:, 0] * np.cos(phi_rad),
+                points[:, 0] * np.sin(phi_rad),
+                points[:, 1],
+            ]
+        )
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import (
+        generate_slices,
+        rotate_mesh_to_q1,
+        save_to_csv,
+        save_to_kisslinger,
+        smooth_toroidal_continuity,
+    )
+
+    parser = argparse.ArgumentParser(description="Slice a mesh through an SDF")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--resolution", type=float, default=SDF_RESOLUTION)
+    parser.add_argument("--phi-step", type=float, default=SDF_PHI_STEP)
+    parser.add_argument("--step", type=float, default=0.25)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--csv", default="chamber_coordinates_sdf.csv")
+    parser.add_argument("--kisslinger", default="vessel_sdf.kisslinger")
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+    sdf = SDFSlicer(mesh, resolution=args.resolution, phi_step=args.phi_step)
+
+    t0 = time.perf_counter()
+    results = generate_slices(sdf, 0, 90, args.step, args.points)
+    print(f"Sliced in {time.perf_counter() - t0:.2f} s")
+
+    results = smooth_toroidal_continuity(results)
+    save_to_csv(results, args.csv)
+    save_to_kisslinger(results, args.kisslinger, np.arange(0, 361, 2.0), nfp=1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Cross-section geometry metrics for every plane at once.
+
+From an (n_phi, n_points) block of closed contours:
+
+    area        shoelace formula
+    perimeter   sum of segment lengths, including the closing segment
+    centroid    (R_c, Z_c) from the polygon's first moments
+    extents     R_min, R_max, Z_min, Z_max
+
+The enclosed volume and the wall area are integrated toroidally with the
+trapezoidal rule over phi (Pappus' theorems for a section at radius R):
+
+    volume      integral of area * R_c dphi
+    wall area   integral of (sum over segments of length * mid-point R) dphi
+
+The wall area ignores the toroidal tilt of the wall, so it is a slight
+underestimate where the cross-section changes quickly with phi.
+
+Units follow the input (mm for CSV exports and results dicts, cm for
+Kisslinger files).
+
+Usage:
+    python3 section_metrics.py chamber_coordinates_fixed.csv --save metrics.csv
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from kisslinger_io import read_dataset, results_to_arrays
+
+# Per-plane columns written by save_metrics()
+PLANE_COLUMNS = (
+    "area",
+    "perimeter",
+    "R_centroid",
+    "Z_centroid",
+    "R_min",
+    "R_max",
+    "Z_min",
+    "Z_max",
+)
+
+
+def section_metrics(R, Z):
+    """
+    Per-plane metrics of (n_phi, n_points) closed contours.
+    Returns a dict of (n_phi,) arrays.
+    """
+    R = np.asarray(R, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+    R1, Z1 = np.roll(R, -1, axis=1), np.roll(Z, -1, axis=1)
+
+    # Shoelace terms; the signed area keeps the centroid right for either orientation
+    cross = R * Z1 - R1 * Z
+    signed_area = 0.5 * cross.sum(axis=1)
+    safe_area = np.where(signed_area != 0, signed_area, np.nan)
+    seg_length = np.hypot(R1 - R, Z1 - Z)
+
+    return {
+        "area": np.abs(signed_area),
+        "signed_area": signed_area,
+        "perimeter": seg_length.sum(axis=1),
+        "R_centroid": ((R + R1) * cross).sum(axis=1) / (6 * safe_area),
+        "Z_centroid": ((Z + Z1) * cross).sum(axis=1) / (6 * safe_area),
+        "R_min": R.min(axis=1),
+        "R_max": R.max(axis=1),
+        "Z_min": Z.min(axis=1),
+        "Z_max": Z.max(axis=1),
+        # First moment of the perimeter about the Z axis (for the wall area)
+        "perimeter_moment": (seg_length * (R + R1) / 2).sum(axis=1),
+    }
+
+
+def _trapezoid(values, phis):
+    """Trapezoidal integral over phi given in degrees."""
+    phi = np.radians(np.asarray(phis, dtype=float))
+    return 0.5 * np.sum((values[1:] + values[:-1]) * np.diff(phi))
+
+
+def toroidal_integrals(phis, metrics):
+    """
+    Volume and wall area between the first and last plane.
+    Returns a dict with volume, wall_area and the phi span in degrees.
+    """
+    phis = np.asarray(phis, dtype=float)
+    return {
+        "volume": _trapezoid(metrics["area"] * metrics["R_centroid"], phis),
+        "wall_area": _trapezoid(metrics["perimeter_moment"], phis),
+        "span": phis[-1] - phis[0] if len(phis) else 0.0,
+    }
+
+
+def dataset_metrics(phis, R, Z):
+    """section_metrics() plus the toroidal integrals and the "phis" array."""
+    metrics = section_metrics(R, Z)
+    return dict(
+        metrics, phis=np.asarray(phis, dtype=float), **toroidal_integrals(phis, metrics)
+    )
+
+
+def results_metrics(results):
+    """dataset_metrics() for a {phi: (R, Z)} dict, e.g. from generate_slices()."""
+    return dataset_metrics(*results_to_arrays(results))
+
+
+def print_metrics(metrics, units="mm"):
+    """Prints the summary of a dataset_metrics() result."""
+    area = metrics["area"]
+    print(f"{len(area)} planes over {metrics['span']:g}°")
+    print(
+        f"  area       {area.min():.6g} - {area.max():.6g} {units}^2 "
+        f"(mean {area.mean():.6g})"
+    )
+    print(
+        f"  perimeter  {metrics['perimeter'].min():.6g} - "
+        f"{metrics['perimeter'].max():.6g} {units}"
+    )
+    print(
+        f"  centroid   R {np.nanmean(metrics['R_centroid']):.6g}, "
+        f"Z {np.nanmean(metrics['Z_centroid']):.6g} {units} (mean)"
+    )
+    print(
+        f"  extents    R {metrics['R_min'].min():.6g} - {metrics['R_max'].max():.6g}, "
+        f"Z {metrics['Z_min'].min():.6g} - {metrics['Z_max'].max():.6g} {units}"
+    )
+    print(f"  volume     {metrics['volume']:.6g} {units}^3")
+    print(f"  wall area  {metrics['wall_area']:.6g} {units}^2")
+    if 0 < metrics["span"] < 360:
+        scale = 360.0 / metrics["span"]
+        print(
+            f"  full turn  volume {metrics['volume'] * scale:.6g} {units}^3, "
+            f"wall area {metrics['wall_area'] * scale:.6g} {units}^2 "
+            f"(x{scale:g}, assuming the span repeats)"
+        )
+
+
+def save_metrics(metrics, filename):
+    """Writes the per-plane metrics to a CSV file."""
+    with open(filename, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Phi_Deg", *PLANE_COLUMNS])
+        columns = np.column_stack([metrics[name] for name in PLANE_COLUMNS])
+        writer.writerows(
+            [phi, *(f"{value:.6f}" for value in row)]
+            for phi, row in zip(metrics["phis"].tolist(), columns.tolist())
+        )
+    print(f"Per-plane metrics saved to {filename}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-section geometry metrics")
+    parser.add_argument("input", help="CSV export or Kisslinger file")
+    parser.add_argument("--save", default=None, help="Write per-plane metrics CSV")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    data = read_dataset(args.input)
+    t1 = time.perf_counter()
+    metrics = dataset_metrics(data["phis"], data["R"], data["Z"])
+    t2 = time.perf_counter()
+
+    print_metrics(metrics, units=data["units"])
+    print(f"Read {t1 - t0:.2f} s, metrics {1000 * (t2 - t1):.1f} ms")
+    if args.save:
+        save_metrics(metrics, args.save)
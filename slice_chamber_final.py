@@ -1,8 +1,21 @@
-import trimesh
 import numpy as np
-from scipy.interpolate import interp1d
-import matplotlib.pyplot as plt
 import csv
+import os
+
+from contour_validity import repair_slice
+from kisslinger_io import results_to_arrays, write_kisslinger
+from mesh_loader import load_mesh
+from stl_reader import BinarySTL, is_binary_stl
+
+# Binary STL files above this size are sliced out-of-core instead of loaded whole
+OUT_OF_CORE_BYTES = 1024**3
+
+# Source angles (degrees) of the symmetry planes the Kisslinger export mirrors about
+SYMMETRY_PLANES = (0.0, 90.0)
+
+# Report the slice-vs-mesh error after exporting (see surface_error.py, which
+# can also be run on its own)
+REPORT_SURFACE_ERROR = False
 
 
 def rotate_mesh_to_q1(mesh):
@@ -28,6 +41,8 @@ def rotate_mesh_to_q1(mesh):
             best_rotation = rot
 
     if best_rotation != 0:
+        import trimesh
+
         print(f"-> Rotating mesh by {best_rotation}° to align with 0-90°...")
         matrix = trimesh.transformations.rotation_matrix(
             np.radians(best_rotation), [0, 0, 1]
@@ -39,39 +54,96 @@ def rotate_mesh_to_q1(mesh):
     return mesh
 
 
-def get_rz_slice(mesh, phi_degrees, num_points=200):
+def get_rz_slice(mesh, phi_degrees, num_points=200, return_faces=False, repair=True):
     """
     Slices mesh, closes the loop, and interpolates R, Z points.
     FIXED: Uses angular sorting instead of greedy nearest-neighbor.
+
+    repair=True re-slices a contour that fails the validity checks with a
+    fallback method (contour_validity.repair_slice).
+
+    return_faces=True also returns the index of the mesh face under every
+    point: (R, Z, face_ids). The faces come from the same section as the
+    points, so R and Z are the same as without it. The fallbacks carry no
+    faces, so these slices are not repaired.
+    """
+    return slice_from_section(
+        mesh,
+        phi_degrees,
+        front_section(mesh, phi_degrees),
+        num_points=num_points,
+        return_faces=return_faces,
+        repair=repair,
+    )
+
+
+def front_section(mesh, phi_degrees):
+    """
+    Steps 1-2 of get_rz_slice(): the (N, 3) points where the phi plane cuts
+    the mesh on the front half-plane and the (N,) faces they lie on (None for
+    section_points() sources), or (None, None). Callers slicing the same
+    angle at several point counts can keep this and use slice_from_section().
     """
     phi_rad = np.radians(phi_degrees)
     normal = np.array([np.sin(phi_rad), -np.cos(phi_rad), 0])
     origin = np.array([0, 0, 0])
 
     # 1. Slice
-    slice_3d = mesh.section(plane_origin=origin, plane_normal=normal)
+    vertices_3d, faces = _section_vertices(mesh, origin, normal)
 
     # Retry with small epsilon if exact slice fails (common at 0 degrees)
-    if slice_3d is None:
+    if vertices_3d is None:
         phi_rad += 1e-5
         normal = np.array([np.sin(phi_rad), -np.cos(phi_rad), 0])
-        slice_3d = mesh.section(plane_origin=origin, plane_normal=normal)
+        vertices_3d, faces = _section_vertices(mesh, origin, normal)
 
-    if slice_3d is None:
-        return None, None
-
-    try:
-        vertices_3d = np.concatenate(slice_3d.discrete)
-    except ValueError:
+    if vertices_3d is None:
         return None, None
 
     # 2. Filter (Keep only the "front" of the infinite plane)
     direction_vector = np.array([np.cos(phi_rad), np.sin(phi_rad), 0])
     dot_products = np.dot(vertices_3d, direction_vector)
-    vertices_3d = vertices_3d[dot_products > 0]  # Masking
+    front = dot_products > 0
+    vertices_3d = vertices_3d[front]  # Masking
 
     if len(vertices_3d) < 2:
         return None, None
+    return vertices_3d, None if faces is None else faces[front]
+
+
+def slice_from_section(
+    mesh, phi_degrees, section, num_points=200, return_faces=False, repair=True
+):
+    """get_rz_slice() for a section from front_section(mesh, phi_degrees)."""
+    vertices_3d, faces = section
+    if vertices_3d is None:
+        return (None, None, None) if return_faces else (None, None)
+
+    if return_faces:
+        if faces is None:
+            raise ValueError(
+                f"Face indices need mesh faces; {type(mesh).__name__} only "
+                "provides section points."
+            )
+        return _contour_from_points(vertices_3d, num_points, faces)
+
+    r_vals, z_vals = _contour_from_points(vertices_3d, num_points)
+    if repair and r_vals is not None:
+        r_vals, z_vals = repair_slice(mesh, phi_degrees, r_vals, z_vals)
+    return r_vals, z_vals
+
+
+def _contour_from_points(vertices_3d, num_points, faces=None):
+    """
+    Orders the (N, 3) section points of one closed contour (steps 3-5 of
+    get_rz_slice) and resamples them to num_points (R, Z) values.
+
+    With the (N,) faces of the points, also returns the face under every
+    resampled point: the face two consecutive contour points share (the
+    section segment between them), or where the angular sort bridges a gap
+    between walls, a face of the point the step starts from.
+    """
+    failed = (None, None) if faces is None else (None, None, None)
 
     # 3. Convert to R, Z
     R_raw = np.sqrt(vertices_3d[:, 0] ** 2 + vertices_3d[:, 1] ** 2)
@@ -79,20 +151,24 @@ def get_rz_slice(mesh, phi_degrees, num_points=200):
     points = np.column_stack((R_raw, Z_raw))
 
     # 4. Sort points to form a path - FIXED VERSION
-    points_sorted = _sort_points_by_angle(points)
+    order = _angle_order(points)
 
     # 4.5 Normalize starting point for toroidal continuity
-    points_sorted = _normalize_starting_point(points_sorted)
+    order = np.roll(order, -_starting_index(points[order]))
+    points_sorted = points[order]
 
-    # Remove duplicates and points that are too close
+    # Remove duplicates and points that are too close (every point on a
+    # shared edge comes once per face); group maps each point to the one kept
     unique_points = [points_sorted[0]]
+    group = np.zeros(len(points_sorted), dtype=np.int64)
     for i in range(1, len(points_sorted)):
         if np.linalg.norm(points_sorted[i] - unique_points[-1]) > 1e-6:
             unique_points.append(points_sorted[i])
+        group[i] = len(unique_points) - 1
     points_sorted = np.array(unique_points)
 
     if len(points_sorted) < 2:
-        return None, None
+        return failed
 
     # --- FIX: FORCE CLOSE THE LOOP ---
     # Append the first point to the end ONLY if it's not already there (or very close)
@@ -106,17 +182,61 @@ def get_rz_slice(mesh, phi_degrees, num_points=200):
     total_dist = cumulative_dist[-1]
 
     if total_dist == 0:
-        return None, None
+        return failed
 
     # Linear interpolation along the path
+    from scipy.interpolate import interp1d
+
     interp_func_R = interp1d(cumulative_dist, points_sorted[:, 0], kind="linear")
     interp_func_Z = interp1d(cumulative_dist, points_sorted[:, 1], kind="linear")
 
     # Generate exactly 'num_points'
     # Note: We use 0 to total_dist inclusive to complete the circle
     target_dists = np.linspace(0, total_dist, num_points, endpoint=False)
+    r_vals, z_vals = interp_func_R(target_dists), interp_func_Z(target_dists)
+    if faces is None:
+        return r_vals, z_vals
+
+    # Face of every step k of the path (point k -> k + 1, the last one back
+    # to 0): a face both ends lie on, else the first face of point k. A last
+    # point that already closes the loop is the same point as point 0.
+    n_path = len(points_sorted) - 1
+    faces = np.asarray(faces, dtype=np.int64)[order]
+    step_face = faces[np.searchsorted(group, np.arange(n_path))]
+    group %= n_path
+    n_faces = faces.max() + 1
+    pair = np.unique(group * n_faces + faces)
+    start, face = pair // n_faces, pair % n_faces
+    shared = np.isin((start + 1) % n_path * n_faces + face, pair)
+    step_face[start[shared]] = face[shared]
+
+    step = np.searchsorted(cumulative_dist, target_dists, side="right") - 1
+    return r_vals, z_vals, step_face[np.minimum(step, n_path - 1)]
+
+
+def _section_vertices(mesh, origin, normal):
+    """
+    Returns the (N, 3) points where the plane cuts the mesh and the (N,)
+    index of the face each one lies on, or (None, None). Both ends of every
+    cut segment are returned, so points on shared edges come once per face.
+    Out-of-core meshes (stl_reader.BinarySTL) provide section_segments() and
+    are sectioned chunk by chunk instead of through trimesh; section_points()
+    alone (sdf_slicer.SDFSlicer) gives no faces.
+    """
+    if hasattr(mesh, "section_segments"):
+        segments, faces = mesh.section_segments(
+            plane_origin=origin, plane_normal=normal
+        )
+    elif hasattr(mesh, "section_points"):
+        return mesh.section_points(plane_origin=origin, plane_normal=normal), None
+    else:
+        from trimesh.intersections import mesh_plane
 
-    return interp_func_R(target_dists), interp_func_Z(target_dists)
+        segments, faces = mesh_plane(mesh, normal, origin, return_faces=True)
+
+    if len(segments) == 0:
+        return None, None
+    return segments.reshape(-1, 3), np.repeat(faces, 2)
 
 
 def _sort_points_by_angle(points):
@@ -127,6 +247,11 @@ def _sort_points_by_angle(points):
     if len(points) == 0:
         return np.array([])
 
+    return points[_angle_order(points)]
+
+
+def _angle_order(points):
+    """Indices sorting (N, 2) points by angle around their centroid."""
     # Calculate centroid
     centroid = np.mean(points, axis=0)
 
@@ -135,23 +260,29 @@ def _sort_points_by_angle(points):
     angles = np.arctan2(points[:, 1] - centroid[1], points[:, 0] - centroid[0])
 
     # Sort by angle
-    sorted_indices = np.argsort(angles)
-
-    return points[sorted_indices]
+    return np.argsort(angles)
 
 
 def _normalize_starting_point(points):
     """
     Roll the points array so that index 0 is at the outboard side (maximum R).
     This ensures toroidal continuity across slices.
+    """
+    if len(points) == 0:
+        return points
+
+    # Roll array so start_idx becomes index 0
+    return np.roll(points, -_starting_index(points), axis=0)
+
+
+def _starting_index(points):
+    """
+    Index of the outboard starting point (maximum R) of sorted points.
 
     We find points near the maximum R value, then pick the one with minimum Z
     as a tie-breaker. This handles cases where the cross-section is symmetric
     and has two points with nearly the same max R (one at +Z, one at -Z).
     """
-    if len(points) == 0:
-        return points
-
     # Find max R and get points within a small tolerance of it
     max_R = points[:, 0].max()
     R_tolerance = 0.01 * max_R  # 1% tolerance
@@ -161,14 +292,10 @@ def _normalize_starting_point(points):
         # Multiple points near max R - use minimum Z as tie-breaker
         candidates = np.where(near_max_R)[0]
         z_values = points[candidates, 1]
-        best_candidate = candidates[np.argmin(z_values)]
-        start_idx = best_candidate
-    else:
-        # Single max R point
-        start_idx = np.argmax(points[:, 0])
+        return candidates[np.argmin(z_values)]
 
-    # Roll array so start_idx becomes index 0
-    return np.roll(points, -start_idx, axis=0)
+    # Single max R point
+    return np.argmax(points[:, 0])
 
 
 def _sort_points_by_proximity(points):
@@ -201,107 +328,155 @@ def save_to_csv(results, filename="chamber_coordinates.csv"):
         # Sort by angle to keep file ordered
         sorted_angles = sorted(results.keys())
         for phi in sorted_angles:
-            r_vals, z_vals = results[phi]
-            for i, (r, z) in enumerate(zip(r_vals, z_vals)):
-                writer.writerow([phi, i, f"{r:.4f}", f"{z:.4f}"])
+            writer.writerows(_csv_rows(phi, *results[phi]))
     print("Save complete.")
 
 
-def save_to_kisslinger(results, filename, target_phis, nfp=1):
+def _csv_rows(phi, r_vals, z_vals):
+    """The save_to_csv() rows of one slice."""
+    return (
+        [phi, i, f"{r:.4f}", f"{z:.4f}"] for i, (r, z) in enumerate(zip(r_vals, z_vals))
+    )
+
+
+def save_to_kisslinger(results, filename, target_phis, nfp=1, interpolation="cubic"):
     """
     Saves the results to a Kisslinger file, applying symmetry and unit conversion.
     Reproduces logic from convert_fixed_chamber.py but adapted for this script's results.
+
+    interpolation="cubic" fits one spline along phi through the whole
+    (n_phi, n_points) block (with zero R slope and zero Z curvature at the
+    0° and 90° symmetry planes) and evaluates it at every target angle at
+    once; "linear" blends the two nearest source slices as before.
     """
     print(f"Generating Kisslinger data and saving to {filename}...")
 
     # Unique source phis from results
-    source_phis = sorted(results.keys())
-    if not source_phis:
+    if not results:
         print("Error: No data in results to save.")
         return
+    target_phis = np.asarray(target_phis, dtype=float)
+    R_all, Z_all = kisslinger_arrays(results, target_phis, interpolation)
 
-    # Use the number of points from the first slice
-    n_points = len(results[source_phis[0]][0])
-    n_tor = len(target_phis)
-
-    # Resulting arrays
-    R_all = []
-    Z_all = []
-
-    for t_phi in target_phis:
-        # Periodic 180 (half device)
-        phi_wrapped = t_phi % 180.0
-
-        if phi_wrapped <= 90.0:
-            # First quadrant: 0 -> 90 maps to 90 -> 0 in source?
-            # Wait, convert_fixed_chamber.py has:
-            # if phi_wrapped <= 90.0: s_phi_val = 90.0 - phi_wrapped; mirror_z_val = phi_wrapped < 90.0
-            # Let's check:
-            # t_phi=0 -> s_phi=90, mirror=True
-            # t_phi=90 -> s_phi=0, mirror=False
-            # This seems to be a specific mapping for that project.
-            # I will follow it exactly to match user's previous script.
-            s_phi_val = 90.0 - phi_wrapped
-            mirror_z_val = phi_wrapped < 90.0
-        else:
-            # Second quadrant: 90 -> 180 maps to 0 -> 90 in source?
-            # s_phi_val = phi_wrapped - 90.0; mirror_z_val = False
-            # t_phi=91 -> s_phi=1, mirror=False
-            # t_phi=180 -> s_phi=90, mirror=False
-            s_phi_val = phi_wrapped - 90.0
-            mirror_z_val = False
-
-        # Interpolate between nearest source_phis
-        if s_phi_val <= source_phis[0]:
-            r_int = results[source_phis[0]][0]
-            z_int = results[source_phis[0]][1]
-        elif s_phi_val >= source_phis[-1]:
-            r_int = results[source_phis[-1]][0]
-            z_int = results[source_phis[-1]][1]
-        else:
-            # Find neighbors
-            idx = np.searchsorted(source_phis, s_phi_val) - 1
-            p1 = source_phis[idx]
-            p2 = source_phis[idx + 1]
-            f = (s_phi_val - p1) / (p2 - p1)
+    write_kisslinger(filename, target_phis, R_all, Z_all, nfp=nfp)
+
+    print(f"Done. nphi={len(target_phis)}, npoints={R_all.shape[1]}")
+
+
+def kisslinger_arrays(results, target_phis, interpolation="cubic"):
+    """
+    The (R, Z) arrays in cm that save_to_kisslinger() writes for target_phis.
+    """
+    source_phis, R_src, Z_src = results_to_arrays(results)
+    s_phi, mirror_z = kisslinger_source_angles(target_phis)
+
+    # Hold the end slices outside the source range
+    s_phi = np.clip(s_phi, source_phis[0], source_phis[-1])
+
+    if interpolation == "cubic" and len(source_phis) >= 4:
+        spline_R, spline_Z = _symmetric_splines(source_phis, R_src, Z_src)
+        R_int, Z_int = spline_R(s_phi), spline_Z(s_phi)
+    elif len(source_phis) >= 2:
+        # Linear blend of the two neighbouring source slices
+        idx = np.clip(np.searchsorted(source_phis, s_phi) - 1, 0, len(source_phis) - 2)
+        f = ((s_phi - source_phis[idx]) / (source_phis[idx + 1] - source_phis[idx]))[
+            :, None
+        ]
+        R_int = (1 - f) * R_src[idx] + f * R_src[idx + 1]
+        Z_int = (1 - f) * Z_src[idx] + f * Z_src[idx + 1]
+    else:
+        R_int = np.repeat(R_src, len(s_phi), axis=0)
+        Z_int = np.repeat(Z_src, len(s_phi), axis=0)
+
+    # Convert mm to cm
+    R_all = R_int / 10.0
+    Z_all = np.where(mirror_z[:, None], -Z_int, Z_int) / 10.0
+    return R_all, Z_all
 
-            r_int = (1 - f) * results[p1][0] + f * results[p2][0]
-            z_int = (1 - f) * results[p1][1] + f * results[p2][1]
 
-        # Convert mm to cm
-        r_cm = r_int / 10.0
-        z_cm = z_int / 10.0
+def kisslinger_source_angles(target_phis):
+    """
+    (source angle, Z mirrored) of every Kisslinger target angle.
+
+    Maps every target angle onto the source range (periodic 180, half device):
+    t_phi=0 -> s_phi=90 mirrored, t_phi=90 -> s_phi=0, t_phi=180 -> s_phi=90.
+    This follows convert_fixed_chamber.py exactly to match previous outputs.
+    """
+    target_phis = np.asarray(target_phis, dtype=float)
+    phi_wrapped = target_phis % 180.0
+    first_quadrant = phi_wrapped <= 90.0
+    s_phi = np.where(first_quadrant, 90.0 - phi_wrapped, phi_wrapped - 90.0)
+    return s_phi, first_quadrant & (phi_wrapped < 90.0)
 
-        if mirror_z_val:
-            z_cm = -z_cm
 
-        R_all.append(r_cm)
-        Z_all.append(z_cm)
+def _symmetric_splines(source_phis, R_src, Z_src):
+    """
+    Cubic splines along phi for R and Z, with the end conditions of the
+    mirrored device at source ends lying on a symmetry plane: the mapping
+    above reflects the source there and mirrors Z, so R is even (zero slope)
+    and Z odd (zero curvature) about the plane, as for a spline
+    through the mirrored extension. Other ends use not-a-knot.
+    """
+    from scipy.interpolate import CubicSpline
 
-    # Write Kisslinger file
-    with open(filename, "w") as f:
-        f.write("transformed_vessel_fixed\n")
-        f.write(f"{n_tor} {n_points} {nfp} 0.0 0.0\n")
+    on_plane = [
+        np.isclose(phi, SYMMETRY_PLANES, rtol=0, atol=1e-6).any()
+        for phi in (source_phis[0], source_phis[-1])
+    ]
 
-        for k, phi in enumerate(target_phis):
-            f.write(f"{phi:.4f}\n")
-            for i in range(n_points):
-                f.write(f"        {R_all[k][i]:.8f} {Z_all[k][i]:.8f}\n")
+    def ends(order, shape):
+        return tuple(
+            (order, np.zeros(shape)) if on else "not-a-knot" for on in on_plane
+        )
 
-    print(f"Done. nphi={n_tor}, npoints={n_points}")
+    return (
+        CubicSpline(source_phis, R_src, axis=0, bc_type=ends(1, R_src.shape[1:])),
+        CubicSpline(source_phis, Z_src, axis=0, bc_type=ends(2, Z_src.shape[1:])),
+    )
 
 
-def generate_slices(mesh, start_angle=0, end_angle=90, step=0.5, num_points=500):
+def _toroidal_spline(source_phis, values, period=360.0):
+    """
+    Cubic spline along phi (axis 0) through a block of slice values.
+    Uses periodic end conditions when the first and last slices are one full
+    period apart and identical, otherwise not-a-knot.
+    """
+    from scipy.interpolate import CubicSpline
+
+    periodic = np.isclose(source_phis[-1] - source_phis[0], period) and np.allclose(
+        values[0], values[-1]
+    )
+    return CubicSpline(
+        source_phis, values, axis=0, bc_type="periodic" if periodic else "not-a-knot"
+    )
+
+
+def generate_slices(
+    mesh,
+    start_angle=0,
+    end_angle=90,
+    step=0.5,
+    num_points=500,
+    progress=None,
+    return_faces=False,
+):
     """
     Generates R, Z slices for the given mesh over a range of angles.
+    progress, if given, is called as progress(done, total) after each angle.
+    return_faces=True stores (R, Z, face_ids) per angle (see get_rz_slice).
     """
     print(f"Scanning {start_angle}° to {end_angle}°...")
     results = {}
     # Use np.arange but include the end_angle by adding a small buffer to the stop value
-    for phi in np.arange(start_angle, end_angle + step / 2, step):
-        r_vals, z_vals = get_rz_slice(mesh, phi, num_points=num_points)
-        if r_vals is not None:
-            results[phi] = (r_vals, z_vals)
+    angles = np.arange(start_angle, end_angle + step / 2, step)
+    for i, phi in enumerate(angles):
+        section = get_rz_slice(
+            mesh, phi, num_points=num_points, return_faces=return_faces
+        )
+        if section[0] is not None:
+            results[phi] = section
+        if progress is not None:
+            progress(i + 1, len(angles))
 
     print(f"Generated slices for {len(results)} angles.")
     return results
@@ -312,6 +487,7 @@ def smooth_toroidal_continuity(results):
     Post-process the results to ensure smooth toroidal continuity.
     Uses propagation: for each slice, find the point closest to the previous
     slice's point 0 and roll the array to make that the new starting point.
+    Extra per-point arrays after (R, Z), such as face IDs, are rolled along.
     """
     print("Smoothing toroidal continuity...")
 
@@ -328,28 +504,39 @@ def smooth_toroidal_continuity(results):
 
     # Process subsequent angles
     for phi in sorted_angles[1:]:
-        r_vals, z_vals = results[phi]
+        r_vals, z_vals, *extra = results[phi]
+        smoothed[phi] = _align_to_previous(r_vals, z_vals, prev_R0, prev_Z0, *extra)
+        prev_R0, prev_Z0 = smoothed[phi][0][0], smoothed[phi][1][0]
+
+    print("Smoothing complete.")
+    return smoothed
 
-        # Find the point closest to previous slice's point 0
-        dists = np.sqrt((r_vals - prev_R0) ** 2 + (z_vals - prev_Z0) ** 2)
-        closest_idx = np.argmin(dists)
 
-        # Roll the arrays so closest_idx becomes index 0
-        if closest_idx != 0:
-            r_vals = np.roll(r_vals, -closest_idx)
-            z_vals = np.roll(z_vals, -closest_idx)
+def _align_to_previous(r_vals, z_vals, prev_R0, prev_Z0, *extra):
+    """
+    Rolls one slice so that its point closest to the previous slice's point 0
+    becomes index 0. Extra per-point arrays (e.g. face IDs) are rolled along
+    and returned after r_vals and z_vals.
+    """
+    # Find the point closest to previous slice's point 0
+    dists = np.sqrt((r_vals - prev_R0) ** 2 + (z_vals - prev_Z0) ** 2)
+    closest_idx = np.argmin(dists)
 
-        smoothed[phi] = (r_vals, z_vals)
-        prev_R0, prev_Z0 = r_vals[0], z_vals[0]
+    # Roll the arrays so closest_idx becomes index 0
+    if closest_idx != 0:
+        r_vals = np.roll(r_vals, -closest_idx)
+        z_vals = np.roll(z_vals, -closest_idx)
+        extra = tuple(np.roll(values, -closest_idx) for values in extra)
 
-    print("Smoothing complete.")
-    return smoothed
+    return (r_vals, z_vals, *extra)
 
 
 def plot_cross_sections(results):
     """
     Plots the cross-sections for a selected set of angles.
     """
+    import matplotlib.pyplot as plt
+
     plot_angles = [0, 15, 30, 45, 60, 75, 90]
     plt.figure(figsize=(8, 10))
 
@@ -386,11 +573,15 @@ if __name__ == "__main__":
     filename = "chamber_surface.stl"
 
     try:
-        # Load and Rotate
-        mesh = trimesh.load(filename, process=False)
+        # Load and Rotate (very large binary STLs are memory-mapped and sliced in chunks)
+        if os.path.getsize(filename) > OUT_OF_CORE_BYTES and is_binary_stl(filename):
+            mesh = BinarySTL(filename)
+        else:
+            mesh = load_mesh(filename)
         mesh = rotate_mesh_to_q1(mesh)
 
-        # Generate Slices (0.25° step for higher resolution)
+        # Generate Slices (0.25° step for higher resolution); invalid
+        # contours are re-sliced with a fallback method as they are made
         results = generate_slices(mesh, 0, 90, 0.25, 500)
 
         # Smooth toroidal continuity by propagating starting points
@@ -405,6 +596,12 @@ if __name__ == "__main__":
         )  # Use 2.0 to match the 181 planes in vessel_fixed.kisslinger
         save_to_kisslinger(results, "vessel_fixed.kisslinger", target_phis, nfp=1)
 
+        # Check the exported slices against the source surface (in-memory meshes only)
+        if REPORT_SURFACE_ERROR and not isinstance(mesh, BinarySTL):
+            from surface_error import print_surface_error, surface_error
+
+            print_surface_error(surface_error(mesh, results))
+
         # Plot Verification (commented for headless execution)
         # plot_cross_sections(results)
 
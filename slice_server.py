@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Local HTTP slicing service with a job queue and a result cache.
+
+A shared machine runs the slicing once per CAD revision and serves the
+results to everyone else. Only the standard library is used on top of the
+slicing code, so the server works fully offline.
+
+Jobs are keyed by the SHA-256 of the mesh file contents plus the slicing
+parameters, so identical requests, whether uploaded or given as a path on the
+server, map to the same job. Jobs run on a pool of worker threads. Finished
+results are kept in the cache directory under the job key and are found again
+after a restart.
+
+Server-side paths are only accepted when the server is started with
+--data-root, and must resolve (symlinks included) inside that directory.
+Otherwise meshes can only be uploaded.
+
+Endpoints:
+    POST /jobs                     JSON {"path": ..., "step": ..., ...} (path
+                                   relative to --data-root), or
+                                   the raw mesh file with ?filename=x.stl&step=...
+    GET  /jobs                     status of every known job
+    GET  /jobs/<id>                status of one job
+    GET  /jobs/<id>/events         progress as a text/event-stream
+    GET  /jobs/<id>/csv            save_to_csv() output
+    GET  /jobs/<id>/kisslinger     save_to_kisslinger() output
+    GET  /jobs/<id>/binary         float64 [phi, R..., Z...] records (stream_slices.py)
+
+Usage:
+    python3 slice_server.py --cache slice_cache --workers 2
+    curl --data-binary @chamber_surface.stl "http://localhost:8765/jobs?filename=chamber_surface.stl&step=0.25"
+    curl -N http://localhost:8765/jobs/<id>/events
+    curl -o vessel.kisslinger http://localhost:8765/jobs/<id>/kisslinger
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+SERVER_PORT = 8765
+
+# Accepted slicing parameters and their defaults
+SLICE_DEFAULTS = {"start": 0.0, "end": 90.0, "step": 0.5, "points": 500}
+
+# Cached result files per job
+RESULT_FILES = {
+    "csv": "slices.csv",
+    "kisslinger": "slices.kisslinger",
+    "binary": "slices.f64",
+}
+RESULT_TYPES = {
+    "csv": "text/csv",
+    "kisslinger": "text/plain",
+    "binary": "application/octet-stream",
+}
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_TIMEOUT = 15.0
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def slice_params(values):
+    """
+    Validates a mapping of request parameters against SLICE_DEFAULTS and
+    returns the full parameter dict. Raises ValueError on bad input.
+    """
+    unknown = set(values) - set(SLICE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+
+    params = {}
+    for name, default in SLICE_DEFAULTS.items():
+        try:
+            value = float(values.get(name, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number.")
+        if not np.isfinite(value):
+            raise ValueError(f"{name} must be finite.")
+        if isinstance(default, int):
+            if not value.is_integer():
+                raise ValueError(f"{name} must be an integer.")
+            value = int(value)
+        params[name] = value
+    if params["step"] <= 0 or params["points"] < 3:
+        raise ValueError("step must be positive and points at least 3.")
+    if params["end"] < params["start"]:
+        raise ValueError("end must not be below start.")
+    return params
+
+
+class SliceJob:
+    """State of one slicing job; waiters are woken on every update."""
+
+    def __init__(self, key, mesh_file, params, directory):
+        self.key = key
+        self.id = key[:16]
+        self.mesh_file = mesh_file
+        self.params = params
+        self.directory = directory
+        self.state = "queued"
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def update(self, **fields):
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.changed.notify_all()
+
+    def snapshot(self):
+        with self.changed:
+            return self.version, self.status()
+
+    def wait(self, version, timeout=None):
+        """Blocks until the job changes past version; returns the status."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version, self.status()
+
+    def status(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+            "params": self.params,
+            "results": sorted(RESULT_FILES) if self.state == "done" else [],
+        }
+
+
+class SliceService:
+    """Job registry, worker pool and on-disk cache behind the HTTP handler."""
+
+    def __init__(self, cache_dir, workers=1, data_root=None):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.data_root = os.path.realpath(data_root) if data_root else None
+        self.upload_dir = os.path.join(self.cache_dir, "uploads")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+        # Finished jobs from earlier runs are served straight from the cache;
+        # results of jobs interrupted while being written are dropped
+        for key in os.listdir(self.cache_dir):
+            if key.endswith(".partial"):
+                shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+                continue
+            record = os.path.join(self.cache_dir, key, "job.json")
+            if os.path.isfile(record):
+                with open(record) as f:
+                    info = json.load(f)
+                job = SliceJob(
+                    key, info["mesh_file"], info["params"], os.path.dirname(record)
+                )
+                job.update(state="done", done=info["slices"], total=info["slices"])
+                self.jobs[job.id] = job
+        print(f"Slice cache {self.cache_dir}: {len(self.jobs)} finished jobs.")
+
+    def resolve_path(self, path):
+        """
+        The real path of a server-side mesh file given relative to the data
+        root. Raises ValueError if paths are disabled or it leaves the root.
+        """
+        if self.data_root is None:
+            raise ValueError(
+                "Server-side paths are disabled; upload the mesh file instead."
+            )
+        real = os.path.realpath(os.path.join(self.data_root, path))
+        if os.path.commonpath([self.data_root, real]) != self.data_root:
+            raise ValueError(f"{path} is outside the data root.")
+        return real
+
+    def store_upload(self, stream, length, filename):
+        """
+        Copies an uploaded mesh into the cache, named by its content hash
+        (the extension is kept for load_mesh()). Returns the stored path.
+        """
+        suffix = os.path.splitext(filename)[1].lower()
+        if not suffix:
+            raise ValueError("The upload needs a filename with an extension.")
+
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=self.upload_dir, delete=False) as f:
+            remaining = length
+            while remaining > 0:
+                chunk = stream.read(min(1 << 20, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                remaining -= len(chunk)
+        if remaining > 0:
+            os.remove(f.name)
+            raise ValueError("The upload ended early.")
+
+        path = os.path.join(self.upload_dir, digest.hexdigest() + suffix)
+        os.replace(f.name, path)
+        return path
+
+    def submit(self, mesh_file, params):
+        """
+        Returns (job, cached) for the mesh file and parameters, queueing a
+        new job unless an identical one is already known.
+        """
+        if not os.path.isfile(mesh_file):
+            raise ValueError(f"No such file: {mesh_file}")
+        key = hashlib.sha256(
+            (file_digest(mesh_file) + json.dumps(params, sort_keys=True)).encode()
+        ).hexdigest()
+
+        with self.lock:
+            job = self.jobs.get(key[:16])
+            if job is not None and job.state != "failed":
+                return job, True
+            job = SliceJob(key, mesh_file, params, os.path.join(self.cache_dir, key))
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        return job, False
+
+    def _run(self, job):
+        """Worker: slices the mesh and writes every result format."""
+        from mesh_loader import load_mesh
+        from slice_chamber_final import (
+            generate_slices,
+            rotate_mesh_to_q1,
+            save_to_csv,
+            save_to_kisslinger,
+            smooth_toroidal_continuity,
+        )
+        from stream_slices import BinarySliceWriter
+
+        job.update(state="running")
+        partial = job.directory + ".partial"
+        try:
+            p = job.params
+            mesh = rotate_mesh_to_q1(load_mesh(job.mesh_file))
+            results = generate_slices(
+                mesh,
+                p["start"],
+                p["end"],
+                p["step"],
+                p["points"],
+                progress=lambda done, total: job.update(done=done, total=total),
+            )
+            if not results:
+                raise ValueError("The mesh produced no slices.")
+            results = smooth_toroidal_continuity(results)
+
+            # Results appear under the job key only once they are complete
+            shutil.rmtree(partial, ignore_errors=True)
+            os.makedirs(partial)
+            save_to_csv(results, os.path.join(partial, RESULT_FILES["csv"]))
+            save_to_kisslinger(
+                results,
+                os.path.join(partial, RESULT_FILES["kisslinger"]),
+                np.arange(0, 361, 2.0),
+                nfp=1,
+            )
+            writer = BinarySliceWriter(os.path.join(partial, RESULT_FILES["binary"]))
+            try:
+                for phi in sorted(results):
+                    writer.write(phi, *results[phi])
+            finally:
+                writer.close()
+            with open(os.path.join(partial, "job.json"), "w") as f:
+                json.dump(
+                    {
+                        "mesh_file": job.mesh_file,
+                        "params": job.params,
+                        "slices": len(results),
+                    },
+                    f,
+                )
+            shutil.rmtree(job.directory, ignore_errors=True)
+            os.replace(partial, job.directory)
+            job.update(state="done")
+        except Exception as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            print(f"Job {job.id} failed: {e}")
+            job.update(state="failed", error=str(e))
+
+
+class SliceRequestHandler(BaseHTTPRequestHandler):
+    """Routes the endpoints listed in the module docstring."""
+
+    def _send_json(self, payload, code=200):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, code, message):
+        self._send_json({"error": message}, code)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            return self._send_error(404, "Not found.")
+
+        service = self.server.service
+        try:
+            length = self.headers.get("Content-Length", "0")
+            if not (length.isascii() and length.isdigit()):
+                raise ValueError("Content-Length must be a non-negative integer.")
+            length = int(length)
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("JSON requests must be an object.")
+                path = request.pop("path", None)
+                if not isinstance(path, str):
+                    raise ValueError('JSON requests need a "path" on the server.')
+                params = slice_params(request)
+                mesh_file = service.resolve_path(path)
+            else:
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                filename = query.pop("filename", "")
+                params = slice_params(query)
+                mesh_file = service.store_upload(self.rfile, length, filename)
+            job, cached = service.submit(mesh_file, params)
+        except ValueError as e:
+            return self._send_error(400, str(e))
+
+        self._send_json(dict(job.status(), cached=cached), 200 if cached else 202)
+
+    def do_GET(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        service = self.server.service
+        if parts == ["jobs"]:
+            # submit() adds jobs from other request threads
+            with service.lock:
+                jobs = list(service.jobs.values())
+            return self._send_json([job.status() for job in jobs])
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            return self._send_error(404, "Not found.")
+
+        with service.lock:
+            job = service.jobs.get(parts[1])
+        if job is None:
+            return self._send_error(404, f"Unknown job {parts[1]}.")
+        if len(parts) == 2:
+            return self._send_json(job.status())
+        if parts[2] == "events":
+            return self._stream_events(job)
+        if parts[2] not in RESULT_FILES:
+            return self._send_error(404, f"Unknown result type {parts[2]}.")
+        if job.state != "done":
+            return self._send_error(409, f"Job {job.id} is {job.state}.")
+        self._send_file(
+            os.path.join(job.directory, RESULT_FILES[parts[2]]),
+            RESULT_TYPES[parts[2]],
+        )
+
+    def _send_event(self, status):
+        self.wfile.write(f"data: {json.dumps(status)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send_file(self, path, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header(
+            "Content-Disposition", f'attachment; filename="{os.path.basename(path)}"'
+        )
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def _stream_events(self, job):
+        """Sends the job status on every change until it finishes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        version, status = job.snapshot()
+        try:
+            self._send_event(status)
+            while status["state"] not in ("done", "failed"):
+                new_version, status = job.wait(version, timeout=EVENT_TIMEOUT)
+                if new_version == version:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                version = new_version
+                self._send_event(status)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class SliceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, SliceRequestHandler)
+        self.service = service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local slicing service")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Use 0.0.0.0 to share on the LAN"
+    )
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--cache", default="slice_cache")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--data-root",
+        default=None,
+        help='Directory JSON requests may name mesh files in ("path"); '
+        "without it only uploads are accepted",
+    )
+    args = parser.parse_args()
+
+    server = SliceServer(
+        (args.host, args.port),
+        SliceService(args.cache, args.workers, data_root=args.data_root),
+    )
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+"""
+Out-of-core reader for binary STL files.
+
+Full-device STL exports can be several GB, which is more than trimesh.load()
+can hold as Python objects on the analysis nodes. BinarySTL maps the file with
+np.memmap as a structured array and walks it in chunks, so slicing only keeps
+one chunk of triangles (plus the section points) resident at a time.
+
+BinarySTL implements the small part of the trimesh interface used by
+slice_chamber_final.py (centroid, apply_transform, section_segments), so it
+can be passed to rotate_mesh_to_q1() and generate_slices() in place of a mesh.
+section_segments() returns the face of every segment like trimesh's
+mesh_plane(), and face_normals_at() reads back the normals wall_normals.py
+needs. section_points() gives the merged section points alone.
+"""
+
+import os
+
+import numpy as np
+
+# 80 byte header + uint32 triangle count, then one 50 byte record per triangle
+STL_HEADER_BYTES = 84
+STL_DTYPE = np.dtype(
+    [
+        ("normal", "<f4", (3,)),
+        ("vertices", "<f4", (3, 3)),
+        ("attribute", "<u2"),
+    ]
+)
+
+
+def is_binary_stl(filename):
+    """
+    Returns True if the file size matches the triangle count in a binary STL header.
+    ASCII STL files (which start with 'solid') fail this check.
+    """
+    size = os.path.getsize(filename)
+    if size < STL_HEADER_BYTES:
+        return False
+    with open(filename, "rb") as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return size == STL_HEADER_BYTES + count * STL_DTYPE.itemsize
+
+
+class BinarySTL:
+    """
+    Memory-mapped binary STL with lazily built vertex and face views.
+    Transforms are recorded and applied per chunk, the file is never modified.
+    """
+
+    def __init__(self, filename, chunk_size=1_000_000):
+        if not is_binary_stl(filename):
+            raise ValueError(f"{filename} is not a valid binary STL file.")
+
+        count = (os.path.getsize(filename) - STL_HEADER_BYTES) // STL_DTYPE.itemsize
+        self.filename = filename
+        self.chunk_size = int(chunk_size)
+        self.data = np.memmap(
+            filename, dtype=STL_DTYPE, mode="r", offset=STL_HEADER_BYTES, shape=(count,)
+        )
+        self.transform = np.eye(4)
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def apply_transform(self, matrix):
+        """Composes a 4x4 homogeneous transform, applied to every chunk on read."""
+        self.transform = np.dot(matrix, self.transform)
+        self._cache.clear()
+        return self
+
+    def iter_triangles(self, chunk_size=None):
+        """
+        Yields (start_index, triangles) with triangles as a (k, 3, 3) float64 array
+        in the transformed frame. Only one chunk is resident at a time.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        rotation = self.transform[:3, :3]
+        translation = self.transform[:3, 3]
+        for start in range(0, len(self.data), chunk_size):
+            tri = np.asarray(self.data["vertices"][start : start + chunk_size], float)
+            yield start, np.dot(tri, rotation.T) + translation
+
+    @property
+    def triangles(self):
+        """All transformed triangles as (n, 3, 3). Materializes the whole file."""
+        if "triangles" not in self._cache:
+            self._cache["triangles"] = np.concatenate(
+                [tri for _, tri in self.iter_triangles()]
+            )
+        return self._cache["triangles"]
+
+    @property
+    def vertices(self):
+        """Unmerged (3n, 3) vertex array, built on first access."""
+        return self.triangles.reshape(-1, 3)
+
+    @property
+    def faces(self):
+        """(n, 3) face indices into the unmerged vertex array, built on first access."""
+        if "faces" not in self._cache:
+            self._cache["faces"] = np.arange(3 * len(self.data)).reshape(-1, 3)
+        return self._cache["faces"]
+
+    @property
+    def centroid(self):
+        """Area-weighted surface centroid, matching trimesh.Trimesh.centroid."""
+        if "centroid" not in self._cache:
+            weighted = np.zeros(3)
+            total_area = 0.0
+            for _, tri in self.iter_triangles():
+                area = 0.5 * np.linalg.norm(
+                    np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1
+                )
+                weighted += np.dot(area, tri.mean(axis=1))
+                total_area += area.sum()
+            self._cache["centroid"] = weighted / total_area
+        return self._cache["centroid"]
+
+    @property
+    def chunk_bounds(self):
+        """Per-chunk (min, max) corners, used to skip chunks a plane cannot cut."""
+        if "chunk_bounds" not in self._cache:
+            bounds = [
+                (tri.reshape(-1, 3).min(axis=0), tri.reshape(-1, 3).max(axis=0))
+                for _, tri in self.iter_triangles()
+            ]
+            self._cache["chunk_bounds"] = bounds
+        return self._cache["chunk_bounds"]
+
+    def _crossing_triangles(self, plane_origin, plane_normal):
+        """
+        Yields (face indices, triangles, signed vertex distances) of the
+        triangles touching a plane, chunk by chunk.
+        """
+        plane_origin = np.asarray(plane_origin, float)
+        plane_normal = np.asarray(plane_normal, float)
+        bounds = self.chunk_bounds
+
+        for chunk_idx, (start, tri) in enumerate(self.iter_triangles()):
+            # Skip chunks whose bounding box lies entirely on one side of the plane
+            lo, hi = bounds[chunk_idx]
+            corners = np.array(np.meshgrid(*zip(lo, hi))).T.reshape(-1, 3)
+            corner_dist = np.dot(corners - plane_origin, plane_normal)
+            if corner_dist.min() > 0 or corner_dist.max() < 0:
+                continue
+
+            dist = np.dot(tri - plane_origin, plane_normal)
+            crossing = np.flatnonzero((dist.min(axis=1) <= 0) & (dist.max(axis=1) >= 0))
+            if len(crossing):
+                yield start + crossing, tri[crossing], dist[crossing]
+
+    def section_points(self, plane_origin, plane_normal):
+        """
+        Intersects every triangle with a plane, chunk by chunk.
+        Returns the (N, 3) intersection points, or None if the plane misses the mesh.
+        """
+        points = []
+        for _, tri, dist in self._crossing_triangles(plane_origin, plane_normal):
+            # Vertices lying exactly on the plane
+            points.append(tri[dist == 0])
+
+            # Edges with a strict sign change
+            for a, b in ((0, 1), (1, 2), (2, 0)):
+                da, db = dist[:, a], dist[:, b]
+                cut = da * db < 0
+                if cut.any():
+                    t = (da[cut] / (da[cut] - db[cut]))[:, None]
+                    points.append(tri[cut, a] + t * (tri[cut, b] - tri[cut, a]))
+
+        if not points:
+            return None
+        points = np.concatenate(points)
+        if len(points) == 0:
+            return None
+
+        # Each edge crossing is found once per adjacent triangle; merge the copies
+        # so they don't bias the centroid used for angular sorting
+        _, keep = np.unique(np.round(points, 6), axis=0, return_index=True)
+        return points[np.sort(keep)]
+
+    def section_segments(self, plane_origin, plane_normal):
+        """
+        The (M, 2, 3) segments where a plane cuts the triangles and the (M,)
+        index of the triangle each one lies on, like trimesh's mesh_plane().
+        Triangles lying in the plane or only touching it are skipped.
+        """
+        segments, faces = [np.empty((0, 2, 3))], [np.empty(0, dtype=np.int64)]
+        for index, tri, dist in self._crossing_triangles(plane_origin, plane_normal):
+            # Up to six candidate points per triangle: three edge crossings,
+            # then the vertices on the plane
+            candidates = np.empty((len(tri), 6, 3))
+            valid = np.empty((len(tri), 6), dtype=bool)
+            for e, (a, b) in enumerate(((0, 1), (1, 2), (2, 0))):
+                da, db = dist[:, a], dist[:, b]
+                valid[:, e] = da * db < 0
+                t = np.where(valid[:, e], da / np.where(valid[:, e], da - db, 1), 0)
+                candidates[:, e] = tri[:, a] + t[:, None] * (tri[:, b] - tri[:, a])
+            candidates[:, 3:] = tri
+            valid[:, 3:] = dist == 0
+
+            cut = valid.sum(axis=1) == 2
+            first_two = np.argsort(~valid[cut], axis=1, kind="stable")[:, :2]
+            segments.append(
+                np.take_along_axis(candidates[cut], first_two[..., None], 1)
+            )
+            faces.append(index[cut])
+        return np.concatenate(segments), np.concatenate(faces)
+
+    def face_normals_at(self, face_ids):
+        """
+        Unit normals (from the winding, like trimesh's face_normals) of the
+        triangles under an array of face IDs (any shape). Only those
+        triangles are read.
+        """
+        face_ids = np.asarray(face_ids)
+        unique, inverse = np.unique(face_ids, return_inverse=True)
+        tri = np.asarray(self.data["vertices"][unique], float)
+        tri = np.dot(tri, self.transform[:3, :3].T)
+        normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-300)[:, None]
+        return normals[inverse].reshape(*face_ids.shape, 3)
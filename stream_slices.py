@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Streaming slicing pipeline with bounded memory.
+
+    section (worker threads) -> smooth -> CSV writer thread
+                                       -> binary writer thread
+
+Slices are produced in phi order by a pool of sectioning threads, with at
+most `window` slices in flight. Toroidal smoothing only needs the previous
+slice, so it runs on the stream, and every smoothed slice is handed through
+bounded queues to writer threads that append it to the CSV and to a raw
+binary file. Peak memory is a few windows of slices instead of several full
+copies of the dataset, and rows appear on disk as soon as they are ready.
+
+The Kisslinger file maps every target angle onto arbitrary source angles, so
+it is written last, from a memory-mapped view of the binary file.
+
+Binary layout: one float64 record per slice, [phi, R_0..R_n-1, Z_0..Z_n-1].
+
+Usage:
+    python3 stream_slices.py chamber_surface.stl --step 0.25 --points 500
+"""
+
+import argparse
+import csv
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from kisslinger_io import arrays_to_results
+from slice_chamber_final import (
+    _align_to_previous,
+    _csv_rows,
+    get_rz_slice,
+    save_to_kisslinger,
+)
+
+# Slices in flight between pipeline stages
+STREAM_WINDOW = 8
+
+
+def iter_slices(mesh, angles, num_points=500, workers=None, window=STREAM_WINDOW):
+    """
+    Yields (phi, R, Z) in angle order, sectioning up to `window` angles ahead
+    on `workers` threads. Angles without a section are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    _warm_mesh_caches(mesh)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        angles = iter(angles)
+        for phi in angles:
+            pending.append(
+                (phi, executor.submit(get_rz_slice, mesh, phi, num_points=num_points))
+            )
+            if len(pending) >= window:
+                break
+
+        while pending:
+            phi, future = pending.popleft()
+            r_vals, z_vals = future.result()
+            next_phi = next(angles, None)
+            if next_phi is not None:
+                pending.append(
+                    (
+                        next_phi,
+                        executor.submit(
+                            get_rz_slice, mesh, next_phi, num_points=num_points
+                        ),
+                    )
+                )
+            if r_vals is not None:
+                yield phi, r_vals, z_vals
+
+
+def _warm_mesh_caches(mesh):
+    """
+    Builds the lazy trimesh data the section threads read (the data hash
+    and the triangle and edge arrays), so the workers never race to fill the
+    same cache entry. Out-of-core meshes keep no such caches.
+    """
+    if hasattr(mesh, "section_points"):
+        return
+    mesh.triangles
+    mesh.edges_sorted
+
+
+def iter_smoothed(slices):
+    """
+    Streaming smooth_toroidal_continuity(): the first slice passes through,
+    every later one is rolled to start closest to the previous point 0.
+    """
+    prev = None
+    for phi, r_vals, z_vals in slices:
+        if prev is not None:
+            r_vals, z_vals = _align_to_previous(r_vals, z_vals, *prev)
+        prev = (r_vals[0], z_vals[0])
+        yield phi, r_vals, z_vals
+
+
+class CSVSliceWriter:
+    """Appends slices to a CSV in the save_to_csv() format."""
+
+    def __init__(self, filename):
+        self.file = open(filename, mode="w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["Phi_Deg", "Point_Index", "R_mm", "Z_mm"])
+
+    def write(self, phi, r_vals, z_vals):
+        self.writer.writerows(_csv_rows(phi, r_vals.tolist(), z_vals.tolist()))
+
+    def close(self):
+        self.file.close()
+
+
+class BinarySliceWriter:
+    """Appends slices as float64 [phi, R..., Z...] records."""
+
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+
+    def write(self, phi, r_vals, z_vals):
+        np.concatenate([[phi], r_vals, z_vals]).astype(np.float64).tofile(self.file)
+
+    def close(self):
+        self.file.close()
+
+
+def read_binary_slices(filename, num_points):
+    """
+    Memory-maps a file written by BinarySliceWriter.
+    Returns (phis, R, Z) views of shape (n_phi,) and (n_phi, num_points).
+    """
+    records = np.memmap(filename, dtype=np.float64, mode="r").reshape(
+        -1, 1 + 2 * num_points
+    )
+    return records[:, 0], records[:, 1 : 1 + num_points], records[:, 1 + num_points :]
+
+
+def _drain(writer, items, errors):
+    """Writer thread: writes queued slices until the None sentinel."""
+    try:
+        while True:
+            item = items.get()
+            if item is None:
+                break
+            writer.write(*item)
+    except Exception as e:
+        errors.append(e)
+        # Keep consuming so the producer never blocks on a full queue
+        while items.get() is not None:
+            pass
+    finally:
+        writer.close()
+
+
+def stream_slices(
+    mesh,
+    csv_file,
+    binary_file,
+    start_angle=0,
+    end_angle=90,
+    step=0.5,
+    num_points=500,
+    workers=None,
+    window=STREAM_WINDOW,
+):
+    """
+    Runs the streaming pipeline and returns the number of slices written.
+    """
+    angles = np.arange(start_angle, end_angle + step / 2, step)
+    print(f"Streaming {len(angles)} angles from {start_angle}° to {end_angle}°...")
+
+    writers = [CSVSliceWriter(csv_file), BinarySliceWriter(binary_file)]
+    queues = [queue.Queue(maxsize=window) for _ in writers]
+    errors = []
+    threads = [
+        threading.Thread(target=_drain, args=(writer, items, errors), daemon=True)
+        for writer, items in zip(writers, queues)
+    ]
+    for thread in threads:
+        thread.start()
+
+    count = 0
+    try:
+        for item in iter_smoothed(
+            iter_slices(mesh, angles, num_points, workers=workers, window=window)
+        ):
+            for items in queues:
+                items.put(item)
+            count += 1
+    finally:
+        for items in queues:
+            items.put(None)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    print(f"Streamed {count} slices to {csv_file} and {binary_file}.")
+    return count
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+
+    parser = argparse.ArgumentParser(description="Streaming slicing pipeline")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--step", type=float, default=0.25)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=int, default=STREAM_WINDOW)
+    parser.add_argument("--csv", default="chamber_coordinates_fixed.csv")
+    parser.add_argument("--binary", default="chamber_slices.f64")
+    parser.add_argument("--kisslinger", default="vessel_fixed.kisslinger")
+    args = parser.parse_args()
+
+    mesh = rotate_mesh_to_q1(load_mesh(args.filename))
+
+    t0 = time.perf_counter()
+    stream_slices(
+        mesh,
+        args.csv,
+        args.binary,
+        args.start,
+        args.end,
+        args.step,
+        args.points,
+        workers=args.workers,
+        window=args.window,
+    )
+    print(f"Streamed in {time.perf_counter() - t0:.2f} s")
+
+    phis, R, Z = read_binary_slices(args.binary, args.points)
+    save_to_kisslinger(
+        arrays_to_results(phis, R, Z), args.kisslinger, np.arange(0, 361, 2.0), nfp=1
+    )
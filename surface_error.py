@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Quantitative check of the exported slices against the source mesh.
+
+The (n_phi, n_points) slice set is lofted back into a triangulated surface
+(point j of plane k joined to point j of plane k + 1). Then both directions
+of the two-sided Hausdorff distance are sampled:
+
+    slices -> mesh   every exported point against the source triangles
+    mesh -> slices   area-weighted samples of the source surface (inside the
+                     sliced phi range) against the lofted surface
+
+Closest points come from a KD-tree over triangle centroids. For the exported
+points the nearest candidates are measured exactly and widened until no
+unvisited triangle can be closer, or the point lies on the surface. The
+lofted triangles are small and regular, so the source samples only check
+their nearest few (a bounded search that can only overestimate). Errors are
+reported per plane so bad angles can be found quickly.
+
+Usage:
+    python3 surface_error.py chamber_surface.stl chamber_coordinates_fixed.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from kisslinger_io import read_dataset, results_to_arrays
+
+# Source-surface samples for the mesh -> slices direction
+ERROR_SAMPLES = 50_000
+# Exported points this close to a source triangle (mm) count as on the surface
+SURFACE_TOLERANCE = 1e-6
+# Nearest lofted triangles checked per source sample
+LOFT_CANDIDATES = 8
+
+
+def loft_slices(phis, R, Z):
+    """
+    Triangulates (n_phi, n_points) closed contours at toroidal angles phis
+    (degrees) into a surface. Returns (vertices, faces).
+    """
+    phi = np.radians(np.asarray(phis, dtype=float))[:, None]
+    R = np.asarray(R, dtype=float)
+    vertices = np.stack(
+        [R * np.cos(phi), R * np.sin(phi), np.asarray(Z, dtype=float)], axis=-1
+    ).reshape(-1, 3)
+
+    # Two triangles per quad between neighbouring planes, closed poloidally
+    n_phi, n_points = R.shape
+    k, j = np.meshgrid(np.arange(n_phi - 1), np.arange(n_points), indexing="ij")
+    a = k * n_points + j
+    b = k * n_points + (j + 1) % n_points
+    c, d = a + n_points, b + n_points
+    faces = np.concatenate(
+        [np.stack([a, b, d], axis=-1), np.stack([a, d, c], axis=-1)], axis=-1
+    ).reshape(-1, 3)
+    return vertices, faces
+
+
+def sample_surface(triangles, count, seed=0):
+    """Area-weighted uniform samples on a (n, 3, 3) triangle soup."""
+    rng = np.random.default_rng(seed)
+    a = triangles[:, 0]
+    ab = triangles[:, 1] - a
+    ac = triangles[:, 2] - a
+    area = np.linalg.norm(np.cross(ab, ac), axis=1)
+    face = rng.choice(len(triangles), size=count, p=area / area.sum())
+
+    # Fold samples from the far half of the parallelogram back into the triangle
+    u, v = rng.random((2, count))
+    outside = u + v > 1
+    u[outside], v[outside] = 1 - u[outside], 1 - v[outside]
+    return a[face] + u[:, None] * ab[face] + v[:, None] * ac[face]
+
+
+class TriangleIndex:
+    """Exact closest-point distances to a triangle soup via a centroid KD-tree."""
+
+    def __init__(self, triangles, max_edge=None):
+        import trimesh
+        from scipy.spatial import cKDTree
+
+        triangles = np.asarray(triangles, dtype=np.float64)
+        edges = np.linalg.norm(triangles - np.roll(triangles, 1, axis=1), axis=-1)
+
+        # A few huge CAD triangles would make the search bound useless, so
+        # split anything much longer than the typical edge
+        if max_edge is None:
+            max_edge = max(4 * np.median(edges), edges.max() / 256)
+        if edges.max() > max_edge:
+            vertices, faces, self.face_index = trimesh.remesh.subdivide_to_size(
+                triangles.reshape(-1, 3),
+                np.arange(3 * len(triangles)).reshape(-1, 3),
+                max_edge=max_edge,
+                max_iter=int(np.ceil(np.log2(edges.max() / max_edge))) + 1,
+                return_index=True,
+            )
+            triangles = vertices[faces]
+        else:
+            self.face_index = np.arange(len(triangles))
+
+        # face_index maps every (possibly subdivided) triangle to its input face
+        self.triangles = triangles
+        centroids = triangles.mean(axis=1)
+        self.radius = np.linalg.norm(triangles - centroids[:, None], axis=-1).max()
+        self.tree = cKDTree(centroids)
+
+    def closest(self, points, k=8, chunk_size=100_000, exact=True, tolerance=0.0):
+        """
+        Closest surface point for each (n, 3) point.
+        Returns (distance, closest points, index of the input face).
+
+        With exact=False only the k nearest-centroid triangles are checked,
+        which is much cheaper for points far from the surface and only
+        overestimates the distance when a long thin triangle is nearest.
+        Points within tolerance of a checked triangle are accepted without
+        widening the search, so their distance is exact to within tolerance.
+        """
+        import trimesh
+
+        points = np.asarray(points, dtype=np.float64)
+        distance = np.empty(len(points))
+        closest = np.empty((len(points), 3))
+        face = np.empty(len(points), dtype=np.int64)
+
+        for start in range(0, len(points), chunk_size):
+            pending = np.arange(start, min(start + chunk_size, len(points)))
+            k_chunk = k
+            while len(pending):
+                k_chunk = min(k_chunk, len(self.triangles))
+                centroid_dist, candidates = self.tree.query(points[pending], k=k_chunk)
+                candidates = candidates.reshape(len(pending), -1)
+
+                on_triangle = trimesh.triangles.closest_point(
+                    self.triangles[candidates.ravel()],
+                    np.repeat(points[pending], candidates.shape[1], axis=0),
+                ).reshape(len(pending), -1, 3)
+                dist = np.linalg.norm(on_triangle - points[pending, None], axis=-1)
+                best = dist.argmin(axis=1)
+                rows = np.arange(len(pending))
+                distance[pending] = dist[rows, best]
+                closest[pending] = on_triangle[rows, best]
+                face[pending] = self.face_index[candidates[rows, best]]
+
+                # Every unvisited triangle is at least (centroid distance - radius) away
+                if not exact or k_chunk == len(self.triangles):
+                    break
+                done = (
+                    centroid_dist.reshape(len(pending), -1)[:, -1] - self.radius
+                    >= distance[pending]
+                ) | (distance[pending] <= tolerance)
+                pending = pending[~done]
+                k_chunk *= 2
+
+        return distance, closest, face
+
+    def distance(self, points, k=8, chunk_size=100_000, tolerance=0.0):
+        """Unsigned distance from each (n, 3) point to the nearest triangle."""
+        return self.closest(points, k=k, chunk_size=chunk_size, tolerance=tolerance)[0]
+
+
+def surface_error(mesh, results, samples=ERROR_SAMPLES, seed=0):
+    """
+    Two-sided sampled distance between the sliced results (mm, in the frame
+    of the rotated mesh) and the mesh surface.
+
+    Returns a dict with the per-point slice error (n_phi, n_points), per-plane
+    max/RMS for both directions, and the overall hausdorff and rms values.
+    """
+    phis, R, Z = results_to_arrays(results)
+    triangles = np.asarray(mesh.triangles, dtype=np.float64)
+
+    # slices -> mesh
+    phi_rad = np.radians(phis)[:, None]
+    points = np.stack([R * np.cos(phi_rad), R * np.sin(phi_rad), Z], axis=-1)
+    # The exported points lie on the mesh, so the nearest centroids nearly
+    # always settle them
+    point_error = TriangleIndex(triangles).distance(
+        points.reshape(-1, 3), k=2, tolerance=SURFACE_TOLERANCE
+    )
+    point_error = point_error.reshape(R.shape)
+
+    # mesh -> slices, only for the part of the mesh the slices cover
+    samples_xyz = sample_surface(triangles, samples, seed=seed)
+    sample_phi = np.degrees(np.arctan2(samples_xyz[:, 1], samples_xyz[:, 0]))
+    covered = (sample_phi >= phis[0]) & (sample_phi <= phis[-1])
+    samples_xyz, sample_phi = samples_xyz[covered], sample_phi[covered]
+    vertices, faces = loft_slices(phis, R, Z)
+    # Without the exact search bound there is no need to split long triangles
+    loft = TriangleIndex(vertices[faces], max_edge=np.inf)
+    sample_error = loft.closest(samples_xyz, k=LOFT_CANDIDATES, exact=False)[0]
+
+    # Assign each surface sample to its nearest plane
+    boundaries = (phis[1:] + phis[:-1]) / 2
+    plane = np.searchsorted(boundaries, sample_phi)
+    counts = np.bincount(plane, minlength=len(phis))
+    mesh_max = np.zeros(len(phis))
+    np.maximum.at(mesh_max, plane, sample_error)
+    mesh_rms = np.sqrt(
+        np.bincount(plane, weights=sample_error**2, minlength=len(phis))
+        / np.maximum(counts, 1)
+    )
+
+    all_errors = np.concatenate([point_error.ravel(), sample_error])
+    return {
+        "phis": phis,
+        "point_error": point_error,
+        "slice_max": point_error.max(axis=1),
+        "slice_rms": np.sqrt((point_error**2).mean(axis=1)),
+        "mesh_max": mesh_max,
+        "mesh_rms": mesh_rms,
+        "mesh_samples": counts,
+        "hausdorff": all_errors.max(),
+        "rms": np.sqrt((all_errors**2).mean()),
+    }
+
+
+def print_surface_error(error, top=10):
+    """Prints the summary and the worst planes of a surface_error() result."""
+    plane_max = np.maximum(error["slice_max"], error["mesh_max"])
+    print(f"Hausdorff distance: {error['hausdorff']:.4f} mm")
+    print(f"RMS distance:       {error['rms']:.4f} mm")
+    print(
+        f"  slices -> mesh max {error['slice_max'].max():.4f} mm, "
+        f"mesh -> slices max {error['mesh_max'].max():.4f} mm"
+    )
+
+    print(f"\nWORST {min(top, len(plane_max))} PLANES:")
+    print(
+        f"{'Phi':>10} {'Slice max':>10} {'Slice RMS':>10} {'Mesh max':>10} {'Mesh RMS':>10}"
+    )
+    for k in np.argsort(plane_max)[::-1][:top]:
+        print(
+            f"{error['phis'][k]:>10.4f} {error['slice_max'][k]:>10.4f} "
+            f"{error['slice_rms'][k]:>10.4f} {error['mesh_max'][k]:>10.4f} "
+            f"{error['mesh_rms'][k]:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    from mesh_loader import load_mesh
+    from slice_chamber_final import rotate_mesh_to_q1
+    from kisslinger_io import arrays_to_results
+
+    parser = argparse.ArgumentParser(description="Slice-vs-mesh error report")
+    parser.add_argument("mesh", help="Source STL or STEP file")
+    parser.add_argument("csv", help="CSV export of the slices (mm)")
+    parser.add_argument("--samples", type=int, default=ERROR_SAMPLES)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--save", default=None, help="Save the per-point error map to this .npz"
+    )
+    args = parser.parse_args()
+
+    # The CSV is in the frame of the rotated mesh, like slice_chamber_final.py
+    mesh = rotate_mesh_to_q1(load_mesh(args.mesh))
+    data = read_dataset(args.csv)
+    results = arrays_to_results(data["phis"], data["R"], data["Z"])
+
+    t0 = time.perf_counter()
+    error = surface_error(mesh, results, samples=args.samples)
+    print(f"Computed in {time.perf_counter() - t0:.2f} s\n")
+    print_surface_error(error, top=args.top)
+
+    if args.save:
+        np.savez_compressed(args.save, **error)
+        print(f"\nError map saved to {args.save}")
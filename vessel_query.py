@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Bulk inside/outside and wall-distance queries against the sliced vessel.
+
+The vessel is the stack of closed (R, Z) contours of a Kisslinger file or CSV
+export. For every query point (R, Z, phi) the two bracketing planes are found
+by binary search on phi. On each plane the point is classified with a winding
+number and its distance to the nearest wall segment is taken from a per-plane
+KD-tree of segment midpoints. The signed distances of the two planes are then
+blended linearly in phi, matching the linear blend between planes that
+save_to_kisslinger(interpolation="linear") uses.
+
+Signed distances are positive inside the vessel and negative outside (the
+trimesh convention), in the units of the dataset.
+
+Usage:
+    python3 vessel_query.py vessel_fixed.kisslinger points.txt -o distances.txt
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from kisslinger_io import read_dataset
+
+# Points per thread-pool task (whole planes are kept together)
+QUERY_CHUNK_SIZE = 200_000
+
+
+class VesselQuery:
+    """Per-plane wall segments and KD-trees for repeated bulk queries."""
+
+    def __init__(self, phis, R, Z, period=360.0):
+        from scipy.spatial import cKDTree
+
+        order = np.argsort(phis)
+        self.phis = np.asarray(phis, dtype=float)[order]
+        self.period = period
+
+        # Segment k of a plane runs from point k to point k + 1 (closed contour)
+        self.start = np.stack([np.asarray(R)[order], np.asarray(Z)[order]], axis=-1)
+        self.end = np.roll(self.start, -1, axis=1)
+        self.half_length = (
+            np.linalg.norm(self.end - self.start, axis=-1).max(axis=1) / 2
+        )
+        self.trees = [cKDTree(mid) for mid in (self.start + self.end) / 2]
+
+        # Query phis are wrapped if the planes cover a full period
+        self.wraps = self.phis[-1] - self.phis[0] >= period - 1e-9
+
+    @classmethod
+    def from_dataset(cls, data):
+        """Builds the query structure from a read_dataset() dict."""
+        return cls(data["phis"], data["R"], data["Z"], period=360.0 / data["nfp"])
+
+    def bracket(self, phi):
+        """
+        Returns (lower plane index, weight of the upper plane) for every phi.
+        Angles outside the covered range are held at the end planes.
+        """
+        phi = np.asarray(phi, dtype=float)
+        if self.wraps:
+            phi = self.phis[0] + np.mod(phi - self.phis[0], self.period)
+        phi = np.clip(phi, self.phis[0], self.phis[-1])
+
+        if len(self.phis) == 1:
+            return np.zeros(phi.shape, dtype=int), np.zeros(phi.shape)
+        lower = np.clip(
+            np.searchsorted(self.phis, phi, side="right") - 1, 0, len(self.phis) - 2
+        )
+        weight = (phi - self.phis[lower]) / (self.phis[lower + 1] - self.phis[lower])
+        return lower, weight
+
+    def winding_number(self, plane, R, Z):
+        """
+        Winding number of the plane's contour around each (R, Z) point.
+
+        The points are sorted by Z once; every segment then only visits the
+        points inside its Z span (found by searchsorted), so the work is
+        proportional to the number of actual crossings rather than
+        points x segments.
+        """
+        order = np.argsort(Z)
+        z_sorted = Z[order]
+        start, end = self.start[plane], self.end[plane]
+
+        # Half-open Z spans [z_lo, z_hi) so shared vertices count once
+        upward = end[:, 1] > start[:, 1]
+        z_lo = np.minimum(start[:, 1], end[:, 1])
+        z_hi = np.maximum(start[:, 1], end[:, 1])
+        lo = np.searchsorted(z_sorted, z_lo, side="left")
+        hi = np.searchsorted(z_sorted, z_hi, side="left")
+
+        # Expand every segment into the points of its span
+        counts = hi - lo
+        segment = np.repeat(np.arange(len(start)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        point = order[lo[segment] + offsets]
+
+        # Crossing to the right of the point: sign of the 2D cross product
+        a, b = start[segment], end[segment]
+        cross = (b[:, 0] - a[:, 0]) * (Z[point] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (
+            R[point] - a[:, 0]
+        )
+        direction = np.where(upward[segment], 1, -1)
+        crossing = np.where(upward[segment], cross > 0, cross < 0)
+
+        winding = np.zeros(len(R), dtype=int)
+        np.add.at(winding, point[crossing], direction[crossing])
+        return winding
+
+    def wall_distance(self, plane, R, Z, k=8):
+        """
+        Unsigned distance from each (R, Z) point to the plane's contour.
+
+        The k segments with the nearest midpoints are measured exactly. The
+        result is only final when the k-th midpoint is further away than the
+        best distance plus half the longest segment; the remaining points are
+        re-queried with twice as many candidates.
+        """
+        a_R, a_Z = self.start[plane, :, 0], self.start[plane, :, 1]
+        ab_R, ab_Z = self.end[plane, :, 0] - a_R, self.end[plane, :, 1] - a_Z
+        ab_sq = np.maximum(ab_R**2 + ab_Z**2, 1e-300)
+
+        points = np.column_stack([R, Z])
+        distance = np.empty(len(R))
+        pending = np.arange(len(R))
+        n_segments = len(a_R)
+
+        while len(pending):
+            k = min(k, n_segments)
+            p_R, p_Z = R[pending, None], Z[pending, None]
+            mid_dist, seg = self.trees[plane].query(points[pending], k=k)
+            seg = seg.reshape(len(pending), -1)
+
+            # Closest point on each candidate segment
+            ap_R, ap_Z = p_R - a_R[seg], p_Z - a_Z[seg]
+            t = np.clip((ap_R * ab_R[seg] + ap_Z * ab_Z[seg]) / ab_sq[seg], 0.0, 1.0)
+            best = np.sqrt(
+                ((ap_R - t * ab_R[seg]) ** 2 + (ap_Z - t * ab_Z[seg]) ** 2).min(axis=1)
+            )
+            distance[pending] = best
+
+            if k == n_segments:
+                break
+            done = mid_dist.reshape(len(pending), -1)[:, -1] >= (
+                best + self.half_length[plane]
+            )
+            pending = pending[~done]
+            k *= 2
+
+        return distance
+
+    def plane_signed_distance(self, plane, R, Z):
+        """Signed distance to one plane's contour, positive inside."""
+        inside = self.winding_number(plane, R, Z) != 0
+        return np.where(inside, 1.0, -1.0) * self.wall_distance(plane, R, Z)
+
+    def _signed_distance_planes(self, groups):
+        """Weighted plane distances for a batch of (plane, points, weights) groups."""
+        return [
+            (points, weights * self.plane_signed_distance(plane, R, Z))
+            for plane, points, weights, R, Z in groups
+        ]
+
+    def signed_distance(self, R, Z, phi, chunk_size=QUERY_CHUNK_SIZE, workers=None):
+        """
+        Signed distance to the wall for arrays of points (phi in degrees),
+        positive inside. The points are grouped by bracketing plane and the
+        planes are batched into tasks of about chunk_size points, which run on
+        a thread pool of workers threads (default: one per CPU).
+        """
+        R, Z, phi = np.broadcast_arrays(
+            np.asarray(R, dtype=float),
+            np.asarray(Z, dtype=float),
+            np.asarray(phi, dtype=float),
+        )
+        shape = R.shape
+        R, Z, phi = R.ravel(), Z.ravel(), phi.ravel()
+
+        # Every point contributes to its lower and upper plane; sort the
+        # (point, plane) pairs by plane so each plane is visited once
+        lower, weight = self.bracket(phi)
+        points = np.tile(np.arange(len(R)), 2)
+        planes = np.concatenate([lower, np.minimum(lower + 1, len(self.phis) - 1)])
+        weights = np.concatenate([1.0 - weight, weight])
+        order = np.flatnonzero(weights > 0)
+        order = order[np.argsort(planes[order], kind="stable")]
+        unique_planes, first = np.unique(planes[order], return_index=True)
+
+        tasks, batch, batch_size = [], [], 0
+        for plane, index in zip(unique_planes, np.split(order, first[1:])):
+            batch.append(
+                (
+                    plane,
+                    points[index],
+                    weights[index],
+                    R[points[index]],
+                    Z[points[index]],
+                )
+            )
+            batch_size += len(index)
+            if batch_size >= chunk_size:
+                tasks.append(batch)
+                batch, batch_size = [], 0
+        if batch:
+            tasks.append(batch)
+
+        workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+        if workers <= 1:
+            parts = [self._signed_distance_planes(task) for task in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(self._signed_distance_planes, tasks))
+
+        result = np.zeros(len(R))
+        for part in parts:
+            for index, values in part:
+                result[index] += values
+        return result.reshape(shape)
+
+    def contains(self, R, Z, phi, **kwargs):
+        """True for points inside the vessel, see signed_distance()."""
+        return self.signed_distance(R, Z, phi, **kwargs) > 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query points against the vessel")
+    parser.add_argument("vessel", help="Kisslinger file or CSV export")
+    parser.add_argument(
+        "points", help="Text file with R Z phi columns (vessel units, degrees)"
+    )
+    parser.add_argument("-o", "--output", default="vessel_distances.txt")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=QUERY_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    data = read_dataset(args.vessel)
+    points = np.loadtxt(args.points, ndmin=2, delimiter=None)
+
+    t0 = time.perf_counter()
+    query = VesselQuery.from_dataset(data)
+    distance = query.signed_distance(
+        points[:, 0],
+        points[:, 1],
+        points[:, 2],
+        chunk_size=args.chunk,
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - t0
+
+    np.savetxt(
+        args.output,
+        np.column_stack([points[:, :3], distance, distance > 0]),
+        fmt=["%.6f", "%.6f", "%.4f", "%.6f", "%d"],
+        header=f"R Z phi signed_distance_{data['units']} inside",
+    )
+    print(
+        f"{len(points)} points in {elapsed:.2f} s: "
+        f"{np.count_nonzero(distance > 0)} inside, saved to {args.output}"
+    )
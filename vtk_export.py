@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Structured-grid VTK export of a slice set for ParaView.
+
+The (n_phi, n_points) planes are written as one VTK XML StructuredGrid
+(.vts): point j of plane k is grid node (j, k). Point 0 is repeated at the end
+of every plane so the surface closes poloidally. All arrays go into a single
+appended raw binary block after the XML header, so a 1440x1000 set is one
+bulk write and opens without parsing text.
+
+Per-point scalars:
+
+    PointIndex   index of the point within its plane
+    Phi          toroidal angle of the plane (degrees)
+    ToroidalJump distance to the same point index on the previous plane
+                 (0 on the first plane)
+    Error        distance to the source mesh, when a mesh or error map is given
+
+Usage:
+    python3 vtk_export.py chamber_coordinates_fixed.csv -o chamber.vts
+    python3 vtk_export.py chamber_coordinates_fixed.csv -o chamber.vts --mesh chamber_surface.stl
+    python3 vtk_export.py chamber_coordinates_fixed.csv -o chamber.vts --error errors.npz
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from kisslinger_io import read_dataset, results_to_arrays
+
+# numpy dtype -> VTK type name
+VTK_TYPES = {
+    np.dtype(np.int32): "Int32",
+    np.dtype(np.float32): "Float32",
+    np.dtype(np.float64): "Float64",
+}
+
+
+def grid_points(phis, R, Z):
+    """Cartesian (n_phi, n_points, 3) points of the planes."""
+    phi = np.radians(np.asarray(phis, dtype=float))[:, None]
+    R = np.asarray(R, dtype=float)
+    return np.stack(
+        [R * np.cos(phi), R * np.sin(phi), np.asarray(Z, dtype=float)], axis=-1
+    )
+
+
+def toroidal_jump(R, Z):
+    """Distance from every point to the same index on the previous plane."""
+    jump = np.zeros(np.shape(R))
+    jump[1:] = np.hypot(np.diff(R, axis=0), np.diff(Z, axis=0))
+    return jump
+
+
+def write_vts(filename, phis, R, Z, error=None):
+    """
+    Writes the planes as a VTK XML StructuredGrid with appended raw data.
+    error is an optional (n_phi, n_points) array of per-point distances.
+    """
+    phis = np.asarray(phis, dtype=float)
+    R = np.asarray(R, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+    n_phi, n_points = R.shape
+
+    scalars = {
+        "PointIndex": np.broadcast_to(
+            np.arange(n_points, dtype=np.int32), (n_phi, n_points)
+        ),
+        "Phi": np.broadcast_to(phis[:, None], (n_phi, n_points)),
+        "ToroidalJump": toroidal_jump(R, Z),
+    }
+    if error is not None:
+        scalars["Error"] = np.asarray(error, dtype=float)
+
+    # Close every plane by repeating point 0; VTK wants the i index fastest
+    def closed(values):
+        values = np.asarray(values)
+        return np.ascontiguousarray(np.concatenate([values, values[:, :1]], axis=1))
+
+    arrays = [(name, closed(values), 1) for name, values in scalars.items()]
+    arrays.append(("Points", closed(grid_points(phis, R, Z)), 3))
+
+    # XML header with the offset of every array in the appended block, each
+    # array preceded by its UInt64 byte count
+    header_lines = []
+    offset = 0
+    for name, values, components in arrays:
+        header_lines.append(
+            f'<DataArray type="{VTK_TYPES[values.dtype]}" Name="{name}" '
+            f'NumberOfComponents="{components}" format="appended" offset="{offset}"/>'
+        )
+        offset += 8 + values.nbytes
+
+    extent = f"0 {n_points} 0 {n_phi - 1} 0 0"
+    byte_order = "LittleEndian" if sys.byteorder == "little" else "BigEndian"
+    header = "\n".join(
+        [
+            '<?xml version="1.0"?>',
+            f'<VTKFile type="StructuredGrid" version="1.0" '
+            f'byte_order="{byte_order}" header_type="UInt64">',
+            f'  <StructuredGrid WholeExtent="{extent}">',
+            f'    <Piece Extent="{extent}">',
+            '      <PointData Scalars="ToroidalJump">',
+            *(f"        {line}" for line in header_lines[:-1]),
+            "      </PointData>",
+            "      <Points>",
+            f"        {header_lines[-1]}",
+            "      </Points>",
+            "    </Piece>",
+            "  </StructuredGrid>",
+            '  <AppendedData encoding="raw">',
+            "   _",
+        ]
+    )
+
+    chunks = [header.encode("ascii")]
+    for _, values, _ in arrays:
+        chunks.append(np.uint64(values.nbytes).tobytes())
+        chunks.append(values.tobytes())
+    chunks.append(b"\n  </AppendedData>\n</VTKFile>\n")
+    with open(filename, "wb") as f:
+        f.write(b"".join(chunks))
+    print(f"Wrote {n_phi}x{n_points} structured grid to {filename}")
+
+
+def write_results_vts(filename, results, error=None):
+    """write_vts() for a {phi: (R, Z)} dict, e.g. from generate_slices()."""
+    write_vts(filename, *results_to_arrays(results), error=error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export slices as a VTK grid")
+    parser.add_argument("input", help="CSV export or Kisslinger file")
+    parser.add_argument("-o", "--output", default="slices.vts")
+    parser.add_argument(
+        "--mesh",
+        default=None,
+        help="Source mesh (CSV input only), adds the per-point Error scalar",
+    )
+    parser.add_argument(
+        "--error",
+        default=None,
+        help="Error map saved by surface_error.py --save, used as the Error scalar",
+    )
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    data = read_dataset(args.input)
+    error = None
+    if args.error:
+        error = np.load(args.error)["point_error"]
+        if error.shape != data["R"].shape:
+            parser.error(f"Error map {error.shape} doesn't match {data['R'].shape}.")
+    elif args.mesh:
+        from mesh_loader import load_mesh
+        from slice_chamber_final import rotate_mesh_to_q1
+        from surface_error import TriangleIndex
+
+        if data["units"] != "mm":
+            parser.error("--mesh needs the CSV export (mm) of the same mesh.")
+        # The CSV is in the frame of the rotated mesh, like slice_chamber_final.py
+        mesh = rotate_mesh_to_q1(load_mesh(args.mesh))
+        points = grid_points(data["phis"], data["R"], data["Z"])
+        error = TriangleIndex(mesh.triangles).distance(points.reshape(-1, 3))
+        error = error.reshape(data["R"].shape)
+
+    t1 = time.perf_counter()
+    write_vts(args.output, data["phis"], data["R"], data["Z"], error=error)
+    print(f"Prepared in {t1 - t0:.2f} s, written in {time.perf_counter() - t1:.2f} s")
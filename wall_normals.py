@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Per-point wall normals and incidence angles for heat-load work.
+
+The points are the ones the CSV export writes: get_rz_slice() with
+return_faces=True slices exactly like the default path and carries the face
+of every section segment through the sort and resampling, and toroidal
+smoothing carries the faces along. Normals for the whole
+(n_phi, n_points) set then come from one gather into the face normals.
+Large binary STLs are read out of core (stl_reader.BinarySTL), like in
+slice_chamber_final.py; only the triangles under the points are read back
+for their normals.
+
+Extra CSV columns after the save_to_csv() ones:
+
+    Face_ID         index of the mesh face the point lies on
+    N_X, N_Y, N_Z   unit face normal
+    Incidence_Deg   angle between a purely toroidal field line and the
+                    wall at the point: asin(|n . e_phi|)
+
+Coordinates and normals are in the frame of the rotated mesh, like the CSV
+export of slice_chamber_final.py. Face normals follow the mesh winding; for
+a consistently wound closed surface they point out of the solid.
+
+Usage:
+    python3 wall_normals.py chamber_surface.stl -o chamber_wall_normals.csv
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from kisslinger_io import results_to_arrays
+from slice_chamber_final import (
+    _csv_rows,
+    generate_slices,
+    smooth_toroidal_continuity,
+)
+
+WALL_COLUMNS = ("Face_ID", "N_X", "N_Y", "N_Z", "Incidence_Deg")
+
+
+def point_normals(mesh, face_ids):
+    """Unit normals of the faces under an array of face IDs (any shape)."""
+    if hasattr(mesh, "face_normals_at"):
+        return mesh.face_normals_at(face_ids)
+    return np.asarray(mesh.face_normals)[face_ids]
+
+
+def toroidal_incidence(phis, normals):
+    """
+    Angle in degrees between the toroidal direction of every plane and the
+    wall, for (n_phi, n_points, 3) normals: 0 where a toroidal field line
+    grazes the wall, 90 where it hits it head-on.
+    """
+    phi = np.radians(np.asarray(phis, dtype=float))[:, None]
+    e_phi_dot_n = -np.sin(phi) * normals[..., 0] + np.cos(phi) * normals[..., 1]
+    return np.degrees(np.arcsin(np.clip(np.abs(e_phi_dot_n), 0, 1)))
+
+
+def wall_data(mesh, start_angle=0, end_angle=90, step=0.25, num_points=500):
+    """
+    Slices the mesh with face tracking and smooths it like the main pipeline.
+    Returns a dict of phis, R, Z, face_ids, normals and incidence arrays.
+    """
+    results = smooth_toroidal_continuity(
+        generate_slices(
+            mesh, start_angle, end_angle, step, num_points, return_faces=True
+        )
+    )
+    if not results:
+        raise ValueError("The mesh produced no slices.")
+    phis, R, Z = results_to_arrays(results)
+    face_ids = np.array([results[phi][2] for phi in phis])
+    normals = point_normals(mesh, face_ids)
+    return {
+        "phis": phis,
+        "R": R,
+        "Z": Z,
+        "face_ids": face_ids,
+        "normals": normals,
+        "incidence": toroidal_incidence(phis, normals),
+    }
+
+
+def save_wall_csv(data, filename):
+    """Writes the save_to_csv() columns plus the WALL_COLUMNS per point."""
+    print(f"Saving wall data to {filename}...")
+    with open(filename, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Phi_Deg", "Point_Index", "R_mm", "Z_mm", *WALL_COLUMNS])
+        for k, phi in enumerate(data["phis"].tolist()):
+            extra = zip(
+                data["face_ids"][k].tolist(),
+                data["normals"][k].tolist(),
+                data["incidence"][k].tolist(),
+            )
+            writer.writerows(
+                [*row, face, *(f"{n:.6f}" for n in normal), f"{angle:.4f}"]
+                for row, (face, normal, angle) in zip(
+                    _csv_rows(phi, data["R"][k], data["Z"][k]), extra
+                )
+            )
+    print("Save complete.")
+
+
+if __name__ == "__main__":
+    import os
+
+    from mesh_loader import load_mesh
+    from slice_chamber_final import OUT_OF_CORE_BYTES, rotate_mesh_to_q1
+    from stl_reader import BinarySTL, is_binary_stl
+
+    parser = argparse.ArgumentParser(description="Per-point wall normals")
+    parser.add_argument("filename", help="STL or STEP file")
+    parser.add_argument("-o", "--output", default="chamber_wall_normals.csv")
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--step", type=float, default=0.25)
+    parser.add_argument("--points", type=int, default=500)
+    args = parser.parse_args()
+
+    if os.path.getsize(args.filename) > OUT_OF_CORE_BYTES and is_binary_stl(
+        args.filename
+    ):
+        mesh = BinarySTL(args.filename)
+    else:
+        mesh = load_mesh(args.filename)
+    mesh = rotate_mesh_to_q1(mesh)
+    t0 = time.perf_counter()
+    data = wall_data(mesh, args.start, args.end, args.step, args.points)
+    t1 = time.perf_counter()
+    save_wall_csv(data, args.output)
+    print(
+        f"{data['face_ids'].size} points: sliced in {t1 - t0:.1f} s, "
+        f"written in {time.perf_counter() - t1:.1f} s"
+    )
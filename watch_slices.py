@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Watch a CAD export and re-slice only the toroidal angles that changed.
+
+Every triangle is hashed (quantized coordinates times fixed random
+multipliers, wrapping uint64 arithmetic) and its hash is added to every slice
+angle its toroidal extent covers. The per-angle sums don't depend on triangle
+order, so when the file is rewritten only the angles whose sum changed are
+sectioned again. The new slices are spliced into the existing results, the
+toroidal smoothing is re-run from the first changed angle until it converges
+back onto the previous solution, and the outputs are rewritten.
+
+Usage:
+    python3 watch_slices.py chamber_surface.stl --step 0.25 --points 500
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from mesh_loader import load_mesh
+from slice_chamber_final import (
+    _align_to_previous,
+    get_rz_slice,
+    rotate_mesh_to_q1,
+    save_to_csv,
+    save_to_kisslinger,
+)
+
+# Coordinates are quantized to this grid (mm) before hashing
+HASH_QUANTUM = 1e-3
+
+# Fixed multipliers so hashes are comparable between runs
+_HASH_MULTIPLIERS = np.random.default_rng(20260129).integers(
+    1, 2**63, size=9, dtype=np.uint64
+) | np.uint64(1)
+
+
+def slice_angles(start_angle, end_angle, step):
+    """The angles generate_slices() visits for the same arguments."""
+    return np.arange(start_angle, end_angle + step / 2, step)
+
+
+def triangle_bin_hashes(mesh, angles):
+    """
+    Returns one uint64 hash per angle, summed over the triangles whose
+    toroidal extent contains that angle.
+    """
+    triangles = np.asarray(mesh.triangles, dtype=np.float64)
+
+    quantized = np.round(triangles.reshape(-1, 9) / HASH_QUANTUM).astype(np.int64)
+    with np.errstate(over="ignore"):
+        tri_hash = (quantized.view(np.uint64) * _HASH_MULTIPLIERS).sum(
+            axis=1, dtype=np.uint64
+        )
+
+    # Toroidal extent of each triangle, unwrapped across the +-180 deg cut
+    phi = np.degrees(np.arctan2(triangles[:, :, 1], triangles[:, :, 0]))
+    wraps = phi.max(axis=1) - phi.min(axis=1) > 180.0
+    phi[wraps] = np.where(phi[wraps] < 0, phi[wraps] + 360.0, phi[wraps])
+    lo = np.searchsorted(angles, phi.min(axis=1) - 1e-9, side="left")
+    hi = np.searchsorted(angles, phi.max(axis=1) + 1e-9, side="right")
+
+    # Expand every triangle into the angle bins it covers
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(triangles)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    bins = lo[owner] + offsets
+
+    bin_hash = np.zeros(len(angles), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        np.add.at(bin_hash, bins, tri_hash[owner])
+    return bin_hash
+
+
+def resmooth_from(raw, smoothed, changed_angles):
+    """
+    Re-runs the toroidal smoothing from the first changed angle onwards,
+    updating smoothed in place. Past the last changed angle it stops at the
+    first slice that lands on the same starting point as before, since every
+    later slice is then unaffected. Returns the angles whose slice was redone.
+    """
+    angles = np.array(sorted(raw.keys()))
+    for phi in list(smoothed.keys()):
+        if phi not in raw:
+            del smoothed[phi]
+    if len(angles) == 0 or len(changed_angles) == 0:
+        return []
+
+    # A changed (or removed) angle affects the first valid slice at or after it
+    positions = np.searchsorted(angles, np.asarray(changed_angles) - 1e-9)
+    first, last = positions.min(), positions.max()
+
+    touched = []
+    for k in range(first, len(angles)):
+        phi = angles[k]
+        if k == 0:
+            new = raw[phi]
+        else:
+            prev_r, prev_z = smoothed[angles[k - 1]]
+            new = _align_to_previous(*raw[phi], prev_r[0], prev_z[0])
+
+        old = smoothed.get(phi)
+        if k > last and old is not None and np.array_equal(old[0], new[0]):
+            break
+        smoothed[phi] = new
+        touched.append(phi)
+    return touched
+
+
+class IncrementalSlicer:
+    """Keeps raw and smoothed slices plus per-angle hashes between runs."""
+
+    def __init__(self, start_angle=0, end_angle=90, step=0.25, num_points=500):
+        self.angles = slice_angles(start_angle, end_angle, step)
+        self.num_points = num_points
+        self.bin_hash = None
+        self.raw = {}
+        self.smoothed = {}
+
+    def update(self, mesh):
+        """Re-slices the changed angles of mesh. Returns the angles re-sectioned."""
+        bin_hash = triangle_bin_hashes(mesh, self.angles)
+        if self.bin_hash is None:
+            changed = np.arange(len(self.angles))
+        else:
+            changed = np.flatnonzero(bin_hash != self.bin_hash)
+        self.bin_hash = bin_hash
+
+        if len(changed) == 0:
+            return []
+
+        print(f"Re-slicing {len(changed)} of {len(self.angles)} angles...")
+        for phi in self.angles[changed]:
+            r_vals, z_vals = get_rz_slice(mesh, phi, num_points=self.num_points)
+            if r_vals is not None:
+                self.raw[phi] = (r_vals, z_vals)
+            else:
+                self.raw.pop(phi, None)
+
+        touched = resmooth_from(self.raw, self.smoothed, self.angles[changed])
+        print(f"Smoothing updated {len(touched)} angles.")
+        return list(self.angles[changed])
+
+
+def _wait_until_stable(filename, interval):
+    """Waits until the file size stops changing (the CAD tool finished writing)."""
+    size = -1
+    while size != os.path.getsize(filename):
+        size = os.path.getsize(filename)
+        time.sleep(interval)
+
+
+def watch(
+    filename,
+    csv_file="chamber_coordinates_fixed.csv",
+    kisslinger_file="vessel_fixed.kisslinger",
+    target_phis=None,
+    interval=1.0,
+    **slice_args,
+):
+    """Polls filename and rewrites the outputs after every change."""
+    if target_phis is None:
+        target_phis = np.arange(0, 361, 2.0)
+
+    slicer = IncrementalSlicer(**slice_args)
+    last_mtime = None
+    print(f"Watching {filename} (Ctrl+C to stop)...")
+
+    while True:
+        try:
+            mtime = os.stat(filename).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is not None and mtime != last_mtime:
+            _wait_until_stable(filename, interval)
+            last_mtime = os.stat(filename).st_mtime
+            t0 = time.perf_counter()
+            try:
+                mesh = rotate_mesh_to_q1(load_mesh(filename))
+                if slicer.update(mesh):
+                    save_to_csv(slicer.smoothed, csv_file)
+                    save_to_kisslinger(slicer.smoothed, kisslinger_file, target_phis)
+                else:
+                    print("No slice angles affected.")
+                print(f"Update finished in {time.perf_counter() - t0:.1f} s")
+            except Exception as e:
+                print(f"Error: {e}")
+
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally re-slice on change")
+    parser.add_argument("filename", help="STL or STEP file to watch")
+    parser.add_argument("--start", type=float, default=0)
+    parser.add_argument("--end", type=float, default=90)
+    parser.add_argument("--step", type=float, default=0.25)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--csv", default="chamber_coordinates_fixed.csv")
+    parser.add_argument("--kisslinger", default="vessel_fixed.kisslinger")
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    try:
+        watch(
+            args.filename,
+            csv_file=args.csv,
+            kisslinger_file=args.kisslinger,
+            interval=args.interval,
+            start_angle=args.start,
+            end_angle=args.end,
+            step=args.step,
+            num_points=args.points,
+        )
+    except KeyboardInterrupt:
+        print("Stopped.")